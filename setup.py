@@ -25,4 +25,7 @@ setuptools.setup(
     ],
     python_requires='>=3.6',
     install_requires=open('requirements.txt').readlines(),
+    extras_require={
+        'parquet': ['pyarrow'],
+    },
 )
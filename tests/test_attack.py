@@ -0,0 +1,40 @@
+import numpy as np
+
+import textattack
+
+from toy_attack import make_attack
+
+EXAMPLES = [('bad and dull', 0), ('good movie', 1), ('good and great and fine', 1), 
+    ('awful bad dull', 0), ('fine', 1)]
+
+def attack_summary(results):
+    return [(type(result).__name__, result.perturbed_result.tokenized_text.text, result.num_queries)
+        for result in results]
+
+def test_concurrent_searches_are_reproducible():
+
+    # Expected
+    transformation = textattack.transformations.WordSwapRandomCharacterDeletion(random_one=True,
+        replace_stopwords=True)
+    attack = make_attack(textattack.search_methods.GeneticAlgorithm, transformation=transformation,
+        pop_size=4, max_iters=3)
+    np.random.seed(1)
+    expected_results = attack_summary(attack.attack_dataset(EXAMPLES, random_seed=0))
+
+    # Actual
+    np.random.seed(2)
+    concurrent_results = attack_summary(attack.attack_dataset(EXAMPLES, num_concurrent=3, 
+        random_seed=0))
+    reordered_results = attack_summary(attack.attack_dataset(EXAMPLES, num_concurrent=2,
+        order='longest-first', random_seed=0))
+    resumed_results = attack_summary(attack.attack_dataset(EXAMPLES[2:], num_concurrent=3, 
+        random_seed=0))
+    global_state = np.random.get_state()[1].copy()
+    
+    # Test
+    assert concurrent_results == expected_results
+    assert reordered_results == expected_results
+    assert resumed_results == expected_results[2:]
+    # Searches don't draw from the global random state.
+    np.random.seed(2)
+    assert (np.random.get_state()[1] == global_state).all()
@@ -0,0 +1,75 @@
+import json
+import os
+import pytest
+
+from textattack.attack_results import AttackResult, SuccessfulAttackResult
+from textattack.shared import AttackCheckpoint
+
+from test_attack_results import make_successful_result
+
+ARGS = {'model': 'lstm-mr', 'recipe': 'textfooler', 'num_examples_offset': 0, 'random_seed': 765}
+
+def test_checkpoint_resume(tmp_path):
+
+    # Expected
+    path = str(tmp_path / 'attack.checkpoint.jsonl')
+    checkpoint = AttackCheckpoint(path, ARGS)
+    checkpoint.add(0, make_successful_result().to_compact())
+    checkpoint.add(2, make_successful_result().to_compact())
+    checkpoint.close()
+    # Simulate a run interrupted while writing a record.
+    with open(path, 'a') as f:
+        f.write('{"index": 3, "res')
+
+    # Actual
+    resumed = AttackCheckpoint.load(path, dict(ARGS))
+    resumed.add(3, make_successful_result().to_compact())
+    resumed.close()
+    reloaded = AttackCheckpoint.load(path, dict(ARGS))
+
+    # Test
+    assert sorted(reloaded.results) == [0, 2, 3]
+    results = reloaded.get_results()
+    assert all(type(result) is SuccessfulAttackResult for result in results)
+    assert results[0].perturbed_result.tokenized_text.text == 'the movie was awful'
+    with open(path) as f:
+        lines = f.readlines()
+    assert len(lines) == 4
+    assert all(json.loads(line) for line in lines)
+
+def test_checkpoint_rejects_changed_args(tmp_path):
+    path = str(tmp_path / 'attack.checkpoint.jsonl')
+    AttackCheckpoint(path, ARGS).close()
+    with pytest.raises(ValueError):
+        AttackCheckpoint.load(path, dict(ARGS, random_seed=1))
+
+def test_checkpoint_syncs_every_interval(tmp_path, monkeypatch):
+
+    # Expected
+    compact_result = make_successful_result().to_compact()
+
+    # Actual
+    num_syncs = 0
+    def count_sync(fd):
+        nonlocal num_syncs
+        num_syncs += 1
+    monkeypatch.setattr(os, 'fsync', count_sync)
+    path = str(tmp_path / 'attack.checkpoint.jsonl')
+    checkpoint = AttackCheckpoint(path, ARGS, sync_interval=60)
+    for index in range(3):
+        checkpoint.add(index, compact_result)
+    num_syncs_before_close = num_syncs
+    with open(path) as f:
+        num_lines_before_close = len(f.readlines())
+    checkpoint.close()
+    in_memory = AttackCheckpoint(None, ARGS)
+    in_memory.add(0, compact_result)
+    in_memory.save_rng_state()
+    in_memory.close()
+
+    # Test
+    assert num_syncs_before_close == 0
+    assert num_lines_before_close == 4
+    assert num_syncs == 1
+    assert in_memory.results == {0: compact_result}
+    assert os.listdir(tmp_path) == ['attack.checkpoint.jsonl']
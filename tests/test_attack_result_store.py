@@ -0,0 +1,62 @@
+import textattack
+from textattack.attack_results import FailedAttackResult, SuccessfulAttackResult
+from textattack.shared import AttackResultStore
+from textattack.shared.attack_result_store import get_attack_fingerprint
+
+from toy_attack import make_attack
+
+EXAMPLES = [('bad and dull', 0), ('a good movie', 1)]
+
+def test_store_insert_and_lookup(tmp_path):
+
+    # Expected
+    attack = make_attack()
+    store = AttackResultStore(str(tmp_path / 'results.db'), attack, random_seed=1)
+    expected_results = list(attack.attack_dataset(EXAMPLES))
+
+    # Actual
+    for (text, output), result in zip(EXAMPLES, expected_results):
+        store.add(text, output, result)
+    store.close()
+    store = AttackResultStore(str(tmp_path / 'results.db'), attack, random_seed=1)
+    actual_results = [store.get(text, output) for text, output in EXAMPLES]
+
+    # Test
+    assert [type(result) for result in actual_results] == [SuccessfulAttackResult, FailedAttackResult]
+    for expected, actual in zip(expected_results, actual_results):
+        assert actual.perturbed_result.tokenized_text.text == expected.perturbed_result.tokenized_text.text
+        assert actual.num_queries == expected.num_queries
+    assert store.get('an unseen text', 1) is None
+    store.close()
+
+def test_attack_dataset_reuses_stored_results(tmp_path):
+
+    # Expected
+    attack = make_attack()
+    store = AttackResultStore(str(tmp_path / 'results.db'), attack)
+    expected_results = list(attack.attack_dataset(EXAMPLES, result_store=store))
+
+    # Actual
+    def attack_one(*args):
+        raise AssertionError('Stored examples should not be attacked again')
+    attack.attack_one = attack_one
+    actual_results = list(attack.attack_dataset(EXAMPLES, result_store=store))
+    store.close()
+
+    # Test
+    assert [result.perturbed_result.tokenized_text.text for result in actual_results] == \
+        [result.perturbed_result.tokenized_text.text for result in expected_results]
+
+def test_fingerprint_covers_settings():
+    beam_search = textattack.search_methods.BeamSearch
+    fingerprint = get_attack_fingerprint(make_attack(beam_search, beam_width=4))
+    assert fingerprint == get_attack_fingerprint(make_attack(beam_search, beam_width=4))
+    assert fingerprint != get_attack_fingerprint(make_attack(beam_search, beam_width=8))
+    assert fingerprint != get_attack_fingerprint(make_attack(beam_search, beam_width=4), random_seed=1)
+    attack = make_attack(beam_search, beam_width=4)
+    attack.goal_function.target_max_score = 0.2
+    assert fingerprint != get_attack_fingerprint(attack)
+    # Counters that change as the attack runs don't change the fingerprint.
+    attack = make_attack(beam_search, beam_width=4)
+    attack.goal_function.num_queries = 100
+    assert fingerprint == get_attack_fingerprint(attack)
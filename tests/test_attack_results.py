@@ -0,0 +1,58 @@
+import json
+import torch
+
+from textattack.attack_results import AttackResult, SkippedAttackResult, SuccessfulAttackResult
+from textattack.goal_function_results import ClassificationGoalFunctionResult
+from textattack.shared import TokenizedText
+
+def make_successful_result():
+    # Classification goal functions return tensors for the output, score and
+    # whether the goal succeeded.
+    original_result = ClassificationGoalFunctionResult(
+        TokenizedText('the movie was great', None), torch.tensor(1), 
+        torch.tensor(False), torch.tensor(0.25))
+    perturbed_result = ClassificationGoalFunctionResult(
+        TokenizedText('the movie was awful', None), torch.tensor(0), 
+        torch.tensor(True), torch.tensor(0.75))
+    result = SuccessfulAttackResult(original_result, perturbed_result)
+    result.num_queries = 12
+    result.attack_time = 0.5
+    return result
+
+def test_compact_json_round_trip():
+
+    # Expected
+    result = make_successful_result()
+
+    # Actual
+    compact = json.loads(json.dumps(result.to_compact()))
+    restored = AttackResult.from_compact(compact)
+
+    # Test
+    assert AttackResult.compact_type(compact) is SuccessfulAttackResult
+    assert type(restored) is SuccessfulAttackResult
+    assert restored.original_result.tokenized_text.text == 'the movie was great'
+    assert restored.perturbed_result.tokenized_text.text == 'the movie was awful'
+    assert restored.original_result.output == 1
+    assert restored.perturbed_result.output == 0
+    assert restored.original_result.succeeded is False
+    assert restored.perturbed_result.succeeded is True
+    assert restored.perturbed_result.score == 0.75
+    assert restored.num_queries == 12
+    assert restored.attack_time == 0.5
+
+def test_skipped_compact_json_round_trip():
+
+    # Expected
+    original_result = ClassificationGoalFunctionResult(
+        TokenizedText('a fine film', None), torch.tensor(1), torch.tensor(True), 
+        torch.tensor(1.0))
+    result = SkippedAttackResult(original_result)
+
+    # Actual
+    restored = AttackResult.from_compact(json.loads(json.dumps(result.to_compact())))
+
+    # Test
+    assert type(restored) is SkippedAttackResult
+    assert restored.original_result.tokenized_text.text == 'a fine film'
+    assert restored.original_result.succeeded is True
@@ -0,0 +1,77 @@
+import socket
+import sys
+import torch
+
+import textattack
+from textattack.datasets import write_columnar_dataset
+from textattack.shared.scripts import run_attack_distributed, run_attack_parallel
+from textattack.shared.scripts.coordinator import get_host_args, get_shared_args
+from textattack.shared.scripts.run_attack_args_helper import get_args
+
+from toy_attack import make_attack
+
+EXAMPLES = [('bad and dull', 0), ('awful', 1), ('a good movie', 1)]
+
+def parse_args(monkeypatch, *command_line_args):
+    monkeypatch.setattr(sys, 'argv', ['textattack', *command_line_args])
+    return get_args()
+
+def run_worker_host(args):
+    """ Runs workers for a coordinator, forking them from this process so
+        that they attack with the toy attack.
+    """
+    fork_context = torch.multiprocessing.get_context('fork')
+    torch.multiprocessing.get_context = lambda method=None: fork_context
+    run_attack_parallel.parse_goal_function_and_attack_from_args = lambda args, model=None: (None, make_attack())
+    run_attack_distributed.run(args)
+
+def test_workers_use_their_own_paths(monkeypatch):
+
+    # Actual
+    coordinator_args = parse_args(monkeypatch, '--coordinator', '127.0.0.1:1234',
+        '--out-dir', '/coordinator/outputs', '--result-store', '/coordinator/results.db')
+    worker_args = parse_args(monkeypatch, '--worker-of', '127.0.0.1:1234',
+        '--result-store', '/worker/results.db')
+    shared_args = get_shared_args(coordinator_args)
+    host_args = get_host_args(shared_args, worker_args)
+
+    # Test
+    assert 'out_dir' not in shared_args
+    assert 'result_store' not in shared_args
+    assert host_args['result_store'] == '/worker/results.db'
+    assert host_args['out_dir'] is None
+    assert host_args['coordinator'] == '127.0.0.1:1234'
+
+def test_coordinator_and_worker_on_localhost(tmp_path, monkeypatch):
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        address = f'127.0.0.1:{s.getsockname()[1]}'
+    dataset_path = str(tmp_path / 'dataset')
+    write_columnar_dataset(EXAMPLES, dataset_path)
+    coordinator_args = parse_args(monkeypatch, '--coordinator', address, '--auth-key', 'test',
+        '--columnar-dataset', dataset_path, '--num-examples', str(len(EXAMPLES)),
+        '--out-dir', str(tmp_path), '--disable-stdout')
+    worker_args = parse_args(monkeypatch, '--worker-of', address, '--auth-key', 'test',
+        '--num-workers', '1', '--threads-per-worker', '1')
+
+    # Expected
+    expected_results = list(make_attack().attack_dataset(EXAMPLES,
+        random_seed=coordinator_args.random_seed))
+    expected_texts = [result.perturbed_result.tokenized_text.text for result in expected_results]
+
+    # Actual
+    logged_results = []
+    monkeypatch.setattr(textattack.loggers.AttackLogManager, 'log_result',
+        lambda self, result: logged_results.append(result))
+    host = torch.multiprocessing.get_context('fork').Process(target=run_worker_host,
+        args=(worker_args,))
+    host.start()
+    run_attack_parallel.run(coordinator_args)
+    host.join(timeout=60)
+    if host.is_alive():
+        host.terminate()
+
+    # Test
+    assert [result.perturbed_result.tokenized_text.text for result in logged_results] == expected_texts
+    assert [type(result) for result in logged_results] == [type(result) for result in expected_results]
+    assert host.exitcode == 0
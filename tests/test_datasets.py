@@ -0,0 +1,175 @@
+import os
+import pickle
+
+import textattack.datasets as datasets
+from textattack.shared import utils
+
+class ToyTextDataset(datasets.TextAttackDataset):
+    """ Reads `label text` lines from a text file. """
+    def __init__(self, file_path, offset=0):
+        self._load_classification_text_file(file_path, offset=offset)
+
+    def _process_example_from_file(self, raw_line):
+        label, text = raw_line.strip().split(' ', 1)
+        return (text, int(label))
+
+class ToyRawTextDataset(ToyTextDataset):
+    """ Reads the raw lines of a text file. """
+    def _process_example_from_file(self, raw_line):
+        return raw_line
+
+class ToyPickleDataset(datasets.TextAttackDataset):
+    """ Reads examples from a pickled list. """
+    def __init__(self, file_path, offset=0):
+        self._load_pickle_file(file_path, offset=offset)
+
+def write_toy_text_file(path, num_examples=20):
+    with open(path, 'w') as f:
+        for i in range(num_examples):
+            f.write(f'{i % 2} example number {i} ünïcode\n')
+    return str(path)
+
+def test_columnar_dataset_round_trip(tmp_path):
+
+    # Expected
+    expected_examples = list(ToyTextDataset(write_toy_text_file(tmp_path / 'toy.txt')))
+
+    # Actual
+    columnar_path = str(tmp_path / 'toy.columnar')
+    datasets.write_columnar_dataset(expected_examples, columnar_path)
+    dataset = datasets.ColumnarDataset(columnar_path, offset=3)
+    text_output_dataset = str(tmp_path / 'text.columnar')
+    datasets.write_columnar_dataset([('a', 'x y'), ('b', 'z')], text_output_dataset)
+
+    # Test
+    assert list(dataset) == expected_examples[3:]
+    assert dataset.examples[-1] == expected_examples[-1]
+    assert type(dataset.examples[0][1]) is int
+    assert list(datasets.ColumnarDataset(text_output_dataset)) == [('a', 'x y'), ('b', 'z')]
+
+def test_columnar_dataset_lengths(tmp_path):
+
+    # Expected
+    examples = [('one two', 0), ('one two three four', 1), ('one', 0), ('one, two-three', 1)]
+    expected_lengths = [4, 3]
+
+    # Actual
+    columnar_path = str(tmp_path / 'toy.columnar')
+    datasets.write_columnar_dataset(examples, columnar_path)
+    dataset = datasets.ColumnarDataset(columnar_path)
+    dataset.examples = dataset.examples[1::2]
+
+    # Test
+    assert [dataset.example_length(i) for i in range(2)] == expected_lengths
+    assert ToyTextDataset(write_toy_text_file(tmp_path / 'toy.txt')).example_length(0) is None
+
+def test_lazy_examples_match_file(tmp_path):
+
+    # Expected
+    text_path = write_toy_text_file(tmp_path / 'toy.txt')
+    with open(text_path, encoding='utf-8') as f:
+        expected_examples = [(text.strip(), int(label)) 
+            for label, text in (line.split(' ', 1) for line in f)]
+
+    # Actual
+    dataset = ToyTextDataset(text_path, offset=2)
+    index_exists = os.path.exists(text_path + '.index.npy')
+    reloaded_dataset = ToyTextDataset(text_path)
+    # Appending to the file makes the saved index stale.
+    with open(text_path, 'a', encoding='utf-8') as f:
+        f.write('1 an appended example\n')
+    appended_dataset = ToyTextDataset(text_path)
+
+    # Test
+    assert index_exists
+    assert isinstance(dataset.examples, datasets.dataset.LazyExamples)
+    assert list(dataset) == expected_examples[2:]
+    assert dataset.examples[-1] == expected_examples[-1]
+    assert list(reloaded_dataset) == expected_examples
+    assert len(appended_dataset.examples) == len(expected_examples) + 1
+    assert appended_dataset.examples[-1] == ('an appended example', 1)
+
+def test_shuffle_and_shard(tmp_path):
+
+    # Expected
+    text_path = write_toy_text_file(tmp_path / 'toy.txt')
+    all_examples = list(ToyTextDataset(text_path))
+
+    # Actual
+    shuffled = list(ToyTextDataset(text_path).shuffle(seed=3))
+    reshuffled = list(ToyTextDataset(text_path).shuffle(seed=3))
+    shards = [list(ToyTextDataset(text_path).shuffle(seed=3).shard(index, 3)) for index in range(3)]
+    columnar_path = str(tmp_path / 'toy.columnar')
+    datasets.write_columnar_dataset(all_examples, columnar_path)
+    columnar_shuffled = list(datasets.ColumnarDataset(columnar_path).shuffle(seed=3))
+    list_dataset = ToyTextDataset(text_path)
+    list_dataset.examples = list(list_dataset.examples)
+    list_shard = list(list_dataset.shard(1, 3))
+
+    # Test
+    assert shuffled == reshuffled
+    assert shuffled != all_examples
+    assert sorted(shuffled) == sorted(all_examples)
+    assert columnar_shuffled == shuffled
+    assert sorted(sum(shards, [])) == sorted(all_examples)
+    assert [len(shard) for shard in shards] == [7, 7, 6]
+    assert shards[1] == shuffled[1::3]
+    assert list_shard == all_examples[1::3]
+
+def test_lazy_examples_windows_line_endings(tmp_path):
+
+    # Expected
+    unix_path = write_toy_text_file(tmp_path / 'unix.txt')
+    expected_examples = list(ToyTextDataset(unix_path))
+
+    # Actual
+    windows_path = str(tmp_path / 'windows.txt')
+    with open(unix_path, 'rb') as f, open(windows_path, 'wb') as g:
+        g.write(f.read().replace(b'\n', b'\r\n'))
+    dataset = ToyTextDataset(windows_path)
+    raw_lines = list(ToyRawTextDataset(windows_path))
+
+    # Test
+    assert list(dataset) == expected_examples
+    assert all(line.endswith(' ünïcode\n') for line in raw_lines)
+
+def test_lazy_examples_close(tmp_path):
+
+    # Expected
+    text_path = write_toy_text_file(tmp_path / 'toy.txt')
+    expected_examples = list(ToyTextDataset(text_path))
+
+    # Actual
+    with ToyTextDataset(text_path).examples as examples:
+        first_example = examples[0]
+        open_file = examples._file
+    examples_after_close = list(examples)
+    examples.close()
+
+    # Test
+    assert first_example == expected_examples[0]
+    assert open_file.closed
+    assert examples._file is None
+    assert examples_after_close == expected_examples
+
+def test_pickle_examples_are_cached(tmp_path, monkeypatch):
+
+    # Expected
+    expected_examples = [(f'example number {i}', i % 2) for i in range(5)]
+    cache_dir = tmp_path / 'cache'
+
+    # Actual
+    monkeypatch.setitem(utils.config_dict, 'CACHE_DIR', str(cache_dir))
+    data_dir = tmp_path / 'data'
+    data_dir.mkdir()
+    pickle_path = str(data_dir / 'toy.pkl')
+    with open(pickle_path, 'wb') as f:
+        pickle.dump(expected_examples, f)
+    dataset = ToyPickleDataset(pickle_path, offset=1)
+    reloaded_dataset = ToyPickleDataset(pickle_path)
+
+    # Test
+    assert list(dataset) == expected_examples[1:]
+    assert list(reloaded_dataset) == expected_examples
+    assert not any(name.endswith('.examples') for name in os.listdir(data_dir))
+    assert any(name.endswith('.examples') for name in os.listdir(cache_dir / 'examples'))
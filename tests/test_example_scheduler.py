@@ -0,0 +1,145 @@
+import queue
+
+from textattack.shared.scripts.example_scheduler import ExampleScheduler
+
+def screen_all(scheduler, in_queue, worker_id=0, skipped_ids=[]):
+    """ Takes the screening task for every example off `in_queue`, and 
+        screens them, skipping those in `skipped_ids`.
+    """
+    scheduler.fill()
+    task, examples = in_queue.get()
+    assert task == 'screen'
+    scheduler.started(worker_id, [example_id for example_id, _, _ in examples])
+    scheduler.screened(worker_id, skipped_ids)
+    scheduler.fill()
+
+def attack_order(scheduler, in_queue, worker_id=0):
+    """ Returns the order examples are sent to be attacked in. """
+    example_ids = []
+    while not in_queue.empty():
+        task, ((example_id, _, _, _),) = in_queue.get()
+        assert task == 'attack'
+        scheduler.started(worker_id, [example_id])
+        scheduler.finished(worker_id, example_id)
+        example_ids.append(example_id)
+        scheduler.fill()
+    return example_ids
+
+def test_longest_first_orders_by_number_of_words():
+
+    # Expected
+    texts = ['an extraordinarily lengthy vocabulary', 'a b c d e f', 'one two three', 'x y']
+    expected_order = [1, 0, 2, 3]
+
+    # Actual
+    in_queue = queue.Queue()
+    scheduler = ExampleScheduler(in_queue, max_queued=1, order='longest-first')
+    for text in texts:
+        scheduler.add(text, 0)
+    screen_all(scheduler, in_queue)
+
+    # Test
+    assert attack_order(scheduler, in_queue) == expected_order
+
+def test_lengths_from_dataset_index():
+
+    # Actual
+    in_queue = queue.Queue()
+    scheduler = ExampleScheduler(in_queue, max_queued=1, order='longest-first')
+    scheduler.add('short', 0, length=10)
+    scheduler.add('a much longer text', 0, length=1)
+    screen_all(scheduler, in_queue)
+
+    # Test
+    assert attack_order(scheduler, in_queue) == [0, 1]
+
+def test_retries_examples_of_crashed_worker():
+
+    # Actual
+    in_queue = queue.Queue()
+    scheduler = ExampleScheduler(in_queue, max_queued=1, max_retries=1, order='dataset')
+    scheduler.add('first example', 0)
+    scheduler.add('second example', 1)
+    screen_all(scheduler, in_queue)
+    _, ((crashed_id, _, _, _),) = in_queue.get()
+    scheduler.started(0, [crashed_id])
+    # Worker 0 crashes, and its example is retried.
+    in_flight = scheduler.in_flight(0)
+    retried = scheduler.failed(0, crashed_id)
+    scheduler.fill()
+    attempts = []
+    while not in_queue.empty():
+        _, ((example_id, _, _, _),) = in_queue.get()
+        scheduler.started(1, [example_id])
+        attempts.append(example_id)
+        if example_id == crashed_id:
+            # It crashes again, and is given up on.
+            given_up = not scheduler.failed(1, example_id)
+        else:
+            scheduler.finished(1, example_id)
+        scheduler.fill()
+
+    # Test
+    assert in_flight == [crashed_id]
+    assert retried
+    assert given_up
+    assert sorted(attempts) == [0, 1]
+    assert not scheduler.is_pending(0) and not scheduler.is_pending(1)
+    assert scheduler.in_flight(1) == []
+
+def test_skipped_examples_are_not_attacked():
+
+    # Actual
+    in_queue = queue.Queue()
+    scheduler = ExampleScheduler(in_queue, max_queued=4, order='dataset')
+    for text in ['zero', 'one', 'two']:
+        scheduler.add(text, 0)
+    screen_all(scheduler, in_queue, skipped_ids=[1])
+
+    # Test
+    assert attack_order(scheduler, in_queue) == [0, 2]
+
+def test_retries_examples_of_expired_leases():
+
+    # Actual
+    in_queue = queue.Queue()
+    scheduler = ExampleScheduler(in_queue, max_queued=2, order='dataset', lease_timeout=0)
+    scheduler.add('first example', 0)
+    scheduler.add('second example', 1)
+    screen_all(scheduler, in_queue, worker_id='alive')
+    _, ((lost_id, _, _, _),) = in_queue.get()
+    _, ((finished_id, _, _, _),) = in_queue.get()
+    scheduler.started('lost', [lost_id])
+    scheduler.started('alive', [finished_id])
+    scheduler.finished('alive', finished_id)
+    expired = scheduler.expired_leases()
+    retried = scheduler.failed('lost', lost_id)
+    scheduler.fill()
+    _, ((retried_id, _, _, _),) = in_queue.get()
+
+    # Test
+    assert sorted(expired) == ['alive', 'lost']
+    assert scheduler.in_flight('alive') == []
+    assert scheduler.expired_leases() == []
+    assert retried
+    assert retried_id == lost_id
+
+def test_requeues_tasks_of_workers_that_died_before_starting():
+
+    # Actual
+    in_queue = queue.Queue()
+    scheduler = ExampleScheduler(in_queue, max_queued=1, order='dataset')
+    scheduler.add('first example', 0)
+    scheduler.add('second example', 1)
+    screen_all(scheduler, in_queue)
+    # A worker takes the first attack off the queue, and dies before saying
+    # it started it.
+    _, ((lost_id, _, _, _),) = in_queue.get()
+    scheduler.fill()
+    stalled = in_queue.empty()
+    scheduler.requeue_unstarted()
+    scheduler.fill()
+
+    # Test
+    assert stalled
+    assert attack_order(scheduler, in_queue) == [lost_id, 1 - lost_id]
@@ -0,0 +1,99 @@
+import torch
+
+import textattack
+from textattack.models.helpers import BERTForClassification
+from textattack.transformations import GradientBasedWordSwap, gradient_based_word_swap
+
+from toy_attack import BERT_VOCAB, ToyClassifier, make_bert_tokenizer
+
+TEXTS = ['bad and dull', 'a good movie', 'awful', 'fine but dull and bad']
+
+class TransposingToyClassifier(ToyClassifier):
+    """ Runs its embeddings on the transpose of its input, like our LSTMs. """
+    batch_first = False
+
+    def forward(self, ids):
+        positive = self.weights(ids.t()).sum(dim=(0, 2)) + self.bias
+        return torch.stack((-positive, positive), dim=1)
+
+def make_swap(model, monkeypatch):
+    monkeypatch.setattr(gradient_based_word_swap, 'validate_model_gradient_word_swap_compatibility',
+        lambda model: True)
+    model.word_embeddings = model.weights
+    model.lookup_table = model.weights.weight.data
+    return GradientBasedWordSwap(model, top_n=2, replace_stopwords=True)
+
+def make_bert_model(path):
+    """ Returns a tiny, untrained `BERTForClassification`, saved at `path`, 
+        without downloading anything.
+    """
+    from transformers import BertConfig
+    from transformers.modeling_bert import BertForSequenceClassification
+    tokenizer = make_bert_tokenizer(path)
+    torch.manual_seed(0)
+    # Skip `__init__`, which downloads a fine-tuned model.
+    model = BERTForClassification.__new__(BERTForClassification)
+    model.model = BertForSequenceClassification(BertConfig.from_pretrained(str(path)))
+    model.model.eval()
+    model.word_embeddings = model.model.get_input_embeddings()
+    model.lookup_table = model.word_embeddings.weight.data
+    model.tokenizer = tokenizer
+    return model
+
+def swapped_texts(transformations):
+    """ Returns the texts of each text's transformations. Swaps with tied 
+        gradients may come in any order.
+    """
+    return [sorted(t.text for t in text_transformations) for text_transformations in transformations]
+
+def test_batched_swaps_match_single_texts(monkeypatch):
+
+    # Expected
+    model = ToyClassifier()
+    swap = make_swap(model, monkeypatch)
+    tokenized_texts = [textattack.shared.TokenizedText(text, model.tokenizer) for text in TEXTS]
+    expected_swaps = swapped_texts([swap(text) for text in tokenized_texts])
+
+    # Actual
+    batched_swaps = swapped_texts(swap.call_many(tokenized_texts))
+    transposing_model = TransposingToyClassifier()
+    transposing_swap = make_swap(transposing_model, monkeypatch)
+    transposed_swaps = swapped_texts(transposing_swap.call_many(
+        [textattack.shared.TokenizedText(text, transposing_model.tokenizer) for text in TEXTS]))
+
+    # Test
+    assert expected_swaps[0] == ['good and dull', 'great and dull']
+    assert batched_swaps == expected_swaps
+    assert transposed_swaps == expected_swaps
+
+def test_lstm_path_keeps_words_with_punctuation(monkeypatch):
+
+    # Actual
+    model = ToyClassifier()
+    model.tokenizer.id2word.update({2: 'well-known', 3: "don't", 4: '42'})
+    swap = make_swap(model, monkeypatch)
+
+    # Test
+    assert swap._candidate_mask[2] and swap._candidate_mask[3]
+    assert not swap._candidate_mask[4]
+
+def test_bert_path_swaps_whole_words(tmp_path):
+
+    # Expected
+    whole_words = {word for word in BERT_VOCAB if word.isalpha()}
+
+    # Actual
+    model = make_bert_model(tmp_path)
+    swap = GradientBasedWordSwap(model, top_n=8, replace_stopwords=True)
+    tokenized_text = textattack.shared.TokenizedText('bad funny well-known movies', model.tokenizer)
+    transformations = swap(tokenized_text)
+    candidate_words = {model.tokenizer.convert_id_to_word(i) for i in range(len(BERT_VOCAB)) 
+        if swap._candidate_mask[i]}
+
+    # Test
+    assert tokenized_text.word_token_spans == [(1, 2), (2, 4), (4, 5), (6, 7), (7, 9)]
+    assert candidate_words == whole_words
+    assert len(transformations) == 8
+    for transformation in transformations:
+        index = transformation.attack_attrs['modified_word_index']
+        assert transformation.words[index] in whole_words
@@ -0,0 +1,39 @@
+import textattack
+
+from toy_attack import make_attack
+
+EXAMPLES = [('bad and dull', 0), ('good movie', 1), ('good and great and fine', 1), 
+    ('awful bad dull', 0), ('a bad and awful and dull film', 0)]
+
+def attack_with_lookahead(lookahead):
+    """ Attacks `EXAMPLES` one at a time. Returns the results, and the number
+        of queries made to the goal function for each example.
+    """
+    attack = make_attack(textattack.search_methods.GreedyWordSwapWIR, lookahead=lookahead)
+    num_queries = []
+    get_results = attack.goal_function.get_results
+    def count_get_results(*args, **kwargs):
+        num_queries[-1] += 1
+        return get_results(*args, **kwargs)
+    attack.goal_function.get_results = count_get_results
+    results = []
+    for text, output in EXAMPLES:
+        num_queries.append(0)
+        results.extend(attack.attack_dataset([(text, output)]))
+    return results, num_queries
+
+def test_lookahead_scores_several_words_per_query():
+
+    # Expected
+    expected_results, expected_num_queries = attack_with_lookahead(1)
+
+    # Actual
+    results, num_queries = attack_with_lookahead(4)
+
+    # Test
+    assert [type(result) for result in results] == [type(result) for result in expected_results]
+    for result, expected_result in zip(results, expected_results):
+        if isinstance(result, textattack.attack_results.SuccessfulAttackResult):
+            assert result.perturbed_result.tokenized_text.text == expected_result.perturbed_result.tokenized_text.text
+    assert all(n <= expected_n for n, expected_n in zip(num_queries, expected_num_queries))
+    assert sum(num_queries) < sum(expected_num_queries)
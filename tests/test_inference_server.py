@@ -0,0 +1,55 @@
+import multiprocessing
+import pytest
+import queue
+import threading
+
+from textattack.shared.attack_result_store import get_attack_fingerprint
+from textattack.shared.scripts.inference_server import InferenceClient, InferenceServer, RemoteModel
+
+from toy_attack import ToyClassifier, make_attack
+
+EXAMPLES = [('bad and dull', 0), ('a good movie', 1), ('awful', 1)]
+
+def test_attack_through_inference_server():
+
+    # Expected
+    model = ToyClassifier()
+    local_attack = make_attack(model=model)
+    expected_results = list(local_attack.attack_dataset(EXAMPLES))
+
+    # Actual
+    request_queue = queue.Queue()
+    response_queue = queue.Queue()
+    server = InferenceServer(model, request_queue, [response_queue], latency=0)
+    server_thread = threading.Thread(target=server.serve)
+    server_thread.start()
+    remote_model = RemoteModel.from_model(model)
+    remote_attack = make_attack(model=remote_model)
+    remote_attack.goal_function.inference_client = InferenceClient(0, request_queue, response_queue)
+    actual_results = list(remote_attack.attack_dataset(EXAMPLES))
+    request_queue.put(None)
+    server_thread.join()
+
+    # Test
+    assert not hasattr(remote_model, 'model')
+    for expected, actual in zip(expected_results, actual_results):
+        assert type(actual) == type(expected)
+        assert actual.perturbed_result.tokenized_text.text == expected.perturbed_result.tokenized_text.text
+        assert actual.num_queries == expected.num_queries
+    assert get_attack_fingerprint(remote_attack) == get_attack_fingerprint(local_attack)
+
+def test_client_fails_when_server_is_gone():
+
+    # Actual
+    timed_out_client = InferenceClient(0, queue.Queue(), queue.Queue(), timeout=0.1)
+    # A process that has exited, and been reaped.
+    server = multiprocessing.get_context('spawn').Process(target=int)
+    server.start()
+    server.join()
+    exited_client = InferenceClient(0, queue.Queue(), queue.Queue(), server_pid=server.pid)
+
+    # Test
+    with pytest.raises(TimeoutError):
+        timed_out_client([[[1, 2]]])
+    with pytest.raises(RuntimeError, match='exited'):
+        exited_client([[[1, 2]]])
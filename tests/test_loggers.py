@@ -0,0 +1,258 @@
+import csv
+import json
+import numpy as np
+import pytest
+import threading
+import time
+import types
+
+from textattack.attack_results import FailedAttackResult, SkippedAttackResult, SuccessfulAttackResult
+from textattack.loggers import (AttackLogManager, CSVLogger, Logger, ParquetLogger, 
+    WeightsAndBiasesLogger, weights_and_biases_logger)
+
+from toy_attack import make_attack
+
+EXAMPLES = [('bad and dull', 0), ('a good movie', 1), ('awful', 1)]
+
+def attack_examples():
+    return list(make_attack().attack_dataset(EXAMPLES))
+
+@pytest.mark.parametrize('extension', ['parquet', 'arrow'])
+def test_parquet_logger_keeps_writing_after_flush(tmp_path, extension):
+    pa = pytest.importorskip('pyarrow')
+    import pyarrow.parquet as pq
+
+    # Expected
+    results = attack_examples()
+    expected_types = [type(result).__name__ for result in results + results]
+
+    # Actual
+    filename = str(tmp_path / f'results.{extension}')
+    logger = ParquetLogger(filename=filename)
+    for result in results:
+        logger.log_attack_result(result)
+    logger.flush()
+    for result in results:
+        logger.log_attack_result(result)
+    logger.close()
+    if extension == 'arrow':
+        reader = pa.ipc.open_file(filename)
+        num_row_groups = reader.num_record_batches
+        table = reader.read_all()
+    else:
+        num_row_groups = pq.ParquetFile(filename).num_row_groups
+        table = pq.read_table(filename)
+
+    # Test
+    assert num_row_groups == 2
+    assert table.column('result_type').to_pylist() == expected_types
+    assert table.column('perturbed_text').to_pylist()[0] == results[0].perturbed_result.tokenized_text.text
+    assert table.schema.field('original_output').type == pa.int64()
+    with pytest.raises(RuntimeError):
+        logger.log_attack_result(results[0])
+
+@pytest.mark.parametrize('extension', ['csv', 'jsonl'])
+def test_csv_logger_streams_rows(tmp_path, extension):
+
+    # Expected
+    results = [result for result in attack_examples() 
+        if not isinstance(result, FailedAttackResult)]
+    expected_rows = [[*result.diff_color('file'), result.original_result.score,
+        result.perturbed_result.score, result.original_result.output, 
+        result.perturbed_result.output] for result in results]
+
+    # Actual
+    filename = str(tmp_path / f'results.{extension}')
+    logger = CSVLogger(filename=filename, sync_interval=0)
+    for result in attack_examples():
+        logger.log_attack_result(result)
+    # Rows are on disk before the logger is flushed.
+    with open(filename, newline='') as f:
+        if extension == 'csv':
+            header, *rows = list(csv.reader(f, quoting=csv.QUOTE_NONNUMERIC))
+        else:
+            header = CSVLogger.COLUMNS
+            rows = [[row[column] for column in CSVLogger.COLUMNS] 
+                for row in map(json.loads, f)]
+    logger.flush()
+
+    # Test
+    assert header == CSVLogger.COLUMNS
+    assert rows == expected_rows
+
+def test_csv_logger_is_closed_by_log_manager(tmp_path):
+
+    # Expected
+    results = attack_examples()
+    expected_num_rows = sum(not isinstance(result, FailedAttackResult) for result in results)
+
+    # Actual
+    filename = str(tmp_path / 'results.csv')
+    attack_log_manager = AttackLogManager()
+    attack_log_manager.add_output_csv(filename, 'file')
+    logger, = attack_log_manager.loggers
+    for result in results:
+        attack_log_manager.log_result(result)
+    attack_log_manager.close()
+    with open(filename, newline='') as f:
+        header, *rows = list(csv.reader(f, quoting=csv.QUOTE_NONNUMERIC))
+
+    # Test
+    assert logger._file.closed
+    assert len(rows) == expected_num_rows
+    with pytest.raises(ValueError):
+        logger.log_attack_result(results[0])
+
+class RecordingLogger(Logger):
+    """ Records the results it logs, slowly, and the threads it was called
+        from.
+    """
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.results = []
+        self.threads = set()
+        self.num_flushes = 0
+
+    def log_attack_result(self, result):
+        if self.fail:
+            raise ValueError('Logging failed')
+        time.sleep(0.01)
+        self.results.append(result)
+        self.threads.add(threading.current_thread())
+
+    def flush(self):
+        self.num_flushes += 1
+
+def test_async_logging():
+
+    # Expected
+    results = attack_examples() * 3
+
+    # Actual
+    attack_log_manager = AttackLogManager(asynchronous=True, max_queued=2)
+    logger = RecordingLogger()
+    attack_log_manager.loggers.append(logger)
+    for result in results:
+        attack_log_manager.log_result(result)
+    attack_log_manager.flush()
+    num_logged_after_flush = len(logger.results)
+    attack_log_manager.close()
+
+    # Test
+    assert num_logged_after_flush == len(results)
+    assert logger.results == results
+    assert threading.current_thread() not in logger.threads
+    assert logger.num_flushes == 2
+    assert attack_log_manager.num_results == len(results)
+
+def test_async_logging_errors_are_raised():
+
+    # Actual
+    attack_log_manager = AttackLogManager(asynchronous=True)
+    attack_log_manager.loggers.append(RecordingLogger(fail=True))
+    attack_log_manager.log_result(attack_examples()[0])
+
+    # Test
+    with pytest.raises(RuntimeError, match='Logging failed'):
+        attack_log_manager.flush()
+
+class SummaryLogger(Logger):
+    """ Records the summary rows and histogram it logs. """
+    def __init__(self):
+        self.rows = None
+        self.hist = None
+
+    def log_attack_result(self, result):
+        pass
+
+    def log_summary_rows(self, rows, title, window_id):
+        if window_id == 'attack_results_summary':
+            self.rows = rows
+
+    def log_hist(self, arr, numbins, title, window_id):
+        self.hist = list(arr)
+
+def recompute_summary(results):
+    """ Computes the summary rows and histogram of `results` from scratch. """
+    def percent(x):
+        return str(round(x, 2)) + '%'
+    num_successes = sum(isinstance(r, SuccessfulAttackResult) for r in results)
+    num_failures = sum(isinstance(r, FailedAttackResult) for r in results)
+    num_skipped = sum(isinstance(r, SkippedAttackResult) for r in results)
+    num_words = [len(r.original_result.tokenized_text.words) for r in results]
+    num_words_changed = [(len(r.original_result.tokenized_text.all_words_diff(
+        r.perturbed_result.tokenized_text)), len(r.original_result.tokenized_text.words)) 
+        for r in results if isinstance(r, SuccessfulAttackResult)]
+    perturbed_word_percentages = [changed * 100.0 / words 
+        for changed, words in num_words_changed if changed > 0 and words > 0]
+    num_queries = [r.num_queries for r in results if not isinstance(r, SkippedAttackResult)]
+    rows = [
+        ['Number of successful attacks:', str(num_successes)],
+        ['Number of failed attacks:', str(num_failures)],
+        ['Number of skipped attacks:', str(num_skipped)],
+        ['Original accuracy:', percent((len(results) - num_skipped) * 100.0 / len(results))],
+        ['Accuracy under attack:', percent(num_failures * 100.0 / len(results))],
+        ['Attack success rate:', percent(num_successes * 100.0 / (num_successes + num_failures))],
+        ['Average perturbed word %:', percent(np.mean(perturbed_word_percentages))],
+        ['Average num. words per input:', str(round(np.mean(num_words), 2))],
+        ['Avg num queries:', str(round(np.mean(num_queries), 2))],
+    ]
+    numbins = max([changed for changed, _ in num_words_changed] + [10])
+    hist = [sum(changed == n for changed, _ in num_words_changed) for n in range(1, numbins + 1)]
+    return rows, hist
+
+def test_incremental_summary_matches_recompute():
+
+    # Expected
+    results = attack_examples() * 2
+    expected_rows, expected_hist = recompute_summary(results)
+
+    # Actual
+    summaries = []
+    for num_restored in [0, 4, len(results)]:
+        logger = SummaryLogger()
+        attack_log_manager = AttackLogManager()
+        attack_log_manager.loggers.append(logger)
+        attack_log_manager.restore_results(results[:num_restored])
+        for result in results[num_restored:]:
+            attack_log_manager.log_result(result)
+        attack_log_manager.log_summary()
+        summaries.append((logger.rows, logger.hist))
+
+    # Test
+    assert {type(result) for result in results} == {SuccessfulAttackResult, 
+        FailedAttackResult, SkippedAttackResult}
+    assert all(summary == (expected_rows, expected_hist) for summary in summaries)
+
+def stub_wandb(monkeypatch):
+    """ Replaces `wandb` with a stub, and returns the list that the data of
+        each call to `wandb.log` is added to.
+    """
+    logged_data = []
+    wandb = types.SimpleNamespace(init=lambda **kwargs: None, log=logged_data.append,
+        Html=lambda html, inject=True: html, Table=lambda columns, data: data)
+    monkeypatch.setattr(weights_and_biases_logger, 'wandb', wandb)
+    return logged_data
+
+def test_wandb_logger_logs_in_batches(monkeypatch):
+
+    # Expected
+    results = attack_examples() + attack_examples()[:2]
+    expected_batch_sizes = [2, 2, 1]
+
+    # Actual
+    logged_data = stub_wandb(monkeypatch)
+    logger = WeightsAndBiasesLogger(log_every=2)
+    for result in results:
+        logger.log_attack_result(result)
+    num_logs_before_flush = len(logged_data)
+    logger.log_sep()
+    logger.flush()
+
+    # Test
+    assert num_logs_before_flush == 2
+    batches = [data['result_batch'] for data in logged_data if 'result_batch' in data]
+    assert [len(batch) for batch in batches] == expected_batch_sizes
+    assert [row[0] for batch in batches for row in batch] == list(range(len(results)))
+    assert [data['num_results'] for data in logged_data if 'num_results' in data] == [2, 4, 5]
+    assert list(logged_data[-1]) == ['results']
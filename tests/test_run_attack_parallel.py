@@ -0,0 +1,125 @@
+import argparse
+import os
+import pytest
+import queue
+import threading
+import torch
+
+import textattack
+from textattack.loggers import AttackLogManager
+from textattack.shared.scripts.run_attack_parallel import (THREAD_ENV_VARIABLES, attack_from_queue, 
+    can_fork_workers, get_fork_hazards, get_worker_layout, set_thread_env_variables)
+
+from toy_attack import make_attack
+
+def run_worker(attack, tasks, monkeypatch):
+    """ Runs `attack_from_queue` on `tasks` in this process, and returns the
+        messages it sent.
+    """
+    for env_variable in ['CUDA_VISIBLE_DEVICES', 'TF_CPP_MIN_LOG_LEVEL', 'TFHUB_CACHE_DIR']:
+        monkeypatch.setenv(env_variable, '')
+    in_queue, out_queue = queue.Queue(), queue.Queue()
+    for task in tasks + [None]:
+        in_queue.put(task)
+    args = argparse.Namespace(random_seed=0, result_store=None, tokenization_cache=None)
+    attack_from_queue(args, 0, None, torch.get_num_threads(), in_queue, out_queue, attack=attack)
+    messages = []
+    while not out_queue.empty():
+        messages.append(out_queue.get())
+    return messages
+
+def test_screened_examples_are_not_classified_again(monkeypatch):
+
+    # Expected
+    examples = [(0, 'bad and dull', 0), (1, 'awful', 1)]
+    expected_result, = make_attack().attack_dataset([('bad and dull', 0)], random_seed=0)
+
+    # Actual
+    screen_messages = run_worker(make_attack(), [('screen', examples)], monkeypatch)
+    _, _, _, (skipped_results, screenings) = screen_messages[-1]
+    attack = make_attack()
+    classified_texts = []
+    call_model_uncached = attack.goal_function._call_model_uncached
+    def record_call_model_uncached(tokenized_texts):
+        classified_texts.extend(tokenized_text.text for tokenized_text in tokenized_texts)
+        return call_model_uncached(tokenized_texts)
+    monkeypatch.setattr(attack.goal_function, '_call_model_uncached', record_call_model_uncached)
+    example_id, screening = screenings[0]
+    attack_messages = run_worker(attack, [('attack', [examples[0] + (screening,)])], monkeypatch)
+    message_type, _, _, data = attack_messages[-1]
+    result = textattack.attack_results.AttackResult.from_compact(data)
+
+    # Test
+    assert [example_id for example_id, _ in skipped_results] == [1]
+    assert example_id == 0
+    assert message_type == 'result'
+    assert len(classified_texts) > 0
+    assert 'bad and dull' not in classified_texts
+    assert result.perturbed_result.tokenized_text.text == expected_result.perturbed_result.tokenized_text.text
+    assert result.num_queries == expected_result.num_queries
+
+def test_fork_hazards():
+
+    # Actual
+    stop = threading.Event()
+    thread = threading.Thread(target=stop.wait, name='test-thread')
+    thread.start()
+    hazards = get_fork_hazards(num_gpus=1)
+    stop.set()
+    thread.join()
+
+    # Test
+    assert 'workers use CUDA' in hazards
+    assert any('test-thread' in hazard for hazard in hazards)
+    assert not can_fork_workers(num_gpus=1)
+
+def test_async_logging_thread_starts_lazily():
+
+    # Expected
+    num_threads = threading.active_count()
+
+    # Actual
+    attack_log_manager = AttackLogManager(asynchronous=True)
+    num_threads_before_logging = threading.active_count()
+    attack_log_manager.log_sep()
+    num_threads_while_logging = threading.active_count()
+    attack_log_manager.close()
+
+    # Test
+    assert num_threads_before_logging == num_threads
+    assert num_threads_while_logging == num_threads + 1
+    assert threading.active_count() == num_threads
+
+@pytest.mark.parametrize('num_cpus, num_gpus, num_workers, threads_per_worker, expected_layout', [
+    (16, 0, None, None, (4, 4)),
+    (16, 2, None, None, (2, 8)),
+    (16, 0, 8, None, (8, 2)),
+    (16, 0, None, 2, (8, 2)),
+    (16, 2, None, 2, (2, 2)),
+    (16, 0, 3, 5, (3, 5)),
+    (2, 0, None, None, (1, 2)),
+    (4, 0, 8, None, (8, 1)),
+    (None, 0, None, None, (1, 1)),
+])
+def test_worker_layout(num_cpus, num_gpus, num_workers, threads_per_worker, expected_layout, monkeypatch):
+
+    # Actual
+    monkeypatch.setattr(os, 'cpu_count', lambda: num_cpus)
+    args = argparse.Namespace(num_workers=num_workers, threads_per_worker=threads_per_worker)
+
+    # Test
+    assert get_worker_layout(args, num_gpus) == expected_layout
+
+def test_thread_env_variables_keep_user_settings(monkeypatch):
+
+    # Expected
+    expected_environ = {env_variable: '3' for env_variable in THREAD_ENV_VARIABLES}
+    expected_environ['OMP_NUM_THREADS'] = '7'
+
+    # Actual
+    environ = {'OMP_NUM_THREADS': '7'}
+    monkeypatch.setattr(os, 'environ', environ)
+    set_thread_env_variables(3)
+
+    # Test
+    assert environ == expected_environ
@@ -0,0 +1,66 @@
+from textattack.shared import TokenizationCache, TokenizedText
+
+from toy_attack import WhitespaceTokenizer
+
+def count_encodings(tokenizer, monkeypatch):
+    """ Returns a list that the texts `tokenizer` encodes are added to. """
+    encoded_texts = []
+    encode_with_word_spans = tokenizer.encode_with_word_spans
+    def record_encode_with_word_spans(text, words):
+        encoded_texts.append(text)
+        return encode_with_word_spans(text, words)
+    monkeypatch.setattr(tokenizer, 'encode_with_word_spans', record_encode_with_word_spans)
+    return encoded_texts
+
+def test_tokenization_cache_hit_and_miss(tmp_path, monkeypatch):
+
+    # Expected
+    texts = ['bad and dull', 'awful', 'a good movie']
+    tokenizer = WhitespaceTokenizer()
+    expected_ids = [TokenizedText(text, tokenizer).ids for text in texts]
+
+    # Actual
+    encoded_texts = count_encodings(tokenizer, monkeypatch)
+    cache = TokenizationCache(str(tmp_path), 'toy', tokenizer)
+    cache.tokenize(texts[:2])
+    cache.close()
+    encoded_texts_before_reopening = list(encoded_texts)
+    reopened_cache = TokenizationCache(str(tmp_path), 'toy', tokenizer)
+    tokenized_texts = reopened_cache.tokenize(texts)
+    reopened_cache.close()
+
+    # Test
+    assert encoded_texts_before_reopening == texts[:2]
+    assert encoded_texts == texts
+    assert [tokenized_text.ids for tokenized_text in tokenized_texts] == expected_ids
+    assert tokenized_texts[0].words == ['bad', 'and', 'dull']
+
+def test_tokenization_cache_invalidation(tmp_path, monkeypatch):
+
+    # Expected
+    text = 'bad and dull'
+
+    # Actual
+    tokenizer = WhitespaceTokenizer()
+    encoded_texts = count_encodings(tokenizer, monkeypatch)
+    paths = []
+    ids = []
+    def tokenize():
+        cache = TokenizationCache(str(tmp_path), 'toy', tokenizer)
+        tokenized_text, = cache.tokenize([text])
+        cache.close()
+        paths.append(cache.path)
+        ids.append(tokenized_text.ids[0])
+    tokenize()
+    tokenizer.max_seq_length = 8
+    tokenize()
+    tokenizer.word2id['and'] = len(tokenizer.word2id) + 2
+    tokenize()
+    tokenize()
+
+    # Test
+    assert len(set(paths[:3])) == 3
+    assert paths[3] == paths[2]
+    assert encoded_texts == [text] * 3
+    assert [len(text_ids) for text_ids in ids] == [16, 8, 8, 8]
+    assert ids[2][1] == tokenizer.word2id['and'] != ids[1][1]
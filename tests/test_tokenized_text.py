@@ -0,0 +1,91 @@
+from textattack.shared import TokenizedText
+
+from toy_attack import WhitespaceTokenizer, make_bert_tokenizer
+
+class CountingTokenizer(WhitespaceTokenizer):
+    """ Counts how many times a full text is encoded. """
+    def __init__(self, max_seq_length=16):
+        super().__init__(max_seq_length=max_seq_length)
+        self.num_full_encodings = 0
+
+    def convert_text_to_tokens(self, text):
+        self.num_full_encodings += 1
+        return super().convert_text_to_tokens(text)
+
+def test_single_word_replacement_is_spliced():
+
+    # Expected
+    tokenizer = CountingTokenizer()
+    text = TokenizedText('the movie was good and not dull', tokenizer)
+    expected = TokenizedText('the movie was awful and not dull', tokenizer)
+
+    # Actual
+    tokenizer.num_full_encodings = 0
+    actual = text.replace_word_at_index(3, 'awful')
+
+    # Test
+    assert tokenizer.num_full_encodings == 0
+    assert actual.text == expected.text
+    assert actual.words == expected.words
+    assert actual.ids == expected.ids
+    assert actual.word_token_spans == expected.word_token_spans
+
+def test_replacement_near_truncation_is_re_encoded():
+
+    # Expected
+    tokenizer = CountingTokenizer(max_seq_length=4)
+    text = TokenizedText('good movie and fine', tokenizer)
+    expected = TokenizedText('bad movie and fine', tokenizer)
+
+    # Actual
+    tokenizer.num_full_encodings = 0
+    actual = text.replace_word_at_index(0, 'bad')
+
+    # Test
+    assert tokenizer.num_full_encodings == 1
+    assert actual.ids == expected.ids
+    assert actual.word_token_spans == expected.word_token_spans
+
+def test_replacements_match_full_encoding():
+
+    # Expected
+    tokenizer = WhitespaceTokenizer()
+    text = TokenizedText('good, fine... and not-dull movie', tokenizer)
+    replacements = [([0], ['bad']), ([1], ['great']), ([3], ['awful']), ([0, 4], ['dull', 'good'])]
+
+    for indices, new_words in replacements:
+        # Actual
+        actual = text.replace_words_at_indices(indices, new_words)
+        expected = TokenizedText(actual.text, tokenizer)
+
+        # Test
+        assert actual.ids == expected.ids
+        assert actual.word_token_spans == expected.word_token_spans
+
+def test_wordpiece_replacements_match_full_encoding(tmp_path):
+
+    # Expected
+    tokenizer = make_bert_tokenizer(tmp_path, max_seq_length=24)
+    text = TokenizedText('the movie, was not funny and a zzz well-known dull movies', tokenizer)
+    replacements = [([1], ['a.b']), ([3], ['qqq']), ([4], ['xx.funny']), ([6], ['good']), 
+        ([7], ['zz']), ([0, 9], ['fun', 'great'])]
+
+    for indices, new_words in replacements:
+        # Actual
+        actual = text.replace_words_at_indices(indices, new_words)
+        expected = TokenizedText(actual.text, tokenizer)
+
+        # Test
+        assert actual.ids == expected.ids
+        assert actual.word_token_spans == expected.word_token_spans
+        assert None not in actual.word_token_spans
+
+def test_unknown_wordpieces_cover_their_words(tmp_path):
+
+    # Actual
+    tokenizer = make_bert_tokenizer(tmp_path, max_seq_length=24)
+    text = TokenizedText('the a.b movie was good', tokenizer)
+
+    # Test
+    assert text.words == ['the', 'a', 'b', 'movie', 'was', 'good']
+    assert text.word_token_spans == [(1, 2), (2, 3), (4, 5), (5, 6), (6, 7), (7, 8)]
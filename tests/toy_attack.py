@@ -0,0 +1,79 @@
+""" A tiny word-level classifier and tokenizer, for testing attacks without
+    downloading any models.
+"""
+
+import torch
+
+import textattack
+from textattack.tokenizers import BERTTokenizer, Tokenizer
+
+# Each word's vote for the positive class. Other words don't vote.
+WORD_WEIGHTS = {'good': 2.0, 'great': 2.0, 'fine': 1.0, 'bad': -2.0, 'awful': -2.0, 'dull': -1.0}
+
+# A wordpiece vocabulary for `make_bert_tokenizer`.
+BERT_VOCAB = ['[PAD]', '[UNK]', '[CLS]', '[SEP]', '[MASK]', 'a', 'the', 'was', 'and', 'not', 'bad', 
+    'good', 'great', 'dull', 'movie', '##s', 'fun', '##ny', 'well', '-', 'known', '.', ',', "'", '42']
+
+class WhitespaceTokenizer(Tokenizer):
+    """ Encodes lowercased, whitespace-separated words. """
+    def __init__(self, max_seq_length=16):
+        self.word2id = {word: i + 2 for i, word in enumerate(sorted(WORD_WEIGHTS))}
+        self.id2word = {i: word for word, i in self.word2id.items()}
+        self.pad_id = 0
+        self.oov_id = 1
+        self.max_seq_length = max_seq_length
+
+    def convert_text_to_tokens(self, text):
+        return text.lower().split()[:self.max_seq_length]
+
+    def convert_tokens_to_ids(self, tokens):
+        ids = [self.word2id.get(token, self.oov_id) for token in tokens]
+        return ids + [self.pad_id] * (self.max_seq_length - len(ids))
+
+    def convert_id_to_word(self, _id):
+        return self.id2word[_id]
+
+    def encode_chunk(self, chunk):
+        tokens = chunk.lower().split()
+        return tokens, [self.word2id.get(token, self.oov_id) for token in tokens]
+
+class ToyClassifier(torch.nn.Module):
+    """ Scores the positive class by the sum of its words' weights. """
+    def __init__(self):
+        super().__init__()
+        self.tokenizer = WhitespaceTokenizer()
+        self.weights = torch.nn.Embedding(len(WORD_WEIGHTS) + 2, 1)
+        with torch.no_grad():
+            self.weights.weight.zero_()
+            for word, weight in WORD_WEIGHTS.items():
+                self.weights.weight[self.tokenizer.word2id[word]] = weight
+        # Lean positive when no words vote.
+        self.bias = 0.5
+
+    def forward(self, ids):
+        positive = self.weights(ids).sum(dim=(1, 2)) + self.bias
+        return torch.stack((-positive, positive), dim=1)
+
+def make_bert_tokenizer(path, max_seq_length=16):
+    """ Returns a `BERTTokenizer` with the vocabulary `BERT_VOCAB`, saved at
+        `path` along with the config of a tiny BERT model, without 
+        downloading anything.
+    """
+    from transformers import BertConfig
+    with open(path / 'vocab.txt', 'w') as f:
+        f.write('\n'.join(BERT_VOCAB) + '\n')
+    config = BertConfig(vocab_size=len(BERT_VOCAB), hidden_size=8, num_hidden_layers=1, 
+        num_attention_heads=1, intermediate_size=8, max_position_embeddings=32)
+    config.save_pretrained(str(path))
+    return BERTTokenizer(str(path), max_seq_length=max_seq_length)
+
+def make_attack(search_method=textattack.search_methods.GreedyWordSwap, model=None, 
+        transformation=None, **kwargs):
+    """ Returns an attack on `model`, or a new `ToyClassifier`, that swaps 
+        neighboring characters of words, unless another `transformation` is
+        given.
+    """
+    goal_function = textattack.goal_functions.UntargetedClassification(model or ToyClassifier())
+    transformation = transformation or textattack.transformations.WordSwapNeighboringCharacterSwap(
+        random_one=False, replace_stopwords=True)
+    return search_method(goal_function, transformation, **kwargs)
@@ -9,12 +9,15 @@ The TextAttack main module:
 
 
 from textattack.shared.scripts.run_attack_args_helper import get_args
+from textattack.shared.scripts.run_attack_distributed import run as run_distributed_workers
 from textattack.shared.scripts.run_attack_parallel import run as run_parallel
 from textattack.shared.scripts.run_attack_single_threaded import run as run_single_threaded
 
 if __name__ == '__main__':
     args = get_args()
-    if args.parallel:
+    if args.worker_of:
+        run_distributed_workers(args)
+    elif args.parallel or args.coordinator:
         run_parallel(args)
     else:
         run_single_threaded(args)
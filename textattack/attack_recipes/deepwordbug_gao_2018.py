@@ -17,7 +17,7 @@ from textattack.transformations import \
     WordSwapRandomCharacterDeletion, WordSwapRandomCharacterInsertion, \
     WordSwapRandomCharacterSubstitution, WordSwapNeighboringCharacterSwap
 
-def DeepWordBugGao2018(model, use_all_transformations=True):
+def DeepWordBugGao2018(model, use_all_transformations=True, lookahead=1):
     #
     # Swap characters out from words. Choose the best of four potential transformations. 
     #
@@ -53,6 +53,6 @@ def DeepWordBugGao2018(model, use_all_transformations=True):
     # Greedily swap words with "Word Importance Ranking".
     #
     attack = GreedyWordSwapWIR(goal_function, transformation=transformation,
-        constraints=constraints, max_depth=None)
+        constraints=constraints, max_depth=None, lookahead=lookahead)
     
     return attack
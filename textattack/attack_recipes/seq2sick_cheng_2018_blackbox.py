@@ -17,7 +17,7 @@ from textattack.goal_functions import NonOverlappingOutput
 from textattack.search_methods import GreedyWordSwapWIR
 from textattack.transformations import WordSwapEmbedding
 
-def Seq2SickCheng2018BlackBox(model, goal_function='non_overlapping'):
+def Seq2SickCheng2018BlackBox(model, goal_function='non_overlapping', lookahead=1):
     #
     # Goal is non-overlapping output.
     #
@@ -33,6 +33,6 @@ def Seq2SickCheng2018BlackBox(model, goal_function='non_overlapping'):
     # Greedily swap words with "Word Importance Ranking".
     #
     attack = GreedyWordSwapWIR(goal_function, transformation=transformation,
-        constraints=[], max_depth=10)
+        constraints=[], max_depth=10, lookahead=lookahead)
     
     return attack
@@ -15,7 +15,7 @@ from textattack.constraints.semantics.sentence_encoders import UniversalSentence
 from textattack.search_methods import GreedyWordSwapWIR
 from textattack.transformations import WordSwapEmbedding
 
-def TextFoolerJin2019(model):
+def TextFoolerJin2019(model, lookahead=1):
     #
     # Swap words with their embedding nearest-neighbors. 
     #
@@ -58,6 +58,6 @@ def TextFoolerJin2019(model):
     # Greedily swap words with "Word Importance Ranking".
     #
     attack = GreedyWordSwapWIR(goal_function, transformation=transformation,
-        constraints=constraints, max_depth=None)
+        constraints=constraints, max_depth=None, lookahead=lookahead)
     
     return attack
@@ -15,7 +15,7 @@ from textattack.goal_functions import UntargetedClassification
 from textattack.search_methods import GreedyWordSwapWIR
 from textattack.transformations import WordSwapEmbedding
 
-def TextFoolerJin2019Adjusted(model, SE_thresh=0.98, sentence_encoder='bert'):
+def TextFoolerJin2019Adjusted(model, SE_thresh=0.98, sentence_encoder='bert', lookahead=1):
     #
     # Swap words with their embedding nearest-neighbors. 
     #
@@ -61,6 +61,6 @@ def TextFoolerJin2019Adjusted(model, SE_thresh=0.98, sentence_encoder='bert'):
     # Greedily swap words with "Word Importance Ranking".
     #
     attack = GreedyWordSwapWIR(goal_function, transformation=transformation,
-        constraints=constraints, max_depth=None)
+        constraints=constraints, max_depth=None, lookahead=lookahead)
     
     return attack
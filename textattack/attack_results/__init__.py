@@ -1,3 +1,5 @@
+from .attack_result import AttackResult
+
 from .failed_attack_result import FailedAttackResult
 from .skipped_attack_result import SkippedAttackResult
 from .successful_attack_result import SuccessfulAttackResult
\ No newline at end of file
@@ -1,5 +1,5 @@
 from textattack.goal_function_results import GoalFunctionResult
-from textattack.shared import utils
+from textattack.shared import utils, TokenizedText
 
 class AttackResult:
     """
@@ -11,6 +11,10 @@ class AttackResult:
         perturbed_result (GoalFunctionResult): Result of the goal function applied to the
             perturbed text. May or may not have been successful.
     """
+    # The version of the format returned by `to_compact`. Increment this when
+    # changing the format.
+    COMPACT_FORMAT_VERSION = 1
+
     def __init__(self, original_result, perturbed_result):
         if original_result is None:
             raise ValueError('Attack original result cannot be None')
@@ -24,6 +28,8 @@ class AttackResult:
         self.original_result = original_result
         self.perturbed_result = perturbed_result
         self.num_queries = 0
+        # The number of seconds spent attacking, if it was measured.
+        self.attack_time = None
         
         # We don't want the TokenizedText `ids` sticking around clogging up 
         # space on our devices. Delete them here, if they're still present,
@@ -31,6 +37,71 @@ class AttackResult:
         self.original_result.tokenized_text.delete_tensors()
         self.perturbed_result.tokenized_text.delete_tensors()
     
+    def to_compact(self):
+        """ Returns a compact, picklable version of this result, to send 
+            between processes or save to disk. Only the texts, outputs, 
+            scores, query count and timing are kept. Tokenizers, IDs and 
+            attack attributes are left out.
+            
+            Use `AttackResult.from_compact` to turn it back into a result.
+        """
+        original, perturbed = self.original_result, self.perturbed_result
+        # Goal functions may return outputs, scores and whether they 
+        # succeeded as single-element tensors, which can't be serialized.
+        return tuple(_to_primitive(field) for field in (
+            AttackResult.COMPACT_FORMAT_VERSION,
+            type(self).__name__,
+            type(original).__name__,
+            original.tokenized_text.text,
+            perturbed.tokenized_text.text,
+            original.output,
+            perturbed.output,
+            original.score,
+            perturbed.score,
+            bool(original.succeeded),
+            bool(perturbed.succeeded),
+            self.num_queries,
+            self.attack_time,
+        ))
+
+    @staticmethod
+    def from_compact(compact):
+        """ Rehydrates a result from the output of `to_compact`. The texts of
+            the result have no tokenizer, so they can be displayed and logged,
+            but not attacked.
+        """
+        from textattack import attack_results, goal_function_results
+        version = compact[0]
+        if version != AttackResult.COMPACT_FORMAT_VERSION:
+            raise ValueError(f'Cannot read compact attack result of version {version}, '
+                f'expected version {AttackResult.COMPACT_FORMAT_VERSION}')
+        (_, result_type, goal_function_result_type, original_text, perturbed_text, 
+            original_output, perturbed_output, original_score, perturbed_score,
+            original_succeeded, perturbed_succeeded, num_queries, attack_time) = compact
+        goal_function_result_class = getattr(goal_function_results, goal_function_result_type)
+        original_result = goal_function_result_class(
+            TokenizedText(original_text, None, attack_attrs={}), 
+            original_output, original_succeeded, original_score)
+        result_class = getattr(attack_results, result_type)
+        if result_class is attack_results.SkippedAttackResult:
+            result = result_class(original_result)
+        else:
+            perturbed_result = goal_function_result_class(
+                TokenizedText(perturbed_text, None, attack_attrs={}), 
+                perturbed_output, perturbed_succeeded, perturbed_score)
+            result = result_class(original_result, perturbed_result)
+        result.num_queries = num_queries
+        result.attack_time = attack_time
+        return result
+
+    @staticmethod
+    def compact_type(compact):
+        """ Returns the class of the result that `compact` holds, without 
+            rehydrating it.
+        """
+        from textattack import attack_results
+        return getattr(attack_results, compact[1])
+
     def original_text(self):
         """ Returns the text portion of `self.original_result`. Helper method.
         """
@@ -87,4 +158,11 @@ class AttackResult:
             new_words_2)
                 
         return t1.clean_text(), t2.clean_text()
-        
+
+def _to_primitive(output):
+    """ Converts single-element tensors and arrays in `output` to Python 
+        numbers. 
+    """
+    if hasattr(output, 'item'):
+        return output.item()
+    return output
@@ -1,4 +1,5 @@
 from .dataset import TextAttackDataset 
+from .columnar_dataset import ColumnarDataset, write_columnar_dataset
 
 from . import classification
 from . import entailment
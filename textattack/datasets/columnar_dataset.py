@@ -0,0 +1,175 @@
+import array
+import json
+import numpy as np
+import os
+
+from textattack.datasets import TextAttackDataset
+from textattack.datasets.dataset import LazyExamples
+from textattack.shared import utils
+
+# The version of the format written by `write_columnar_dataset`. Increment
+# this when changing the format.
+FORMAT_VERSION = 2
+
+class ColumnarDataset(TextAttackDataset):
+    """ Reads a dataset written by `write_columnar_dataset`.
+
+        Every column is memory-mapped, so opening a dataset takes the same
+        time however large it is, and processes reading the same dataset
+        share its pages instead of each keeping a copy. The length of each
+        text is stored too, so that examples can be ordered by length 
+        without reading them.
+
+        Args:
+            path (str): The directory the dataset was written to.
+            offset (int): The example to start reading from.
+    """
+    def __init__(self, path, offset=0):
+        self.meta = _read_meta(path)
+        self.path = path
+        self.texts = _RaggedColumn(path, 'texts', np.uint8)
+        if self.meta['output_type'] == 'text':
+            self.outputs = _RaggedColumn(path, 'outputs', np.uint8)
+        else:
+            self.outputs = np.load(os.path.join(path, 'outputs.npy'), mmap_mode='r')
+        self.lengths = np.load(os.path.join(path, 'lengths.npy'), mmap_mode='r')
+        self.examples = ColumnarExamples(self)[offset:]
+        self.i = 0
+
+    def example_length(self, i):
+        return self.examples.length(i)
+
+class ColumnarExamples(LazyExamples):
+    """ The `(text, output)` examples of a `ColumnarDataset`, which are read
+        only when they're accessed.
+    """
+    def __init__(self, dataset, indices=None):
+        super().__init__(dataset.path, dataset.texts.offsets, None, indices=indices)
+        self.dataset = dataset
+
+    def _read(self, index):
+        text = _decode(self.dataset.texts[index])
+        output = self.dataset.outputs[index]
+        if isinstance(self.dataset.outputs, _RaggedColumn):
+            output = _decode(output)
+        else:
+            output = output.item()
+        return (text, output)
+
+    def length(self, i):
+        """ Returns the length of example `i`, without reading it. """
+        return int(self.dataset.lengths[self.indices[i]])
+
+def write_columnar_dataset(examples, path):
+    """ Writes `examples` to a dataset at `path` that `ColumnarDataset` can
+        open without reading it.
+
+        Texts are stored back to back in a single UTF-8 buffer, with an array
+        of where each one starts. Outputs are stored as an array of integers
+        or floats, or in a second buffer if they're strings. The length of
+        each text (see `utils.example_length`) is stored in another array.
+
+        Args:
+            examples: An iterable of (text, ground_truth_output) pairs
+            path (str): The directory to write the dataset to
+    """
+    os.makedirs(path, exist_ok=True)
+    meta_path = os.path.join(path, 'meta.json')
+    if os.path.exists(meta_path):
+        # Mark the dataset incomplete until it's rewritten.
+        os.remove(meta_path)
+    texts = _RaggedColumnWriter(path, 'texts', np.uint8)
+    outputs = None
+    output_type = None
+    lengths = array.array('I')
+    num_examples = 0
+    for text, output in examples:
+        # Outputs may be single-element tensors or arrays.
+        if hasattr(output, 'item'):
+            output = output.item()
+        if output_type is None:
+            output_type = _get_output_type(output)
+            if output_type == 'text':
+                outputs = _RaggedColumnWriter(path, 'outputs', np.uint8)
+            else:
+                outputs = array.array('q' if output_type == 'int' else 'd')
+        texts.append(text.encode('utf-8'))
+        lengths.append(utils.example_length(text))
+        if output_type == 'text':
+            outputs.append(output.encode('utf-8'))
+        else:
+            outputs.append(output)
+        num_examples += 1
+    texts.close()
+    if output_type == 'text':
+        outputs.close()
+    else:
+        dtype = np.float64 if output_type == 'float' else np.int64
+        np.save(os.path.join(path, 'outputs.npy'), np.frombuffer(outputs or b'', dtype=dtype))
+    np.save(os.path.join(path, 'lengths.npy'), np.frombuffer(lengths or b'', dtype=np.uint32))
+    meta = {'version': FORMAT_VERSION, 'num_examples': num_examples,
+        'output_type': output_type or 'int'}
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f)
+
+class _RaggedColumn:
+    """ A memory-mapped column of variable-length rows, stored back to back
+        in `{name}.bin`, with the offset of each row (and the end of the last
+        one) in `{name}_offsets.npy`.
+    """
+    def __init__(self, path, name, dtype):
+        self.offsets = np.load(os.path.join(path, f'{name}_offsets.npy'), mmap_mode='r')
+        buffer_path = os.path.join(path, f'{name}.bin')
+        if os.path.getsize(buffer_path):
+            self.buffer = np.memmap(buffer_path, dtype=dtype, mode='r')
+        else:
+            # Empty files can't be memory-mapped.
+            self.buffer = np.zeros(0, dtype=dtype)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        return self.buffer[int(self.offsets[index]):int(self.offsets[index + 1])]
+
+class _RaggedColumnWriter:
+    """ Writes a `_RaggedColumn` one row at a time. """
+    def __init__(self, path, name, dtype):
+        self.path = path
+        self.name = name
+        self.itemsize = np.dtype(dtype).itemsize
+        self.offsets = array.array('Q', [0])
+        self._file = open(os.path.join(path, f'{name}.bin'), 'wb')
+
+    def append(self, row_bytes):
+        self._file.write(row_bytes)
+        self.offsets.append(self.offsets[-1] + len(row_bytes) // self.itemsize)
+
+    def close(self):
+        self._file.close()
+        np.save(os.path.join(self.path, f'{self.name}_offsets.npy'),
+            np.frombuffer(self.offsets, dtype=np.uint64))
+
+def _read_meta(path):
+    meta_path = os.path.join(path, 'meta.json')
+    if not os.path.exists(meta_path):
+        raise ValueError(f'No complete columnar dataset at {path}')
+    with open(meta_path) as f:
+        meta = json.load(f)
+    if meta['version'] != FORMAT_VERSION:
+        raise ValueError(f'Cannot read columnar dataset of version {meta["version"]}, '
+            f'expected version {FORMAT_VERSION}')
+    return meta
+
+def _get_output_type(output):
+    if isinstance(output, str):
+        return 'text'
+    elif isinstance(output, float):
+        return 'float'
+    elif isinstance(output, int):
+        return 'int'
+    else:
+        raise TypeError(f'Cannot store outputs of type {type(output)} in a columnar dataset')
+
+def _decode(row):
+    return row.tobytes().decode('utf-8')
@@ -1,5 +1,12 @@
-from textattack.shared import utils
+import array
+import copy
+import hashlib
+import numpy as np
+import os
 import pickle
+import random
+
+from textattack.shared import utils
 
 class TextAttackDataset:
     """
@@ -35,11 +42,70 @@ class TextAttackDataset:
         self.i += 1
         return example
     
+    def example_length(self, i):
+        """ Returns the length of example `i` (see `utils.example_length`)
+            from the dataset's index of lengths, or `None` if it doesn't 
+            have one.
+        """
+        return None
+    
+    def shuffle(self, seed=None):
+        """ Shuffles the examples in place. 
+        
+            Args:
+                seed (:obj:`int`, optional): If set, the examples are shuffled
+                    the same way in every process and on every host. 
+                    Otherwise, the global random state is used.
+        """
+        rng = random if seed is None else random.Random(seed)
+        if isinstance(self.examples, list):
+            rng.shuffle(self.examples)
+        else:
+            self.examples.shuffle(rng)
+        return self
+    
+    def shard(self, index, count):
+        """ Keeps only the examples in shard `index` of `count`. Shards are 
+            disjoint and together cover the dataset, so independent workers
+            can each attack a shard of the same dataset. Shuffle with a seed
+            before sharding, so that every worker shuffles the same way.
+            
+            Args:
+                index (int): The shard to keep, from 0 to `count - 1`.
+                count (int): The number of shards.
+        """
+        if not (0 <= index < count):
+            raise ValueError(f'Cannot take shard {index} of {count}')
+        # Take every `count`th example, so that each shard gets a similar 
+        # mix of examples.
+        self.examples = self.examples[index::count]
+        self.i = 0
+        return self
+    
     def _load_pickle_file(self, file_name, offset=0):
+        """ Loads examples from a pickled list.
+
+            The first time a file is loaded, its examples are re-pickled one
+            at a time to a file in the cache directory, so that afterwards 
+            they can be read one by one without unpickling the whole list.
+        """
         self.i = 0
         file_path = utils.download_if_needed(file_name)
-        self.examples = pickle.load( open(file_path, "rb" ) )
-        self.examples = self.examples[offset:]
+        examples_path = _examples_path(file_path)
+        offsets = _load_offsets(examples_path, file_path)
+        if offsets is None:
+            with open(file_path, 'rb') as f:
+                examples = pickle.load(f)
+            offsets = array.array('Q', [0])
+            os.makedirs(os.path.dirname(examples_path), exist_ok=True)
+            temp_path = examples_path + '.tmp'
+            with open(temp_path, 'wb') as f:
+                for example in examples:
+                    f.write(pickle.dumps(example))
+                    offsets.append(f.tell())
+            os.replace(temp_path, examples_path)
+            offsets = _save_offsets(examples_path, offsets)
+        self.examples = LazyExamples(examples_path, offsets, pickle.loads)[offset:]
     
     def _load_classification_text_file(self, text_file_name, offset=0):
         """ Loads tuples from lines of a classification text file. 
@@ -50,19 +116,143 @@ class TextAttackDataset:
                 0 "i love hot n juicy .  ...
                 0 "\""this world needs a ...
             
+            Lines are read and parsed only when their example is accessed,
+            using an index of where each line starts. The index is built the
+            first time a file is loaded, and saved next to it.
+            
             Arguments:
                 n (int): number of samples to return
                 offset (int): line to start reading from
         """
         text_file_path = utils.download_if_needed(text_file_name)
-        text_file = open(text_file_path, 'r')
-        raw_lines = text_file.readlines()[offset:]
-        raw_lines = [self._clean_example(ex) for ex in raw_lines]
-        self.examples = [self._process_example_from_file(ex) for ex in raw_lines]
+        offsets = _load_offsets(text_file_path, text_file_path)
+        if offsets is None:
+            offsets = array.array('Q', [0])
+            with open(text_file_path, 'rb') as text_file:
+                for line in text_file:
+                    offsets.append(offsets[-1] + len(line))
+            offsets = _save_offsets(text_file_path, offsets)
+        self.examples = LazyExamples(text_file_path, offsets, self._parse_line)[offset:]
         self.i = 0
-        text_file.close()
+    
+    def _parse_line(self, raw_line):
+        # Lines are read in binary mode, so translate Windows line endings 
+        # like reading in text mode would.
+        if raw_line.endswith(b'\r\n'):
+            raw_line = raw_line[:-2] + b'\n'
+        raw_line = raw_line.decode('utf-8')
+        return self._process_example_from_file(self._clean_example(raw_line))
     
     def _clean_example(self, ex):
         """ Optionally pre-processes an input string before some tokenization.
             Only necessary for some datasets. """
         return ex
+
+class LazyExamples:
+    """ A sequence of the examples stored in a file, which are read and 
+        parsed only when they're accessed. The position of each example in 
+        the file is memory-mapped from its index.
+
+        The file stays open between reads until `close()` is called, or the 
+        `with` block the examples are used in exits.
+
+        Args:
+            file_path (str): The file that holds the examples.
+            offsets (array): The byte offset of each example in the file,
+                followed by the size of the file.
+            parse (function): Parses the bytes of a single example.
+            indices (:obj:`sequence`, optional): The indices of the examples
+                in this sequence, in order. Defaults to every example in the
+                file.
+    """
+    def __init__(self, file_path, offsets, parse, indices=None):
+        self.file_path = file_path
+        self.offsets = offsets
+        self.parse = parse
+        if indices is None:
+            indices = range(len(offsets) - 1)
+        self.indices = indices
+        self._file = None
+        self._file_pid = None
+    
+    def __len__(self):
+        return len(self.indices)
+    
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            examples = copy.copy(self)
+            examples.indices = self.indices[i]
+            return examples
+        return self._read(self.indices[i])
+    
+    def _read(self, index):
+        """ Reads and parses the example at `index` in the file. """
+        start, end = int(self.offsets[index]), int(self.offsets[index + 1])
+        f = self._get_file()
+        f.seek(start)
+        return self.parse(f.read(end - start))
+    
+    def _get_file(self):
+        # Forked processes can't share a file position with their parent.
+        if self._file_pid != os.getpid() or self._file.closed:
+            self._file = open(self.file_path, 'rb')
+            self._file_pid = os.getpid()
+        return self._file
+    
+    def close(self):
+        """ Closes the file. It's reopened if more examples are read. """
+        if self._file is not None and self._file_pid == os.getpid():
+            self._file.close()
+        self._file = None
+        self._file_pid = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def shuffle(self, rng=random):
+        """ Shuffles the examples in place with `rng`, without reading them. """
+        if isinstance(self.indices, range):
+            indices = np.arange(self.indices.start, self.indices.stop, self.indices.step)
+        else:
+            indices = np.array(self.indices)
+        rng.shuffle(indices)
+        self.indices = indices
+
+def _examples_path(file_path):
+    """ Returns where the examples of the pickled list at `file_path` are
+        re-pickled to, in the cache directory rather than next to the file.
+    """
+    file_path = os.path.realpath(file_path)
+    path_hash = hashlib.sha256(file_path.encode()).hexdigest()[:16]
+    file_name = f'{os.path.basename(file_path)}.{path_hash}.examples'
+    return utils.path_in_cache(os.path.join('examples', file_name))
+
+def _offsets_path(file_path):
+    return file_path + '.index.npy'
+
+def _load_offsets(file_path, source_path):
+    """ Returns the saved offsets of the examples in `file_path`, or `None` if 
+        they haven't been saved, or `file_path` or `source_path` have 
+        changed since.
+    """
+    offsets_path = _offsets_path(file_path)
+    if not (os.path.exists(offsets_path) and os.path.exists(file_path)):
+        return None
+    if os.path.getmtime(offsets_path) < os.path.getmtime(source_path):
+        return None
+    offsets = np.load(offsets_path, mmap_mode='r')
+    if (not len(offsets)) or (offsets[-1] != os.path.getsize(file_path)):
+        return None
+    return offsets
+
+def _save_offsets(file_path, offsets):
+    """ Saves `offsets` next to `file_path`, and returns them memory-mapped. """
+    offsets_path = _offsets_path(file_path)
+    temp_path = offsets_path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        np.save(f, np.frombuffer(offsets, dtype=np.uint64))
+    os.replace(temp_path, offsets_path)
+    return np.load(offsets_path, mmap_mode='r')
@@ -13,10 +13,15 @@ class GoalFunction:
         model: The PyTorch or TensorFlow model used for evaluation.
     """
     def __init__(self, model, use_cache=True):
-        validators.validate_model_goal_function_compatibility(self.__class__, model.__class__)
+        # A `RemoteModel` stands in for a model run by an inference server.
+        model_class = getattr(model, 'model_class', model.__class__)
+        validators.validate_model_goal_function_compatibility(self.__class__, model_class)
         self.model = model
         self.use_cache = use_cache
         self.num_queries = 0
+        # If set, model calls are sent to this `InferenceClient` instead of 
+        # `self.model`.
+        self.inference_client = None
         if self.use_cache:
             self._call_model_cache = lru.LRU(utils.config('MODEL_CACHE_SIZE'))
         else:
@@ -42,6 +47,34 @@ class GoalFunction:
         display purposes, and a score.
         """
         model_outputs = self._call_model(tokenized_text_list)
+        return self._get_results_from_outputs(tokenized_text_list, model_outputs, 
+            ground_truth_output)
+
+    def get_results_many(self, queries):
+        """
+        Runs many calls to `get_results` with a single call to the model.
+        
+        Args:
+            queries (list): `(tokenized_text_list, ground_truth_output)` pairs
+        
+        Returns:
+            A list containing the results of each query
+        """
+        all_texts = [text for tokenized_text_list, _ in queries for text in tokenized_text_list]
+        model_outputs = self._call_model(all_texts)
+        all_results = []
+        start = 0
+        for tokenized_text_list, ground_truth_output in queries:
+            end = start + len(tokenized_text_list)
+            all_results.append(self._get_results_from_outputs(tokenized_text_list, 
+                model_outputs[start:end], ground_truth_output))
+            start = end
+        return all_results
+
+    def _get_results_from_outputs(self, tokenized_text_list, model_outputs, ground_truth_output):
+        """ Builds a result for each of `tokenized_text_list` from its model 
+            output.
+        """
         results = []
         for tokenized_text, raw_output in zip(tokenized_text_list, model_outputs):
             succeeded = self._is_goal_complete(raw_output, ground_truth_output)
@@ -82,6 +115,11 @@ class GoalFunction:
         if not len(tokenized_text_list):
             return []
         ids = [t.ids for t in tokenized_text_list]
+        if getattr(self, 'inference_client', None) is not None:
+            outputs = self.inference_client(ids)
+            if isinstance(outputs[0], np.ndarray):
+                outputs = torch.tensor(np.stack(outputs))
+            return self._process_model_outputs(tokenized_text_list, [outputs])
         if hasattr(self.model, 'model'):
             model_device = next(self.model.model.parameters()).device
         else:
@@ -142,6 +180,21 @@ class GoalFunction:
             all_outputs = [self._call_model_cache[text] for text in tokenized_text_list]
             return all_outputs
 
+    def get_cached_output(self, tokenized_text):
+        """ Returns the model's cached output for `tokenized_text`, or `None`
+            if it isn't cached.
+        """
+        if not self.use_cache:
+            return None
+        return self._call_model_cache.get(tokenized_text)
+
+    def add_cached_output(self, tokenized_text, output):
+        """ Caches the model's `output` for `tokenized_text`, computed 
+            elsewhere, so that the model isn't asked for it again.
+        """
+        if self.use_cache:
+            self._call_model_cache[tokenized_text] = output
+
     def extra_repr_keys(self): 
         return []
         
@@ -1,6 +1,7 @@
 from .csv_logger import CSVLogger
 from .file_logger import FileLogger
 from .logger import Logger
+from .parquet_logger import ParquetLogger
 from .visdom_logger import VisdomLogger
 from .weights_and_biases_logger import WeightsAndBiasesLogger
 
@@ -1,18 +1,60 @@
+import collections
 import numpy as np
+import queue
+import threading
 import torch
+import traceback
 
 from textattack.attack_results import FailedAttackResult, SkippedAttackResult
 
-from . import CSVLogger, FileLogger, VisdomLogger, WeightsAndBiasesLogger
+from . import CSVLogger, FileLogger, ParquetLogger, VisdomLogger, WeightsAndBiasesLogger
 
 class AttackLogManager:
-    def __init__(self):
+    def __init__(self, keep_results=True, summary_interval=None, asynchronous=False, 
+            max_queued=100):
         """ Logs the results of an attack to all attached loggers
+        
+            The summary is computed from running totals, which are updated as
+            each result is logged, so it can be logged at any time without
+            going over the results again.
+
+            Args:
+                keep_results (:obj:`bool`, optional): Whether to keep every 
+                    result in `self.results`. Defaults to True.
+                summary_interval (:obj:`int`, optional): If set, the summary
+                    is logged after every `summary_interval` results.
+                asynchronous (:obj:`bool`, optional): If True, loggers are
+                    called from a background thread, so that slow loggers
+                    don't hold up the attack. Logging blocks once 
+                    `max_queued` calls are waiting. Call `flush()` to wait for
+                    them to finish. The thread is started with the first
+                    call, so that workers can still be forked from this 
+                    process until then. Defaults to False.
+                max_queued (:obj:`int`, optional): The number of calls to 
+                    loggers that can wait in the background. Defaults to 100.
         """
         self.loggers = []
+        self.keep_results = keep_results
+        self.summary_interval = summary_interval
         self.results = []
         self.max_words_changed = 0
-        self.max_seq_len = 2**16
+        self.num_results = 0
+        self.num_successes = 0
+        self.num_failures = 0
+        self.num_skipped = 0
+        self.total_num_words = 0
+        # Summed over successful attacks that changed at least one word.
+        self.total_perturbed_word_percentage = 0.0
+        self.num_perturbed_word_percentages = 0
+        # Summed over attacks that weren't skipped.
+        self.total_num_queries = 0
+        # The number of successful attacks that changed each number of words.
+        self.num_words_changed_counts = collections.Counter()
+        self._queue = None
+        self._thread = None
+        self._logging_error = None
+        if asynchronous:
+            self._queue = queue.Queue(maxsize=max_queued)
 
     def enable_stdout(self):
         self.loggers.append(FileLogger(stdout=True))
@@ -20,20 +62,61 @@ class AttackLogManager:
     def enable_visdom(self):
         self.loggers.append(VisdomLogger())
 
-    def enable_wandb(self):
-        self.loggers.append(WeightsAndBiasesLogger())
+    def enable_wandb(self, log_every=100):
+        """ Logs results to Weights & Biases, in batches of `log_every`. """
+        self.loggers.append(WeightsAndBiasesLogger(log_every=log_every))
 
     def add_output_file(self, filename):
         self.loggers.append(FileLogger(filename=filename))
 
     def add_output_csv(self, filename, color_method):
+        """ Logs results to a CSV file, or to a file of JSON lines if 
+            `filename` ends in `.jsonl`.
+        """
         self.loggers.append(CSVLogger(filename=filename, color_method=color_method))
 
+    def add_output_parquet(self, filename):
+        """ Logs results as columns to a Parquet file, or to an Arrow file
+            if `filename` ends in `.arrow`.
+        """
+        self.loggers.append(ParquetLogger(filename=filename))
+
     def log_result(self, result):
         """ Logs an `AttackResult` on each of `self.loggers`. """
-        self.results.append(result)
-        for logger in self.loggers:
-            logger.log_attack_result(result)
+        self._add_result(result)
+        self._call_loggers('log_attack_result', result)
+        if self.summary_interval and (self.num_results % self.summary_interval == 0):
+            self.log_summary()
+    
+    def restore_results(self, results):
+        """ Adds `AttackResult` objects from an earlier run. They're counted
+            in the summary, but not logged again.
+        """
+        for result in results:
+            self._add_result(result)
+    
+    def _add_result(self, result):
+        """ Adds `result` to the running totals of the summary. """
+        if self.keep_results:
+            self.results.append(result)
+        self.num_results += 1
+        num_words = len(result.original_result.tokenized_text.words)
+        self.total_num_words += num_words
+        if isinstance(result, FailedAttackResult):
+            self.num_failures += 1
+        elif isinstance(result, SkippedAttackResult):
+            self.num_skipped += 1
+            return
+        else:
+            self.num_successes += 1
+            num_words_changed = len(result.original_result.tokenized_text.all_words_diff(
+                result.perturbed_result.tokenized_text))
+            self.num_words_changed_counts[num_words_changed] += 1
+            self.max_words_changed = max(self.max_words_changed, num_words_changed)
+            if num_words > 0 and num_words_changed > 0:
+                self.total_perturbed_word_percentage += num_words_changed * 100.0 / num_words
+                self.num_perturbed_word_percentages += 1
+        self.total_num_queries += result.num_queries
     
     def log_results(self, results):
         """ Logs an iterable of `AttackResult` objects on each of 
@@ -44,16 +127,68 @@ class AttackLogManager:
         self.log_summary()
 
     def log_summary_rows(self, rows, title, window_id):
-        for logger in self.loggers:
-            logger.log_summary_rows(rows, title, window_id)
+        self._call_loggers('log_summary_rows', rows, title, window_id)
 
     def log_sep(self):
-        for logger in self.loggers:
-            logger.log_sep()
+        self._call_loggers('log_sep')
 
     def flush(self):
-        for logger in self.loggers:
-            logger.flush()
+        """ Flushes each of `self.loggers`, after waiting for any calls to
+            them in the background.
+        """
+        self._call_loggers('flush')
+        if self._queue is not None:
+            self._queue.join()
+            self._raise_logging_error()
+    
+    def close(self):
+        """ Flushes and closes the loggers, and stops the background logging
+            thread. 
+        """
+        self.flush()
+        self._call_loggers('close')
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        self._queue = None
+        self._raise_logging_error()
+
+    def _call_loggers(self, method_name, *args, **kwargs):
+        """ Calls `method_name` on each of `self.loggers`, or queues the 
+            call for the background thread.
+        """
+        if self._queue is None:
+            for logger in self.loggers:
+                getattr(logger, method_name)(*args, **kwargs)
+            return
+        self._raise_logging_error()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._log_from_queue, daemon=True)
+            self._thread.start()
+        # Blocks while the queue is full, so that logging can't fall 
+        # arbitrarily far behind. Loggers are copied, since more may be 
+        # added before the call is made.
+        self._queue.put((list(self.loggers), method_name, args, kwargs))
+    
+    def _log_from_queue(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                break
+            loggers, method_name, args, kwargs = item
+            try:
+                if self._logging_error is None:
+                    for logger in loggers:
+                        getattr(logger, method_name)(*args, **kwargs)
+            except Exception:
+                self._logging_error = traceback.format_exc()
+            self._queue.task_done()
+    
+    def _raise_logging_error(self):
+        if self._logging_error is not None:
+            raise RuntimeError(f'Error in background logging thread:\n{self._logging_error}')
 
     def log_attack_details(self, attack_name, model_name):
         # @TODO log a more complete set of attack details
@@ -64,62 +199,36 @@ class AttackLogManager:
         self.log_summary_rows(attack_detail_rows, 'Attack Details', 'attack_details')
     
     def log_summary(self):
-        total_attacks = len(self.results)
+        total_attacks = self.num_results
         if total_attacks == 0:
             return
-        # Count things about attacks.
-        all_num_words = np.zeros(len(self.results))
-        perturbed_word_percentages = np.zeros(len(self.results))
-        num_words_changed_until_success =  np.zeros(self.max_seq_len)
-        failed_attacks = 0
-        skipped_attacks = 0
-        successful_attacks = 0
-        max_words_changed = None
-        for i, result in enumerate(self.results):
-            all_num_words[i] = len(result.original_result.tokenized_text.words)
-            if isinstance(result, FailedAttackResult):
-                failed_attacks += 1
-                continue
-            elif isinstance(result, SkippedAttackResult):
-                skipped_attacks += 1
-                continue
-            else: 
-                successful_attacks += 1
-            num_words_changed =  len(result.original_result.tokenized_text.all_words_diff(result.perturbed_result.tokenized_text))
-            num_words_changed_until_success[num_words_changed-1] += 1
-            max_words_changed = max(max_words_changed or num_words_changed, num_words_changed)
-            if len(result.original_result.tokenized_text.words) > 0:
-                perturbed_word_percentage = num_words_changed * 100.0 / len(result.original_result.tokenized_text.words)
-            else:
-                perturbed_word_percentage = 0
-            perturbed_word_percentages[i] = perturbed_word_percentage
         
         # Original classifier success rate on these samples.
-        original_accuracy = (total_attacks - skipped_attacks)  * 100.0 / (total_attacks) 
+        original_accuracy = (total_attacks - self.num_skipped)  * 100.0 / (total_attacks) 
         original_accuracy = str(round(original_accuracy, 2)) + '%'
         
         # New classifier success rate on these samples.
-        accuracy_under_attack = (failed_attacks) * 100.0 / (total_attacks)
+        accuracy_under_attack = (self.num_failures) * 100.0 / (total_attacks)
         accuracy_under_attack = str(round(accuracy_under_attack, 2)) + '%'
         
         # Attack success rate.
-        if successful_attacks + failed_attacks == 0:
+        if self.num_successes + self.num_failures == 0:
             attack_success_rate = 0
         else:
-            attack_success_rate = successful_attacks * 100.0 / (successful_attacks + failed_attacks) 
+            attack_success_rate = self.num_successes * 100.0 / (self.num_successes + self.num_failures) 
         attack_success_rate = str(round(attack_success_rate, 2)) + '%'
         
-        perturbed_word_percentages = perturbed_word_percentages[perturbed_word_percentages > 0]
-        average_perc_words_perturbed = perturbed_word_percentages.mean()
+        average_perc_words_perturbed = _mean(self.total_perturbed_word_percentage, 
+            self.num_perturbed_word_percentages)
         average_perc_words_perturbed = str(round(average_perc_words_perturbed, 2)) + '%'
         
-        average_num_words = all_num_words.mean()
+        average_num_words = self.total_num_words / total_attacks
         average_num_words = str(round(average_num_words, 2))
         
         summary_table_rows = [
-            ['Number of successful attacks:', str(successful_attacks)],
-            ['Number of failed attacks:', str(failed_attacks)],
-            ['Number of skipped attacks:', str(skipped_attacks)],
+            ['Number of successful attacks:', str(self.num_successes)],
+            ['Number of failed attacks:', str(self.num_failures)],
+            ['Number of skipped attacks:', str(self.num_skipped)],
             ['Original accuracy:', original_accuracy],
             ['Accuracy under attack:', accuracy_under_attack],
             ['Attack success rate:', attack_success_rate],
@@ -127,14 +236,16 @@ class AttackLogManager:
             ['Average num. words per input:', average_num_words],
         ]
         
-        num_queries = np.array([r.num_queries for r in self.results if not isinstance(r, SkippedAttackResult)])
-        avg_num_queries = num_queries.mean()
+        avg_num_queries = _mean(self.total_num_queries, total_attacks - self.num_skipped)
         avg_num_queries = str(round(avg_num_queries, 2))
         summary_table_rows.append(['Avg num queries:', avg_num_queries])
         self.log_summary_rows(summary_table_rows, 'Attack Results', 'attack_results_summary')
         # Show histogram of words changed.
         numbins = max(self.max_words_changed, 10)
-        for logger in self.loggers:
-            logger.log_hist(num_words_changed_until_success[:numbins],
-                numbins=numbins, title='Num Words Perturbed', window_id='num_words_perturbed')
-                
\ No newline at end of file
+        num_words_changed_until_success = np.array([self.num_words_changed_counts[n] 
+            for n in range(1, numbins + 1)], dtype=float)
+        self._call_loggers('log_hist', num_words_changed_until_success,
+            numbins=numbins, title='Num Words Perturbed', window_id='num_words_perturbed')
+
+def _mean(total, count):
+    return total / count if count else float('nan')
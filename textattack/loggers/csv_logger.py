@@ -1,38 +1,80 @@
-import sys
-import os
-import pandas as pd
 import csv
+import json
+import os
+import time
 
 from textattack.attack_results import FailedAttackResult
 from textattack.shared.utils import get_logger
 from .logger import Logger
 
 class CSVLogger(Logger):
-    def __init__(self, filename='results.csv', color_method='file'):
+    """ Writes a row for each attack result to a CSV file, or to a file of
+        JSON lines if `filename` ends in `.jsonl`.
+
+        Rows are written as results arrive, so memory use doesn't grow with
+        the number of results, and a crashed run keeps the rows it logged.
+        Writes are buffered, and synced to disk at most every
+        `sync_interval` seconds, and on `flush()` and `close()`.
+    """
+    COLUMNS = ['original_text', 'perturbed_text', 'original_score', 'perturbed_score',
+        'original_output', 'perturbed_output']
+
+    def __init__(self, filename='results.csv', color_method='file', sync_interval=5.0):
         self.filename = filename
         self.color_method = color_method
-        self.df = pd.DataFrame()
+        self.sync_interval = sync_interval
+        self.jsonl = filename.endswith('.jsonl')
+        directory = os.path.dirname(filename)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self._file = open(filename, 'w', newline='')
+        if not self.jsonl:
+            self._writer = csv.writer(self._file, quoting=csv.QUOTE_NONNUMERIC)
+            self._writer.writerow(CSVLogger.COLUMNS)
+        self._last_sync_time = time.time()
         self._flushed = True
 
     def log_attack_result(self, result):
         if isinstance(result, FailedAttackResult):
             return
         original_text, perturbed_text = result.diff_color(self.color_method)
-        row = {
-            'original_text': original_text, 
-            'perturbed_text': perturbed_text, 
-            'original_score': result.original_result.score, 
-            'perturbed_score': result.perturbed_result.score, 
-            'original_output': result.original_result.output, 
-            'perturbed_output': result.perturbed_result.output
-        } 
-        self.df = self.df.append(row, ignore_index=True)
+        row = [
+            original_text,
+            perturbed_text,
+            result.original_result.score,
+            result.perturbed_result.score,
+            result.original_result.output,
+            result.perturbed_result.output
+        ]
+        # Scores and outputs may be single-element tensors.
+        row = [value.item() if hasattr(value, 'item') else value for value in row]
+        if self.jsonl:
+            self._file.write(json.dumps(dict(zip(CSVLogger.COLUMNS, row))) + '\n')
+        else:
+            self._writer.writerow(row)
         self._flushed = False
+        if time.time() - self._last_sync_time >= self.sync_interval:
+            self._sync()
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._last_sync_time = time.time()
 
     def flush(self):
-        self.df.to_csv(self.filename, quoting=csv.QUOTE_NONNUMERIC, index=False)
+        self._sync()
         self._flushed = True
-    
+
+    def close(self):
+        """ Syncs the file to disk and closes it. No more results can be 
+            logged afterwards.
+        """
+        if self._file.closed:
+            return
+        self.flush()
+        self._file.close()
+
     def __del__(self):
         if not self._flushed:
             get_logger().warning('CSVLogger exiting without calling flush().')
+        self._file.close()
@@ -0,0 +1,117 @@
+from textattack.attack_results import SkippedAttackResult
+from textattack.shared.utils import get_logger
+from .logger import Logger
+
+class ParquetLogger(Logger):
+    """ Writes results as typed columns to a Parquet file, or to an Arrow
+        IPC file if `filename` ends in `.arrow`, for analysis without parsing
+        logs.
+
+        Texts are stored without color markup. Rows are buffered and written
+        as a row group every `row_group_size` results, and on `flush()`, so 
+        memory use doesn't grow with the number of results, and readers can
+        scan row groups without loading the whole file. The file is only 
+        readable once `close()` has written its footer.
+
+        Requires `pyarrow`, which is imported only when the logger is
+        created.
+    """
+    COLUMNS = ['result_type', 'original_text', 'perturbed_text', 'original_output',
+        'perturbed_output', 'original_score', 'perturbed_score', 'num_queries',
+        'num_words_changed', 'attack_time']
+
+    def __init__(self, filename='results.parquet', row_group_size=1000):
+        try:
+            import pyarrow
+        except ImportError:
+            raise ImportError('ParquetLogger requires pyarrow. Install it with `pip install pyarrow`.')
+        self.filename = filename
+        self.row_group_size = row_group_size
+        self.arrow = filename.endswith('.arrow')
+        self._columns = {column: [] for column in ParquetLogger.COLUMNS}
+        self._num_buffered = 0
+        # The schema and writer are created with the first row group, since
+        # the type of outputs depends on the goal function.
+        self._schema = None
+        self._writer = None
+        self._closed = False
+
+    def log_attack_result(self, result):
+        if self._closed:
+            raise RuntimeError(f'Cannot log results to {self.filename} after it was closed')
+        original, perturbed = result.original_result, result.perturbed_result
+        if isinstance(result, SkippedAttackResult):
+            num_words_changed = 0
+        else:
+            num_words_changed = len(original.tokenized_text.all_words_diff(perturbed.tokenized_text))
+        row = {
+            'result_type': type(result).__name__,
+            'original_text': original.tokenized_text.text,
+            'perturbed_text': perturbed.tokenized_text.text,
+            'original_output': original.output,
+            'perturbed_output': perturbed.output,
+            'original_score': original.score,
+            'perturbed_score': perturbed.score,
+            'num_queries': result.num_queries,
+            'num_words_changed': num_words_changed,
+            'attack_time': result.attack_time,
+        }
+        for column, value in row.items():
+            # Outputs and scores may be single-element tensors.
+            if hasattr(value, 'item'):
+                value = value.item()
+            self._columns[column].append(value)
+        self._num_buffered += 1
+        if self._num_buffered >= self.row_group_size:
+            self._write_row_group()
+
+    def _write_row_group(self):
+        import pyarrow as pa
+        if self._num_buffered == 0:
+            return
+        if self._schema is None:
+            output_type = pa.array(self._columns['original_output']
+                + self._columns['perturbed_output']).type
+            self._schema = pa.schema([
+                ('result_type', pa.string()),
+                ('original_text', pa.string()),
+                ('perturbed_text', pa.string()),
+                ('original_output', output_type),
+                ('perturbed_output', output_type),
+                ('original_score', pa.float64()),
+                ('perturbed_score', pa.float64()),
+                ('num_queries', pa.int64()),
+                ('num_words_changed', pa.int64()),
+                ('attack_time', pa.float64()),
+            ])
+        table = pa.Table.from_pydict(self._columns, schema=self._schema)
+        if self._writer is None:
+            if self.arrow:
+                self._writer = pa.ipc.new_file(self.filename, self._schema)
+            else:
+                import pyarrow.parquet as pq
+                self._writer = pq.ParquetWriter(self.filename, self._schema)
+        self._writer.write_table(table)
+        self._columns = {column: [] for column in ParquetLogger.COLUMNS}
+        self._num_buffered = 0
+
+    def flush(self):
+        """ Writes the buffered rows as a row group. """
+        if not self._closed:
+            self._write_row_group()
+
+    def close(self):
+        """ Writes the buffered rows and the footer of the file. No more
+            results can be logged afterwards.
+        """
+        if self._closed:
+            return
+        self._write_row_group()
+        if self._writer is not None:
+            self._writer.close()
+        self._closed = True
+
+    def __del__(self):
+        if not self._closed:
+            get_logger().warning('ParquetLogger exiting without calling close().')
+            self.close()
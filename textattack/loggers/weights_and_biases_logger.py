@@ -4,31 +4,54 @@ from textattack.shared.utils import html_table_from_rows
 from .logger import Logger
 
 class WeightsAndBiasesLogger(Logger):
-    def __init__(self, filename='', stdout=False):
+    """ Logs results to Weights & Biases.
+
+        Results are uploaded in batches of `log_every`, each as a table of
+        the new results, instead of one call per result. The table of all
+        results is only uploaded by `flush()`.
+    """
+    RESULT_COLUMNS = ['result_num', 'result_type', 'original_text', 'perturbed_text',
+        'original_output', 'perturbed_output']
+
+    def __init__(self, filename='', stdout=False, log_every=100):
         wandb.init(project='textattack')
+        self.log_every = log_every
         self._result_table_rows = []
-        
+        self._unlogged_rows = []
+
     def _log_result_table(self):
-        """ Weights & Biases doesn't have a feature to automatically 
+        """ Weights & Biases doesn't have a feature to automatically
             aggregate results across timesteps and display the full table.
             Therefore, we have to do it manually.
         """
         result_table = html_table_from_rows(self._result_table_rows)
         wandb.log({ 'results': wandb.Html(result_table, inject=False) })
-        
+
+    def _log_unlogged_rows(self):
+        """ Uploads the results logged since the last batch. """
+        if not len(self._unlogged_rows):
+            return
+        wandb.log({
+            'result_batch': wandb.Table(columns=WeightsAndBiasesLogger.RESULT_COLUMNS,
+                data=self._unlogged_rows),
+            'num_results': len(self._result_table_rows),
+        })
+        self._unlogged_rows = []
+
     def log_attack_result(self, result):
         original_text_colored, perturbed_text_colored = result.diff_color(color_method='html')
         result_num = len(self._result_table_rows)
         self._result_table_rows.append([f'<b>Result {result_num}</b>', original_text_colored, perturbed_text_colored])
-        result_diff_table = html_table_from_rows([[original_text_colored, perturbed_text_colored]])
-        result_diff_table = wandb.Html(result_diff_table)
-        wandb.log({
-            'resultType': type(result).__name__,
-            'result': result_diff_table,
-            'original_output': result.original_result.output,
-            'perturbed_output': result.perturbed_result.output,
-        })
-        self._log_result_table()
+        self._unlogged_rows.append([
+            result_num,
+            type(result).__name__,
+            wandb.Html(original_text_colored, inject=False),
+            wandb.Html(perturbed_text_colored, inject=False),
+            str(result.original_result.output),
+            str(result.perturbed_result.output),
+        ])
+        if len(self._unlogged_rows) >= self.log_every:
+            self._log_unlogged_rows()
 
     def log_summary_rows(self, rows, title, window_id):
         print('w&b skipping summary')
@@ -37,5 +60,10 @@ class WeightsAndBiasesLogger(Logger):
         # calculate its own summary statistics.
 
     def log_sep(self):
-        self.fout.write('-' * 90 + '\n')
-        
+        # Separators only make sense in text output.
+        pass
+
+    def flush(self):
+        self._log_unlogged_rows()
+        if len(self._result_table_rows):
+            self._log_result_table()
@@ -20,6 +20,10 @@ class BERTForClassification:
             model_file_path, num_labels=num_labels)
         self.model.to(utils.get_device())
         self.model.eval()
+        # Expose the input embeddings for white-box transformations, like
+        # `GradientBasedWordSwap`.
+        self.word_embeddings = self.model.get_input_embeddings()
+        self.lookup_table = self.word_embeddings.weight.data
         if entailment:
             self.tokenizer = BERTEntailmentTokenizer()
         else:
@@ -35,6 +35,8 @@ class LSTMForClassification(nn.Module):
         self.out = nn.Linear(d_out, nclasses)
         self.tokenizer = textattack.tokenizers.SpacyTokenizer(self.word2id,
             self.emb_layer.oovid, self.emb_layer.padid, max_seq_length)
+        # The embedding layer and encoder are run on (seq_len, batch) inputs.
+        self.batch_first = False
     
     def load_from_disk(self, model_folder_path):
         self.load_state_dict(load_cached_state_dict(model_folder_path))
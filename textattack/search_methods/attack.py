@@ -1,7 +1,12 @@
+import collections
+import hashlib
+import itertools
 import lru
 import numpy as np
 import os
 import random
+import time
+import torch
 
 from textattack.shared import utils
 from textattack.constraints import Constraint
@@ -39,6 +44,8 @@ class Attack:
         self.constraints = constraints
         self.is_black_box = is_black_box
         self.constraints_cache = lru.LRU(utils.config('CONSTRAINT_CACHE_SIZE'))
+        # If set, the `TokenizationCache` that examples are tokenized through.
+        self.tokenization_cache = None
     
     def get_transformations(self, text, original_text=None, 
                             apply_constraints=True, **kwargs):
@@ -63,6 +70,39 @@ class Attack:
             return self._filter_transformations(transformations, text, original_text)
         return transformations
     
+    def get_transformations_many(self, texts, original_text=None, 
+                                 apply_constraints=True, indices_to_replace=None):
+        """
+        Applies `get_transformations` to each text in `texts`. Transformations 
+        that implement `call_many` transform all of the texts at once.
+        
+        Args:
+            texts (list: TokenizedText): the texts to transform
+            original text (:obj:`type`, optional): Defaults to None. 
+            apply_constraints:
+            indices_to_replace (:obj:`list`, optional): the indices to replace
+                for each text in `texts`. Defaults to None.
+
+        Returns:
+            A list containing the filtered transformations of each text
+
+        """
+        if not self.transformation:
+            raise RuntimeError('Cannot call `get_transformations_many` without a transformation.')
+        if indices_to_replace is None:
+            indices_to_replace = [None] * len(texts)
+        if hasattr(self.transformation, 'call_many'):
+            all_transformations = self.transformation.call_many(texts, 
+                indices_to_replace=indices_to_replace)
+        else:
+            all_transformations = [self.transformation(text, indices_to_replace=indices) 
+                for text, indices in zip(texts, indices_to_replace)]
+        all_transformations = [np.array(t) for t in all_transformations]
+        if apply_constraints:
+            return [self._filter_transformations(transformations, text, original_text)
+                for text, transformations in zip(texts, all_transformations)]
+        return all_transformations
+    
     def _filter_transformations_uncached(self, original_transformations, text, original_text=None):
         """ Filters a list of potential perturbations based on a list of
                 transformations. Checks cache first.
@@ -111,17 +151,114 @@ class Attack:
         filtered_transformations.sort(key=lambda t: t.text)
         return filtered_transformations
 
-    def attack_one(self, tokenized_text):
+    def attack_one(self, tokenized_text, correct_output):
         """
         Perturbs `tokenized_text` to until goal is reached.
 
+        Search methods implement either this or `attack_one_steps`.
+        """
+        if not self._implements_steps():
+            raise NotImplementedError()
+        steps = self.attack_one_steps(tokenized_text, correct_output)
+        try:
+            query = next(steps)
+            while True:
+                query = steps.send(self.goal_function.get_results(*query))
+        except StopIteration as e:
+            return e.value
+
+    def attack_one_steps(self, tokenized_text, correct_output):
+        """
+        A generator version of `attack_one`. Instead of calling 
+        `self.goal_function.get_results(tokenized_text_list, correct_output)`, 
+        it yields `(tokenized_text_list, correct_output)` and is sent the 
+        results. It returns the attack result.
+        
+        This lets `attack_dataset` run many searches at once and answer their 
+        queries with a single call to the model.
         """
         raise NotImplementedError()
+
+    def _implements_steps(self):
+        return type(self).attack_one_steps is not Attack.attack_one_steps
+ 
+    def screen_examples(self, examples, attack_skippable_examples=False):
+        """
+        Tokenizes `examples` (through `self.tokenization_cache`, if it's 
+        set) and finds those whose goal is already met, with a single call 
+        to the model.
+
+        Args:
+            examples: A list of (text, ground_truth_output) pairs
+            attack_skippable_examples (:obj:`bool`, optional): If `True`, no
+                examples are skipped.
+
+        Returns:
+            A list containing a (goal_function_result, was_skipped) pair for 
+            each example
+        """
+        if self.tokenization_cache is not None:
+            tokenized_texts = self.tokenization_cache.tokenize([text for text, _ in examples])
+        else:
+            tokenized_texts = [TokenizedText(text, self.tokenizer) for text, _ in examples]
+        all_results = self.goal_function.get_results_many([([tokenized_text], ground_truth_output) 
+            for tokenized_text, (_, ground_truth_output) in zip(tokenized_texts, examples)])
+        screened_examples = []
+        for (_, ground_truth_output), (goal_function_result,) in zip(examples, all_results):
+            # We can skip examples for which the goal is already succeeded,
+            # unless `attack_skippable_examples` is True.
+            if (not attack_skippable_examples) and (goal_function_result.succeeded):
+                # Store the true output on the goal function so that the
+                # SkippedAttackResult has the correct output, not the incorrect.
+                goal_function_result.output = ground_truth_output
+                screened_examples.append((goal_function_result, True))
+            else:
+                screened_examples.append((goal_function_result, False))
+        return screened_examples
  
+    def get_screening(self, goal_function_result):
+        """ Returns what screening found out about the example of 
+            `goal_function_result`: its encoding and the model's output for 
+            it. Pass this to `restore_screened_example` in another process, so
+            that the example doesn't have to be tokenized and classified 
+            again there.
+        """
+        tokenized_text = goal_function_result.tokenized_text
+        model_output = self.goal_function.get_cached_output(tokenized_text)
+        if isinstance(model_output, torch.Tensor):
+            # NumPy arrays are much cheaper to send between processes.
+            model_output = model_output.detach().cpu().numpy()
+        return (tokenized_text.ids, tokenized_text.word_token_spans, model_output)
+
+    def restore_screened_example(self, text, ground_truth_output, screening):
+        """ Returns the `goal_function_result` of an example screened by 
+            `screen_examples` in another process, from its `get_screening`.
+            The model is only called again if its output wasn't kept.
+        """
+        ids, word_token_spans, model_output = screening
+        tokenized_text = TokenizedText(text, self.tokenizer, ids=ids, 
+            word_token_spans=word_token_spans)
+        if model_output is not None:
+            if isinstance(model_output, np.ndarray):
+                model_output = torch.from_numpy(model_output)
+            self.goal_function.add_cached_output(tokenized_text, model_output)
+        return self.goal_function.get_result(tokenized_text, ground_truth_output)
+
+    def attack_screened_examples(self, screened_examples, num_concurrent=1, 
+            result_store=None, random_seed=None):
+        """ Attacks examples returned by `screen_examples`, without tokenizing
+            or classifying them again, and yields their results in order. 
+            See `attack_dataset` for the arguments.
+        """
+        yield from self._attack_examples(screened_examples, num_concurrent, 
+            result_store, random_seed)
+
     def _get_examples_from_dataset(self, dataset, num_examples=None, shuffle=False,
             attack_n=False, attack_skippable_examples=False):
         """ 
-        Gets examples from a dataset and tokenizes them.
+        Gets examples from a dataset and tokenizes them. Examples are screened
+        in batches of up to `MODEL_BATCH_SIZE`, but no more examples are read
+        from `dataset` than are needed.
 
         Args:
             dataset: An iterable of (text, ground_truth_output) pairs
@@ -134,31 +271,34 @@ class Attack:
             results (Iterable[Tuple[GoalFunctionResult, Boolean]]): a list of
                 objects containing (text, ground_truth_output, was_skipped)
         """
-        examples = []
         n = 0
         
         if shuffle:
-            random.shuffle(dataset.examples)
-            
-        for text, ground_truth_output in dataset:
-            tokenized_text = TokenizedText(text, self.tokenizer)
-            goal_function_result = self.goal_function.get_result(tokenized_text, ground_truth_output)
-            # We can skip examples for which the goal is already succeeded,
-            # unless `attack_skippable_examples` is True.
-            if (not attack_skippable_examples) and (goal_function_result.succeeded):
-                if not attack_n: 
-                    n += 1
-                # Store the true output on the goal function so that the
-                # SkippedAttackResult has the correct output, not the incorrect.
-                goal_function_result.output = ground_truth_output
-                yield (goal_function_result, True)
+            dataset.shuffle()
+        
+        batch_size = utils.config('MODEL_BATCH_SIZE')
+        dataset = iter(dataset)
+        while True:
+            if num_examples is None:
+                num_to_read = batch_size
             else:
-                n += 1
-                yield (goal_function_result, False)
-            if num_examples is not None and (n >= num_examples):
+                # Under `attack_n`, skipped examples don't count, so read 
+                # more to replace them in the next batch.
+                num_to_read = min(batch_size, num_examples - n)
+                if num_to_read <= 0:
+                    break
+            batch = list(itertools.islice(dataset, num_to_read))
+            if not len(batch):
                 break
+            for goal_function_result, was_skipped in self.screen_examples(batch, 
+                    attack_skippable_examples=attack_skippable_examples):
+                if (not was_skipped) or (not attack_n):
+                    n += 1
+                yield (goal_function_result, was_skipped)
 
-    def attack_dataset(self, dataset, num_examples=None, shuffle=False, attack_n=False):
+    def attack_dataset(self, dataset, num_examples=None, shuffle=False, attack_n=False, 
+            num_concurrent=1, result_store=None, order='dataset', order_window=100,
+            random_seed=None):
         """ 
         Runs an attack on the given dataset and outputs the results to the 
             console and the output file.
@@ -166,23 +306,140 @@ class Attack:
         Args:
             dataset: An iterable of (text, ground_truth_output) pairs
             shuffle (:obj:`bool`, optional): Whether to shuffle the data. Defaults to False.
+            num_concurrent (:obj:`int`, optional): The number of examples to 
+                attack at once, if the search method implements 
+                `attack_one_steps`. Their queries are merged into a single 
+                call to the model. Results are still yielded in order. 
+                Defaults to 1.
+            result_store (:obj:`AttackResultStore`, optional): If set, 
+                examples with a stored result from this attack aren't 
+                attacked again, and new results are added to the store.
+            order (:obj:`str`, optional): The order to attack examples in, 
+                one of `utils.EXAMPLE_ORDERS`. Examples are ordered by their
+                number of words within each window of `order_window` 
+                examples. Results are still yielded in dataset order. 
+                Defaults to dataset order.
+            order_window (:obj:`int`, optional): The number of examples to 
+                order at a time. Defaults to 100.
+            random_seed (:obj:`int`, optional): If set, the search for each
+                example draws from its own random state, seeded by 
+                `random_seed` and the example. Results then don't depend on
+                the order examples are attacked in, how many are attacked at
+                once, or whether the run was resumed. Otherwise, searches 
+                share the global random state, so concurrent searches of 
+                randomized attacks aren't reproducible.
         """
         
         examples = self._get_examples_from_dataset(dataset, 
             num_examples=num_examples, shuffle=shuffle, attack_n=attack_n)
 
+        if order == 'dataset':
+            yield from self._attack_examples(examples, num_concurrent, result_store,
+                random_seed)
+            return
+        
+        examples = iter(examples)
+        while True:
+            window = list(itertools.islice(examples, order_window))
+            if not len(window):
+                break
+            # Examples are already split into words, so their lengths (see 
+            # `utils.example_length`) are free.
+            window_order = sorted(range(len(window)), key=lambda i: utils.example_order_key(
+                order, len(window[i][0].tokenized_text.words), i))
+            window_results = self._attack_examples([window[i] for i in window_order], 
+                num_concurrent, result_store, random_seed)
+            results = [None] * len(window)
+            for i, result in zip(window_order, window_results):
+                results[i] = result
+            yield from results
+
+    def _attack_examples(self, examples, num_concurrent=1, result_store=None, 
+            random_seed=None):
+        """ Attacks each of `examples`, a sequence of `(goal_function_result,
+            was_skipped)` pairs, and yields their results in order.
+        """
+        if num_concurrent > 1 and self._implements_steps():
+            yield from self._attack_examples_concurrently(examples, num_concurrent, 
+                result_store=result_store, random_seed=random_seed)
+            return
+
         for goal_function_result, was_skipped in examples:
             if was_skipped:
                 yield SkippedAttackResult(goal_function_result)
                 continue
+            if result_store is not None:
+                result = result_store.get(goal_function_result.tokenized_text.text,
+                    goal_function_result.output)
+                if result is not None:
+                    yield result
+                    continue
             # Start query count at 1 since we made a single query to determine 
             # that the prediction was correct.
             self.goal_function.num_queries = 1
-            result = self.attack_one(goal_function_result.tokenized_text, 
-                goal_function_result.output) # @TODO attacks should take one initial goal function result as a parameter
+            start_time = time.time()
+            with _SearchRandomState.for_example(random_seed, goal_function_result):
+                result = self.attack_one(goal_function_result.tokenized_text, 
+                    goal_function_result.output) # @TODO attacks should take one initial goal function result as a parameter
             result.num_queries = self.goal_function.num_queries
+            result.attack_time = time.time() - start_time
+            if result_store is not None:
+                result_store.add(goal_function_result.tokenized_text.text, 
+                    goal_function_result.output, result)
             yield result
     
+    def _attack_examples_concurrently(self, examples, num_concurrent, result_store=None,
+            random_seed=None):
+        """ Attacks up to `num_concurrent` of `examples` at once, answering 
+            the pending queries of all of their searches together. Yields 
+            results in the same order as `examples`.
+        """
+        examples = iter(examples)
+        # Searches in the order of their examples, including finished ones 
+        # whose results can't be yielded until earlier examples finish.
+        ordered_searches = collections.deque()
+        active_searches = []
+        examples_left = True
+        while True:
+            while examples_left and len(active_searches) < num_concurrent:
+                try:
+                    goal_function_result, was_skipped = next(examples)
+                except StopIteration:
+                    examples_left = False
+                    break
+                stored_result = None
+                if (result_store is not None) and not was_skipped:
+                    stored_result = result_store.get(goal_function_result.tokenized_text.text,
+                        goal_function_result.output)
+                if was_skipped:
+                    search = _Search(result=SkippedAttackResult(goal_function_result))
+                elif stored_result is not None:
+                    search = _Search(result=stored_result)
+                else:
+                    search = _Search(steps=self.attack_one_steps(
+                        goal_function_result.tokenized_text, goal_function_result.output),
+                        random_state=_SearchRandomState.for_example(random_seed, 
+                            goal_function_result))
+                    if result_store is not None:
+                        search.example = (goal_function_result.tokenized_text.text, 
+                            goal_function_result.output)
+                    if not search.advance():
+                        active_searches.append(search)
+                ordered_searches.append(search)
+            while len(ordered_searches) and ordered_searches[0].result is not None:
+                search = ordered_searches.popleft()
+                if search.example is not None:
+                    result_store.add(*search.example, search.result)
+                yield search.result
+            if not len(active_searches):
+                if examples_left:
+                    continue
+                break
+            all_results = self.goal_function.get_results_many(
+                [search.query for search in active_searches])
+            active_searches = [search for search, results in zip(active_searches, all_results)
+                if not search.advance(results)]
+    
     def _get_name(self):
         return self.__class__.__name__
     
@@ -219,3 +476,73 @@ class Attack:
         return main_str
     
     __str__ = __repr__
+
+class _Search:
+    """ The state of a single example being attacked by `attack_one_steps`. """
+    def __init__(self, steps=None, result=None, random_state=None):
+        self.steps = steps
+        self.random_state = random_state or _SearchRandomState(None)
+        self.query = None
+        self.result = result
+        # The `(text, output)` to store the result under, if it's new.
+        self.example = None
+        # Start query count at 1 since we made a single query to determine 
+        # that the prediction was correct.
+        self.num_queries = 1
+        self.start_time = time.time()
+
+    def advance(self, results=None):
+        """ Sends `results` to the search and runs it until its next query. 
+            Returns whether the search has finished.
+        """
+        try:
+            with self.random_state:
+                self.query = self.steps.send(results)
+        except StopIteration as e:
+            self.query = None
+            self.result = e.value
+            self.result.num_queries = self.num_queries
+            self.result.attack_time = time.time() - self.start_time
+            return True
+        self.num_queries += len(self.query[0])
+        return False
+
+class _SearchRandomState:
+    """ The `random` and NumPy random states of a single search, which are 
+        swapped in for the global ones while the search runs, so that 
+        concurrent searches don't draw from a shared stream. With a `seed` of
+        `None`, the search uses the global states.
+    """
+    def __init__(self, seed):
+        self.seed = seed
+        if seed is not None:
+            self._states = (random.Random(seed).getstate(), 
+                np.random.RandomState(seed).get_state())
+        self._global_states = None
+
+    @classmethod
+    def for_example(cls, random_seed, goal_function_result):
+        """ Returns the random state of the search for the example of 
+            `goal_function_result`, which only depends on `random_seed` and 
+            the example.
+        """
+        if random_seed is None:
+            return cls(None)
+        example = (random_seed, goal_function_result.tokenized_text.text, 
+            str(goal_function_result.output))
+        digest = hashlib.sha256(repr(example).encode()).digest()
+        return cls(int.from_bytes(digest[:4], 'little'))
+
+    def __enter__(self):
+        if self.seed is not None:
+            self._global_states = (random.getstate(), np.random.get_state())
+            random.setstate(self._states[0])
+            np.random.set_state(self._states[1])
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.seed is not None:
+            self._states = (random.getstate(), np.random.get_state())
+            random.setstate(self._global_states[0])
+            np.random.set_state(self._global_states[1])
+            self._global_states = None
@@ -21,12 +21,12 @@ class BeamSearch(Attack):
         self.beam_width = beam_width
         self.max_words_changed = max_words_changed
         
-    def attack_one(self, original_tokenized_text, correct_output):
+    def attack_one_steps(self, original_tokenized_text, correct_output):
         max_words_changed = min(
             self.max_words_changed, 
             len(original_tokenized_text.words)
         )
-        original_result = self.goal_function.get_results([original_tokenized_text], correct_output)[0]
+        original_result = (yield ([original_tokenized_text], correct_output))[0]
         default_unswapped_word_indices = list(range(len(original_tokenized_text.words)))
         beam = [(original_tokenized_text, default_unswapped_word_indices)]
         num_words_changed = 0
@@ -34,11 +34,14 @@ class BeamSearch(Attack):
         while num_words_changed < max_words_changed:
             num_words_changed += 1
             potential_next_beam = []
-            for text, unswapped_word_indices in beam:
-                transformations = self.get_transformations(
-                        text, indices_to_replace=unswapped_word_indices,
-                        original_text=original_tokenized_text
-                )
+            # Transform every text in the beam together, so that white-box
+            # transformations can share a single pass through the model.
+            beam_transformations = self.get_transformations_many(
+                    [text for text, _ in beam], 
+                    indices_to_replace=[indices for _, indices in beam],
+                    original_text=original_tokenized_text
+            )
+            for (text, unswapped_word_indices), transformations in zip(beam, beam_transformations):
                 for next_text in transformations:
                     new_unswapped_word_indices = unswapped_word_indices.copy()
                     modified_word_index = next_text.attack_attrs['modified_word_index']
@@ -48,7 +51,7 @@ class BeamSearch(Attack):
                 # If we did not find any possible perturbations, give up.
                 return FailedAttackResult(original_result)
             transformed_text_candidates = [text for (text,_) in potential_next_beam]
-            results = self.goal_function.get_results(transformed_text_candidates, correct_output)
+            results = yield (transformed_text_candidates, correct_output)
             scores = np.array([r.score for r in results])
             # If we succeeded, break
             best_result = results[scores.argmax()]
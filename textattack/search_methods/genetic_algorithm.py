@@ -33,35 +33,40 @@ class GeneticAlgorithm(Attack):
         self.temp = temp
         self.give_up_if_no_improvement = give_up_if_no_improvement
 
-    def _replace_at_index(self, pop_member, idx):
+    def _replace_at_index(self, pop_member, idx, original_tokenized_text, correct_output):
         """
         Select the best replacement for word at position (idx) 
         in (pop_member) to maximize score.
         Args:
             pop_member: The population member being perturbed.
             idx: The index at which to replace a word.
+            original_tokenized_text: The original text being attacked.
+            correct_output: The correct output of the original text.
         Returns:
             Whether a replacement which decreased the score was found.
         """
         transformations = self.get_transformations(pop_member.tokenized_text,
-                                                   original_text=self.original_tokenized_text,
+                                                   original_text=original_tokenized_text,
                                                    indices_to_replace=[idx])
         if not len(transformations):
             return False
-        new_x_results = self.goal_function.get_results(transformations, self.correct_output)
-        new_x_scores = torch.Tensor([r.score for r in new_x_results])
-        orig_score = self.goal_function.get_results([pop_member.tokenized_text], self.correct_output)[0].score
+        # Score the candidates and the current text in a single query.
+        results = yield (list(transformations) + [pop_member.tokenized_text], correct_output)
+        new_x_scores = torch.Tensor([r.score for r in results[:-1]])
+        orig_score = results[-1].score
         new_x_scores = new_x_scores - orig_score
         if new_x_scores.max() > 0:
             pop_member.tokenized_text = transformations[new_x_scores.argmax()]
             return True
         return False
 
-    def _perturb(self, pop_member):
+    def _perturb(self, pop_member, original_tokenized_text, correct_output):
         """
         Replaces a word in pop_member that has not been modified. 
         Args:
             pop_member: The population member being perturbed.
+            original_tokenized_text: The original text being attacked.
+            correct_output: The correct output of the original text.
         """
         x_len = pop_member.neighbors_len.shape[0]
         neighbors_len = deepcopy(pop_member.neighbors_len)
@@ -72,24 +77,28 @@ class GeneticAlgorithm(Attack):
         while iterations < non_zero_indices:
             w_select_probs = neighbors_len / np.sum(neighbors_len)
             rand_idx = np.random.choice(x_len, 1, p=w_select_probs)[0]
-            if self._replace_at_index(pop_member, rand_idx):
+            replaced = yield from self._replace_at_index(pop_member, rand_idx, 
+                original_tokenized_text, correct_output)
+            if replaced:
                 pop_member.neighbors_len[rand_idx] = 0
                 break
             neighbors_len[rand_idx] = 0
             iterations += 1
 
-    def _generate_population(self, neighbors_len):
+    def _generate_population(self, neighbors_len, original_tokenized_text, correct_output):
         """
         Generates a population of texts each with one word replaced
         Args:
             neighbors_len: A list of the number of candidate neighbors for each word.
+            original_tokenized_text: The original text being attacked.
+            correct_output: The correct output of the original text.
         Returns:
             The population.
         """
         pop = []
         for _ in range(self.pop_size):
-            pop_member = PopulationMember(self.original_tokenized_text, deepcopy(neighbors_len))
-            self._perturb(pop_member)
+            pop_member = PopulationMember(original_tokenized_text, deepcopy(neighbors_len))
+            yield from self._perturb(pop_member, original_tokenized_text, correct_output)
             pop.append(pop_member)
         return pop
 
@@ -126,7 +135,7 @@ class GeneticAlgorithm(Attack):
         words = tokenized_text.words
         neighbors_list = [[] for _ in range(len(words))]
         transformations = self.get_transformations(tokenized_text,
-                                                   original_text=self.original_tokenized_text,
+                                                   original_text=tokenized_text,
                                                    apply_constraints=False)
         for transformed_text in transformations:
             diff_idx = tokenized_text.first_word_diff_index(transformed_text)
@@ -135,15 +144,13 @@ class GeneticAlgorithm(Attack):
         neighbors_len = np.array([len(x) for x in neighbors_list])
         return neighbors_len
 
-    def attack_one(self, tokenized_text, correct_output):
-        self.original_tokenized_text = tokenized_text
-        self.correct_output = correct_output
-        original_result = self.goal_function.get_results([tokenized_text], correct_output)[0]
+    def attack_one_steps(self, tokenized_text, correct_output):
+        original_result = (yield ([tokenized_text], correct_output))[0]
         neighbors_len = self._get_neighbors_len(tokenized_text)
-        pop = self._generate_population(neighbors_len)
+        pop = yield from self._generate_population(neighbors_len, tokenized_text, correct_output)
         cur_score = original_result.score
         for i in range(self.max_iters):
-            pop_results = self.goal_function.get_results([pm.tokenized_text for pm in pop], correct_output)
+            pop_results = yield ([pm.tokenized_text for pm in pop], correct_output)
             for idx, result in enumerate(pop_results):
                 pop[idx].result = pop_results[idx]
             pop = sorted(pop, key=lambda x: -x.result.score)
@@ -173,7 +180,7 @@ class GeneticAlgorithm(Attack):
             children = [self._crossover(pop[parent1_idx[idx]], pop[parent2_idx[idx]])
                                 for idx in range(self.pop_size-1)]
             for c in children:
-                self._perturb(c)
+                yield from self._perturb(c, tokenized_text, correct_output)
 
             pop = elite + children
 
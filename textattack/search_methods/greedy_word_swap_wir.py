@@ -19,49 +19,94 @@ class GreedyWordSwapWIR(Attack):
         goal_function: A function for determining how well a perturbation is doing at achieving the attack's goal.
         transformation: The type of transformation.
         max_depth (:obj:`int`, optional): The maximum number of words to change. Defaults to 32. 
+        lookahead (:obj:`int`, optional): The number of upcoming indices to 
+            expand and score together in a single batch. The best swap among
+            them is made, and the candidates of the others are scored again
+            in the next batch. Defaults to 1.
     """
     WIR_TO_REPLACEMENT_STR = {
         'unk': '[UNK]',
         'delete': '[DELETE]',
     }
 
-    def __init__(self, goal_function, transformation, constraints=[], wir_method='unk', max_depth=32):
+    def __init__(self, goal_function, transformation, constraints=[], wir_method='unk', max_depth=32,
+            lookahead=1):
         super().__init__(goal_function, transformation, constraints=constraints)
         self.max_depth = max_depth
+        if lookahead < 1:
+            raise ValueError(f'Lookahead must be at least 1, got {lookahead}.')
+        self.lookahead = lookahead
         try: 
             self.replacement_str = self.WIR_TO_REPLACEMENT_STR[wir_method]
         except KeyError:
             raise KeyError(f'Word Importance Ranking method {wir_method} not recognized.') 
+    
+    def _get_results_by_index(self, tokenized_text, original_tokenized_text, 
+            indices, correct_output, candidate_words={}):
+        """ Scores the candidates for every index in `indices` in a single 
+            query to the goal function. Indices in `candidate_words` reuse 
+            the words that were found for them before the last swap, 
+            swapped into `tokenized_text` and checked against the constraints
+            again. The rest are expanded by the transformation.
+            
+            Returns a dictionary mapping each index to the results of its 
+            candidates, sorted by descending score.
+        """
+        new_indices = [i for i in indices if i not in candidate_words]
+        transformed_text_candidates = []
+        if len(new_indices):
+            transformed_text_candidates.extend(self.get_transformations(
+                tokenized_text,
+                original_tokenized_text,
+                indices_to_replace=new_indices))
+        reused_candidates = [tokenized_text.replace_word_at_index(i, word) 
+            for i in indices if i in candidate_words for word in candidate_words[i]]
+        if len(reused_candidates):
+            transformed_text_candidates.extend(self._filter_transformations(
+                reused_candidates, tokenized_text, original_tokenized_text))
+        results_by_index = {i: [] for i in indices}
+        if len(transformed_text_candidates):
+            results = yield (transformed_text_candidates, correct_output)
+            for result in results:
+                modified_word_index = result.tokenized_text.attack_attrs['modified_word_index']
+                results_by_index[modified_word_index].append(result)
+        for i in results_by_index:
+            results_by_index[i].sort(key=lambda x: -x.score)
+        return results_by_index
         
-    def attack_one(self, tokenized_text, correct_output):
+    def attack_one_steps(self, tokenized_text, correct_output):
         original_tokenized_text = tokenized_text
         num_words_changed = 0
        
         # Sort words by order of importance
-        original_result = self.goal_function.get_results([tokenized_text], correct_output)[0]
+        original_result = (yield ([tokenized_text], correct_output))[0]
         cur_score = original_result.score
         len_text = len(tokenized_text.words)
         
         leave_one_texts = \
             [tokenized_text.replace_word_at_index(i,self.replacement_str) for i in range(len_text)]
-        leave_one_scores = np.array([result.score for result in \
-            self.goal_function.get_results(leave_one_texts, correct_output)])
-        index_order = (-leave_one_scores).argsort()
+        leave_one_results = yield (leave_one_texts, correct_output)
+        leave_one_scores = np.array([result.score for result in leave_one_results])
+        index_order = [int(i) for i in (-leave_one_scores).argsort()]
 
-        new_tokenized_text = None
-        new_text_label = None
-        i = 0
-        while ((self.max_depth is None) or num_words_changed <= self.max_depth) and i < len(index_order):
-            transformed_text_candidates = self.get_transformations(
-                tokenized_text,
-                original_tokenized_text,
-                indices_to_replace=[index_order[i]])
-            i += 1
-            if len(transformed_text_candidates) == 0:
+        results = []
+        # The words found for indices that were scored, but not swapped.
+        candidate_words = {}
+        while ((self.max_depth is None) or num_words_changed <= self.max_depth) and len(index_order):
+            # Score the next `self.lookahead` indices together, and swap the 
+            # best of them, so that steps which don't improve the score don't
+            # each cost a round trip to the model.
+            window = index_order[:self.lookahead]
+            results_by_index = yield from self._get_results_by_index(tokenized_text, 
+                original_tokenized_text, window, correct_output, candidate_words)
+            index_order = index_order[len(window):]
+            candidate_words = {}
+            window = [i for i in window if len(results_by_index[i])]
+            if len(window) == 0:
                 continue
             num_words_changed += 1
-            results = sorted(self.goal_function.get_results(transformed_text_candidates, correct_output), 
-                    key=lambda x: -x.score)
+            best_index = max(window, key=lambda i: results_by_index[i][0].score)
+            results = results_by_index[best_index]
             # Skip swaps which don't improve the score
             if results[0].score > cur_score:
                 cur_score = results[0].score
@@ -93,6 +138,11 @@ class GreedyWordSwapWIR(Attack):
                 )
             else:
                 tokenized_text = results[0].tokenized_text
+                # The rest of the window goes back to the front of the order,
+                # and their words are scored again against the new text.
+                candidate_words = {i: [result.tokenized_text.words[i] for result in results_by_index[i]]
+                    for i in window if i != best_index}
+                index_order = list(candidate_words) + index_order
         
         if len(results):
             return FailedAttackResult(original_result, results[0])
@@ -4,4 +4,7 @@ from . import validators
 
 
 from .tokenized_text import TokenizedText
+from .attack_checkpoint import AttackCheckpoint
+from .attack_result_store import AttackResultStore
+from .tokenization_cache import TokenizationCache
 from .word_embedding import WordEmbedding
@@ -0,0 +1,135 @@
+import json
+import numpy as np
+import os
+import pickle
+import random
+import time
+import torch
+
+class AttackCheckpoint:
+    """ An append-only record of the examples a run has finished, so that an
+        interrupted run can be resumed.
+
+        The checkpoint is a file of JSON lines. The first line holds the
+        arguments of the run, and each following line holds the index of a
+        finished example in the dataset and its compact result (see
+        `AttackResult.to_compact`). The state of the random number generators
+        after the last example is kept next to it, in `{path}.rng`.
+
+        Records are flushed as they're added, so they survive the process 
+        being killed, and synced to disk at most every `sync_interval` 
+        seconds, and on `close()`.
+
+        Args:
+            path (str): The path of the checkpoint file, or `None` to only
+                keep track of the finished examples in memory.
+            args (dict): The arguments of the run.
+            results (:obj:`dict`, optional): The compact result of each
+                finished example, by index. Used when loading a checkpoint.
+            sync_interval (:obj:`float`, optional): The most seconds between
+                syncs of the file to disk.
+    """
+    FORMAT_VERSION = 1
+    # Arguments that must match for a run to be resumed from a checkpoint.
+    RESUME_ARGS = ['model', 'recipe', 'attack', 'transformation', 'constraints',
+        'goal_function', 'columnar_dataset', 'num_examples_offset', 'shuffle', 'shard', 'attack_n', 'random_seed']
+
+    def __init__(self, path, args, results=None, sync_interval=5.0):
+        self.path = path
+        self.args = args
+        self.results = results or {}
+        self.sync_interval = sync_interval
+        self._file = None
+        if path is None:
+            return
+        if not os.path.exists(path):
+            header = {'version': AttackCheckpoint.FORMAT_VERSION, 'args': args}
+            with open(path, 'w') as f:
+                f.write(json.dumps(header) + '\n')
+        self._file = open(path, 'a')
+        self._last_sync_time = time.time()
+
+    @classmethod
+    def load(cls, path, args, sync_interval=5.0):
+        """ Loads the checkpoint at `path` to resume a run with `args`. """
+        with open(path, 'rb') as f:
+            lines = f.readlines()
+        header = json.loads(lines[0])
+        if header['version'] != AttackCheckpoint.FORMAT_VERSION:
+            raise ValueError(f'Cannot read checkpoint of version {header["version"]}, '
+                f'expected version {AttackCheckpoint.FORMAT_VERSION}')
+        for key in AttackCheckpoint.RESUME_ARGS:
+            if header['args'].get(key) != args.get(key):
+                raise ValueError(f'Cannot resume from {path}: it was run with {key}='
+                    f'{header["args"].get(key)}, not {args.get(key)}')
+        results = {}
+        num_valid_bytes = len(lines[0])
+        for line in lines[1:]:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # The run was interrupted while writing this line.
+                break
+            if not line.endswith(b'\n'):
+                break
+            results[record['index']] = record['result']
+            num_valid_bytes += len(line)
+        # Cut off any partial line, so that new records start on a line of 
+        # their own.
+        os.truncate(path, num_valid_bytes)
+        return cls(path, header['args'], results=results, sync_interval=sync_interval)
+
+    def add(self, index, compact_result):
+        """ Records that the example at `index` finished with
+            `compact_result`.
+        """
+        self.results[index] = compact_result
+        if self._file is None:
+            return
+        record = {'index': index, 'result': compact_result}
+        self._file.write(json.dumps(record) + '\n')
+        self._file.flush()
+        if time.time() - self._last_sync_time >= self.sync_interval:
+            self._sync()
+
+    def _sync(self):
+        os.fsync(self._file.fileno())
+        self._last_sync_time = time.time()
+
+    def get_results(self):
+        """ Returns the finished results, rehydrated, in order of index. """
+        from textattack.attack_results import AttackResult
+        return [AttackResult.from_compact(self.results[index])
+            for index in sorted(self.results)]
+
+    def save_rng_state(self):
+        """ Saves the state of the random number generators. """
+        if self.path is None:
+            return
+        rng_state = (random.getstate(), np.random.get_state(), torch.get_rng_state())
+        temp_path = self.path + '.rng.tmp'
+        with open(temp_path, 'wb') as f:
+            pickle.dump(rng_state, f)
+        os.replace(temp_path, self.path + '.rng')
+
+    def restore_rng_state(self):
+        """ Restores the state of the random number generators, if it was
+            saved.
+        """
+        if self.path is None:
+            return
+        rng_path = self.path + '.rng'
+        if not os.path.exists(rng_path):
+            return
+        with open(rng_path, 'rb') as f:
+            python_state, numpy_state, torch_state = pickle.load(f)
+        random.setstate(python_state)
+        np.random.set_state(numpy_state)
+        torch.set_rng_state(torch_state)
+
+    def close(self):
+        if self._file is None or self._file.closed:
+            return
+        self._file.flush()
+        self._sync()
+        self._file.close()
@@ -0,0 +1,124 @@
+import hashlib
+import json
+import sqlite3
+import torch
+
+class AttackResultStore:
+    """ Remembers the result of attacking each example with a given attack,
+        so that re-running an unchanged attack doesn't attack the same
+        examples again.
+
+        Results are stored in compact form (see `AttackResult.to_compact`) in
+        a SQLite database, keyed by a fingerprint of the attack and one of the
+        example. The attack's fingerprint covers its configuration (as printed
+        by `Attack.__repr__`, along with the settings of its search method,
+        goal function, transformation and constraints), the weights of its 
+        model and the random seed, so changing any of these attacks every 
+        example afresh. Many
+        processes can share a store.
+
+        Args:
+            path (str): The path of the database file.
+            attack (Attack): The attack whose results to store.
+            random_seed (:obj:`int`, optional): The random seed of the run.
+    """
+    FORMAT_VERSION = 1
+
+    def __init__(self, path, attack, random_seed=None):
+        self.path = path
+        self.attack_fingerprint = get_attack_fingerprint(attack, random_seed)
+        # Wait for other processes writing to the store.
+        self._connection = sqlite3.connect(path, timeout=60)
+        with self._connection:
+            self._connection.execute('CREATE TABLE IF NOT EXISTS results ('
+                'attack TEXT, example TEXT, result TEXT, PRIMARY KEY (attack, example))')
+
+    def get(self, text, output):
+        """ Returns the stored result of attacking `text` with `output`, or
+            `None` if it hasn't been attacked.
+        """
+        row = self._connection.execute('SELECT result FROM results WHERE attack=? AND example=?',
+            (self.attack_fingerprint, _example_fingerprint(text, output))).fetchone()
+        if row is None:
+            return None
+        from textattack.attack_results import AttackResult
+        return AttackResult.from_compact(json.loads(row[0]))
+
+    def add(self, text, output, result):
+        """ Stores `result` as the result of attacking `text` with `output`. """
+        with self._connection:
+            self._connection.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?)',
+                (self.attack_fingerprint, _example_fingerprint(text, output),
+                    json.dumps(result.to_compact())))
+
+    def close(self):
+        self._connection.close()
+
+def get_attack_fingerprint(attack, random_seed=None):
+    """ Returns a hash of the configuration of `attack`, the weights of its
+        model and `random_seed`.
+    """
+    model = attack.goal_function.model
+    # A `RemoteModel` stands in for a model run by an inference server.
+    model_class = getattr(model, 'model_class', type(model))
+    fingerprint = {
+        'version': AttackResultStore.FORMAT_VERSION,
+        'attack': repr(attack),
+        # `Attack.__repr__` leaves out most settings, like the search 
+        # method's `beam_width` or the goal function's `target_max_score`.
+        'search_method': _get_settings(attack),
+        'goal_function': _get_settings(attack.goal_function),
+        'transformation': _get_settings(attack.transformation),
+        'constraints': [_get_settings(constraint) for constraint in attack.constraints],
+        'model': f'{model_class.__module__}.{model_class.__name__}',
+        'weights': get_model_weights_hash(model),
+        'random_seed': random_seed,
+    }
+    return _sha256(json.dumps(fingerprint, sort_keys=True))
+
+def get_model_weights_hash(model):
+    """ Returns a hash of the weights of `model`, or `None` if it isn't a
+        PyTorch model.
+    """
+    if getattr(model, 'weights_hash', None) is not None:
+        return model.weights_hash
+    # Some models, like `BERTForClassification`, wrap the `nn.Module` that
+    # actually holds their parameters.
+    module = model.model if hasattr(model, 'model') else model
+    if not isinstance(module, torch.nn.Module):
+        return None
+    weights_hash = hashlib.sha256()
+    for name, tensor in sorted(module.state_dict().items()):
+        weights_hash.update(name.encode())
+        weights_hash.update(str(tuple(tensor.shape)).encode())
+        weights_hash.update(tensor.detach().cpu().numpy().tobytes())
+    return weights_hash.hexdigest()
+
+def _get_settings(obj):
+    """ Returns the class of `obj` and its public attributes with primitive 
+        values, except for counters that change as it's used.
+    """
+    if obj is None:
+        return None
+    settings = {key: value for key, value in vars(obj).items() 
+        if (not key.startswith('_')) and (key not in _CHANGING_ATTRIBUTES) 
+            and _is_primitive(value)}
+    return [f'{type(obj).__module__}.{type(obj).__name__}', sorted(settings.items())]
+
+# Attributes that count how an object has been used, or say where its model
+# runs, rather than configure it.
+_CHANGING_ATTRIBUTES = {'num_queries', 'inference_client'}
+
+def _is_primitive(value):
+    if isinstance(value, (list, tuple)):
+        return all(_is_primitive(item) for item in value)
+    return isinstance(value, (str, int, float, bool, type(None)))
+
+def _example_fingerprint(text, output):
+    # Outputs may be single-element tensors or arrays.
+    if hasattr(output, 'item'):
+        output = output.item()
+    return _sha256(json.dumps([text, output]))
+
+def _sha256(s):
+    return hashlib.sha256(s.encode()).hexdigest()
@@ -1,4 +1,5 @@
 import argparse
+import os
 import textattack
 import torch
 import sys
@@ -32,19 +33,32 @@ def get_num_successes(model, ids, true_labels):
     successes = (guess_labels == true_labels).sum().item()
     return successes, true_labels, guess_labels
 
-def test_model_on_dataset(model, dataset, batch_size=16, num_examples=100):
+def encode_batch(model, texts, tokenization_cache=None):
+    """ Encodes `texts` with the tokenizer of `model`, through 
+        `tokenization_cache` if it's set.
+    """
+    if tokenization_cache is None:
+        return [model.tokenizer.encode(text) for text in texts]
+    tokenized_texts = tokenization_cache.tokenize(texts)
+    # Unwrap the encodings of tokenizers that encode text to a single vector.
+    return [t.ids[0] if len(t.ids) == 1 else t.ids for t in tokenized_texts]
+
+def test_model_on_dataset(model, dataset, batch_size=16, num_examples=100, 
+        tokenization_cache=None):
     succ = 0
     fail = 0
     batch_ids = []
     batch_labels = []
     all_true_labels = []
     all_guess_labels = []
+    batch_texts = []
     for i, (text, label) in enumerate(dataset):
         if i >= num_examples: break
-        ids = model.tokenizer.encode(text)
-        batch_ids.append(ids)
+        batch_texts.append(text)
         batch_labels.append(label)
-        if len(batch_ids) == batch_size:
+        if len(batch_texts) == batch_size:
+            batch_ids = encode_batch(model, batch_texts, tokenization_cache)
+            batch_texts = []
             batch_succ, true_labels, guess_labels = get_num_successes(model, batch_ids, batch_labels)
             batch_fail = batch_size - batch_succ
             succ += batch_succ
@@ -53,7 +67,8 @@ def test_model_on_dataset(model, dataset, batch_size=16, num_examples=100):
             batch_labels = []
             all_true_labels.extend(true_labels.tolist())
             all_guess_labels.extend(guess_labels.tolist())
-    if len(batch_ids) > 0:
+    if len(batch_texts) > 0:
+        batch_ids = encode_batch(model, batch_texts, tokenization_cache)
         batch_succ, true_labels, guess_labels = get_num_successes(model, batch_ids, batch_labels)
         batch_fail = len(batch_ids) - batch_succ
         succ += batch_succ
@@ -66,13 +81,20 @@ def test_model_on_dataset(model, dataset, batch_size=16, num_examples=100):
     print(f'Successes {succ}/{succ+fail} ({_cb(perc)})')
     return perc
 
-def test_all_models(num_examples):
+def test_all_models(num_examples, tokenization_cache_dir=None):
     _pb()
     for model_name in MODEL_CLASS_NAMES:
         model = eval(MODEL_CLASS_NAMES[model_name])()
         dataset = DATASET_BY_MODEL[model_name]()
         print(f'Testing {_cr(model_name)} on {_cr(type(dataset))}...')
-        test_model_on_dataset(model, dataset, num_examples=num_examples)
+        tokenization_cache = None
+        if tokenization_cache_dir:
+            tokenization_cache = textattack.shared.TokenizationCache(tokenization_cache_dir, 
+                type(dataset).__name__, model.tokenizer)
+        test_model_on_dataset(model, dataset, num_examples=num_examples, 
+            tokenization_cache=tokenization_cache)
+        if tokenization_cache is not None:
+            tokenization_cache.close()
         _pb()
     # @TODO print the grid of models/dataset names with results in a nice table :)
     
@@ -80,9 +102,13 @@ def parse_args():
     parser = argparse.ArgumentParser()
     parser.add_argument('--n', type=int, default=100, 
         help="number of examples to test on")
+    parser.add_argument('--tokenization-cache', nargs='?', default=None, metavar='DIR',
+        const=os.path.join(textattack.shared.utils.config('CACHE_DIR'), 'tokenized'),
+        help='Reuse the encodings of examples stored by earlier runs (or by --tokenization-cache '
+            'of run_attack.py), and store new ones.')
     return parser.parse_args()
 
 if __name__ == '__main__': 
     args = parse_args()
     with torch.no_grad():
-        test_all_models(args.n)
+        test_all_models(args.n, tokenization_cache_dir=args.tokenization_cache)
@@ -0,0 +1,62 @@
+"""
+Converts the dataset of a model to the columnar format read by 
+`textattack.datasets.ColumnarDataset`.
+
+Usage:
+    python -m textattack.shared.scripts.convert_dataset --model bert-mr --out-path mr.columnar --tokenize
+"""
+
+import argparse
+import itertools
+import os
+import textattack
+import time
+
+from .run_attack_args_helper import DATASET_BY_MODEL, parse_model_from_args
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Converts a dataset to the columnar format.')
+    parser.add_argument('--model', type=str, required=True, choices=DATASET_BY_MODEL.keys(),
+        help='The model whose dataset to convert.')
+    parser.add_argument('--out-path', type=str, required=True,
+        help='The directory to write the columnar dataset to.')
+    parser.add_argument('--tokenize', action='store_true', default=False,
+        help='Also fill the tokenization cache with the encoding of each text by the tokenizer of the model, '
+            'for runs with --columnar-dataset and --tokenization-cache.')
+    parser.add_argument('--tokenization-cache', type=str, required=False, metavar='DIR',
+        default=os.path.join(textattack.shared.utils.config('CACHE_DIR'), 'tokenized'),
+        help='The directory of the tokenization cache to fill with --tokenize.')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    start_time = time.time()
+    dataset = DATASET_BY_MODEL[args.model]()
+    textattack.datasets.write_columnar_dataset(dataset, args.out_path)
+    print(f'Wrote {len(dataset.examples)} examples to {args.out_path} in {time.time() - start_time:.1f}s')
+    if args.tokenize:
+        tokenize(args)
+
+def tokenize(args):
+    """ Stores the encoding of each text of the columnar dataset at 
+        `args.out_path` in the tokenization cache, under the same dataset 
+        name that `--columnar-dataset` runs look it up by.
+    """
+    start_time = time.time()
+    tokenizer = parse_model_from_args(args).tokenizer
+    dataset_name = os.path.basename(os.path.normpath(args.out_path))
+    tokenization_cache = textattack.shared.TokenizationCache(args.tokenization_cache, 
+        dataset_name, tokenizer)
+    texts = (text for text, _ in textattack.datasets.ColumnarDataset(args.out_path))
+    num_texts = 0
+    while True:
+        batch = list(itertools.islice(texts, 1000))
+        if not len(batch):
+            break
+        tokenization_cache.tokenize(batch)
+        num_texts += len(batch)
+    tokenization_cache.close()
+    print(f'Tokenized {num_texts} texts into {tokenization_cache.path} in {time.time() - start_time:.1f}s')
+
+if __name__ == '__main__':
+    main()
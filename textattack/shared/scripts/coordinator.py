@@ -0,0 +1,87 @@
+"""
+Serves a coordinator's example and result queues to attack workers on other
+machines, over TCP.
+"""
+
+import os
+import queue
+import threading
+import time
+
+from multiprocessing.managers import BaseManager
+
+# Environment variable to read the auth key from, if `--auth-key` isn't set.
+AUTH_KEY_ENV_VARIABLE = 'TEXTATTACK_AUTH_KEY'
+
+# Seconds between the heartbeats that each machine sends for its workers, to
+# keep their leases on the examples they're working on.
+HEARTBEAT_INTERVAL = 10
+
+# Arguments that name paths on the coordinator's machine. Workers on other
+# machines use their own.
+PER_HOST_ARGS = ['result_store', 'tokenization_cache', 'out_dir']
+
+class CoordinatorManager(BaseManager):
+    """ Shares the coordinator's queues and arguments with workers. """
+    pass
+
+def parse_address(address):
+    """ Parses a `host:port` string. """
+    host, sep, port = address.rpartition(':')
+    if not sep or not port.isdigit():
+        raise ValueError(f'Address must look like host:port, got {address}')
+    return host, int(port)
+
+def get_auth_key(args):
+    """ Returns the key that workers use to authenticate with the
+        coordinator. Messages between them are pickled, so only machines
+        that know the key may connect.
+    """
+    auth_key = args.auth_key or os.environ.get(AUTH_KEY_ENV_VARIABLE)
+    if not auth_key:
+        raise ValueError(f'Distributed attacks need an auth key, from --auth-key or ${AUTH_KEY_ENV_VARIABLE}')
+    return auth_key.encode()
+
+def get_shared_args(args):
+    """ Returns the arguments of the attack to share with workers, without
+        those in `PER_HOST_ARGS`.
+    """
+    return {name: value for name, value in vars(args).items() if name not in PER_HOST_ARGS}
+
+def get_host_args(shared_args, args):
+    """ Returns the coordinator's `shared_args`, with the arguments in 
+        `PER_HOST_ARGS` taken from this machine's `args`.
+    """
+    host_args = dict(shared_args)
+    host_args.update({name: getattr(args, name, None) for name in PER_HOST_ARGS})
+    return host_args
+
+def serve_queues(address, auth_key, attack_args):
+    """ Serves new example and result queues at `address`, along with the
+        arguments of the attack. Returns the queues.
+    """
+    in_queue = queue.Queue()
+    out_queue = queue.Queue()
+    CoordinatorManager.register('get_in_queue', callable=lambda: in_queue)
+    CoordinatorManager.register('get_out_queue', callable=lambda: out_queue)
+    CoordinatorManager.register('get_args', callable=lambda: attack_args)
+    manager = CoordinatorManager(address=parse_address(address), authkey=auth_key)
+    server = manager.get_server()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return in_queue, out_queue
+
+def connect_to_coordinator(address, auth_key):
+    """ Returns a manager connected to the coordinator at `address`. Waits for
+        the coordinator to come up, for up to a minute.
+    """
+    for name in ('get_in_queue', 'get_out_queue', 'get_args'):
+        CoordinatorManager.register(name)
+    manager = CoordinatorManager(address=parse_address(address), authkey=auth_key)
+    for _ in range(60):
+        try:
+            manager.connect()
+            return manager
+        except ConnectionRefusedError:
+            time.sleep(1)
+    manager.connect()
+    return manager
@@ -0,0 +1,210 @@
+"""
+Hands examples out to parallel attack workers.
+"""
+
+import collections
+import heapq
+import time
+
+from textattack.shared import utils
+
+class ExampleScheduler:
+    """ Sends examples to workers through a shared queue, in `order`,
+        keeping only a few queued at a time. Idle workers take the next
+        example as soon as they finish, so no worker is stuck with a fixed
+        share of the work.
+
+        New examples are first sent in batches to be screened, so that a
+        worker can find the examples whose goal is already met with a single
+        call to the model. Only the rest are sent to be attacked, one at a
+        time.
+
+        Tracks which examples each worker is working on, so that examples
+        whose attack raised an error or crashed its worker can be retried.
+        Workers on other machines hold leases on their examples, which they
+        renew with heartbeats. If a machine goes down, its workers' leases
+        expire, and their examples are retried too. Tasks that a worker took
+        off the queue but died before starting can be sent again with
+        `requeue_unstarted`.
+
+        Args:
+            in_queue: The queue that workers read `(task, examples)` tasks
+                from, where `task` is `'screen'` or `'attack'` and `examples`
+                is a list of `(example_id, text, ground_truth_output)`. The
+                examples of `'attack'` tasks also have what screening found
+                out about them, so that they aren't classified again.
+            max_queued (int): The number of tasks to keep in `in_queue`.
+            max_retries (:obj:`int`, optional): The number of times to retry
+                an example before giving up on it. Defaults to 1.
+            order (:obj:`str`, optional): The order to send examples in, one
+                of `utils.EXAMPLE_ORDERS`. Defaults to longest first.
+            screen_batch_size (:obj:`int`, optional): The number of examples
+                to screen at once. Defaults to `MODEL_BATCH_SIZE`.
+            lease_timeout (:obj:`float`, optional): The number of seconds 
+                that a worker's lease on its examples lasts, unless it's
+                renewed. By default, leases never expire.
+    """
+    def __init__(self, in_queue, max_queued, max_retries=1, order='longest-first',
+            screen_batch_size=None, lease_timeout=None):
+        if order not in utils.EXAMPLE_ORDERS:
+            raise ValueError(f'Unknown example order {order}, expected one of {utils.EXAMPLE_ORDERS}')
+        self.in_queue = in_queue
+        self.max_queued = max_queued
+        self.max_retries = max_retries
+        self.order = order
+        self.screen_batch_size = screen_batch_size or utils.config('MODEL_BATCH_SIZE')
+        self.lease_timeout = lease_timeout
+        self._pending = []
+        self._unscreened = collections.deque()
+        self._examples = {}
+        self._lengths = {}
+        self._screened = set()
+        self._screenings = {}
+        self._attempts = collections.Counter()
+        self._in_flight = {}
+        self._lease_expiry_times = {}
+        # The number of tasks in the queue for each tuple of example IDs.
+        self._queued = collections.Counter()
+        self._num_queued = 0
+        self._next_example_id = 0
+
+    def add(self, text, ground_truth_output, example_id=None, length=None):
+        """ Adds an example to be screened and attacked. Examples are
+            numbered in the order they're added, unless `example_id` is
+            given. Pass the example's `length` from the dataset's length
+            index, if it has one (see `TextAttackDataset.example_length`).
+        """
+        if example_id is None:
+            example_id = self._next_example_id
+        self._next_example_id = example_id + 1
+        self._examples[example_id] = (text, ground_truth_output)
+        if length is None:
+            length = utils.example_length(text)
+        self._lengths[example_id] = length
+        self._push(example_id)
+
+    def _push(self, example_id):
+        if example_id not in self._screened:
+            self._unscreened.append(example_id)
+            return
+        heapq.heappush(self._pending,
+            utils.example_order_key(self.order, self._lengths[example_id], example_id))
+
+    def fill(self):
+        """ Tops up the queue, screening new examples before attacking the
+            next pending ones.
+        """
+        while self._num_queued < self.max_queued and len(self._unscreened):
+            batch = []
+            while len(batch) < self.screen_batch_size and len(self._unscreened):
+                example_id = self._unscreened.popleft()
+                # Skip retries of examples that have since finished.
+                if self.is_pending(example_id):
+                    batch.append(example_id)
+            if len(batch):
+                self._put('screen', batch)
+        while self._num_queued < self.max_queued and len(self._pending):
+            example_id = heapq.heappop(self._pending)[-1]
+            if self.is_pending(example_id):
+                self._put('attack', [example_id])
+
+    def _put(self, task, example_ids):
+        examples = [(example_id,) + self._examples[example_id] for example_id in example_ids]
+        if task == 'attack':
+            examples = [example + (self._screenings.get(example[0]),) for example in examples]
+        self.in_queue.put((task, examples))
+        self._queued[tuple(example_ids)] += 1
+        self._num_queued += 1
+
+    def started(self, worker_id, example_ids):
+        """ Records that `worker_id` took a task for `example_ids` off the
+            queue.
+        """
+        # The task may have been sent again after we gave up on hearing that
+        # it started.
+        if self._queued[tuple(example_ids)] > 0:
+            self._queued[tuple(example_ids)] -= 1
+            self._num_queued -= 1
+        self._in_flight[worker_id] = list(example_ids)
+        self.renew(worker_id)
+
+    def requeue_unstarted(self):
+        """ Sends the examples of every task that no worker has started
+            again. Only call this when the queue is empty and every worker's
+            `started` message has been read, so that these tasks must have
+            been taken by workers that died before starting them.
+        """
+        for example_ids, num_tasks in self._queued.items():
+            self._num_queued -= num_tasks
+            for example_id in example_ids:
+                if self.is_pending(example_id):
+                    self._push(example_id)
+        self._queued.clear()
+
+    def renew(self, worker_id):
+        """ Renews `worker_id`'s lease on the examples it's working on. """
+        if self.lease_timeout is not None:
+            self._lease_expiry_times[worker_id] = time.monotonic() + self.lease_timeout
+
+    def expired_leases(self):
+        """ Returns the workers whose leases expired. The examples they were
+            working on should be retried with `failed`.
+        """
+        now = time.monotonic()
+        expired = [worker_id for worker_id, expiry_time in self._lease_expiry_times.items()
+            if expiry_time <= now]
+        for worker_id in expired:
+            del self._lease_expiry_times[worker_id]
+        return expired
+
+    def screened(self, worker_id, skipped_ids, screenings={}):
+        """ Records that `worker_id` screened the examples it was working on.
+            Those in `skipped_ids` are finished, and the rest will be
+            attacked, starting from their `screenings`, by example ID.
+        """
+        skipped_ids = set(skipped_ids)
+        for example_id in self._in_flight.pop(worker_id, []):
+            if not self.is_pending(example_id):
+                continue
+            if example_id in skipped_ids:
+                self._forget(example_id)
+            else:
+                self._screened.add(example_id)
+                if example_id in screenings:
+                    self._screenings[example_id] = screenings[example_id]
+                self._push(example_id)
+
+    def finished(self, worker_id, example_id):
+        """ Records that `worker_id` finished attacking `example_id`. """
+        self._in_flight.pop(worker_id, None)
+        self._forget(example_id)
+
+    def failed(self, worker_id, example_id):
+        """ Records that working on `example_id` failed. Returns whether it
+            will be retried.
+        """
+        in_flight = self._in_flight.get(worker_id, [])
+        if example_id in in_flight:
+            in_flight.remove(example_id)
+        self._attempts[example_id] += 1
+        if self._attempts[example_id] <= self.max_retries:
+            self._push(example_id)
+            return True
+        self._forget(example_id)
+        return False
+
+    def _forget(self, example_id):
+        del self._examples[example_id]
+        del self._lengths[example_id]
+        self._screened.discard(example_id)
+        self._screenings.pop(example_id, None)
+
+    def in_flight(self, worker_id):
+        """ Returns the examples that `worker_id` is working on. """
+        return list(self._in_flight.get(worker_id, []))
+
+    def is_pending(self, example_id):
+        """ Returns whether `example_id` has yet to be finished or given up
+            on.
+        """
+        return example_id in self._examples
@@ -0,0 +1,220 @@
+"""
+A single process that runs a model on behalf of many attack workers.
+"""
+
+import lru
+import os
+import queue
+import time
+import torch
+
+from textattack.shared import utils
+
+class InferenceServer:
+    """ Owns the only copy of a model that is used for inference. Workers
+        send the IDs of the inputs they need predictions for, and the server
+        coalesces their requests into batches of up to `batch_size` inputs.
+
+        Args:
+            model: The model to run.
+            request_queue: The queue that `InferenceClient` objects send
+                requests to.
+            response_queues (list): One response queue per worker, indexed
+                by worker ID.
+            batch_size (:obj:`int`, optional): The number of inputs to run
+                through the model at once. Defaults to `MODEL_BATCH_SIZE`.
+            latency (:obj:`float`, optional): The number of seconds to wait
+                for more requests before running a batch that isn't full.
+            cache_size (:obj:`int`, optional): The number of model outputs to
+                cache. These are shared across all workers. Defaults to
+                `MODEL_CACHE_SIZE`.
+    """
+    def __init__(self, model, request_queue, response_queues, batch_size=None,
+            latency=0.005, cache_size=None):
+        self.model = model
+        self.request_queue = request_queue
+        self.response_queues = response_queues
+        self.batch_size = batch_size or utils.config('MODEL_BATCH_SIZE')
+        self.latency = latency
+        self._cache = lru.LRU(cache_size or utils.config('MODEL_CACHE_SIZE'))
+        self._stopped = False
+
+    def serve(self):
+        """ Answers requests until `None` is put on the request queue. """
+        while not self._stopped:
+            requests = self._get_requests()
+            if requests:
+                self._answer_requests(requests)
+
+    def _get_requests(self):
+        """ Blocks until a request arrives, then keeps collecting requests
+            until there are enough inputs to fill a batch or the latency
+            window closes.
+        """
+        request = self.request_queue.get()
+        if request is None:
+            self._stopped = True
+            return []
+        requests = [request]
+        num_inputs = len(request[2])
+        deadline = time.monotonic() + self.latency
+        while num_inputs < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                request = self.request_queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if request is None:
+                self._stopped = True
+                break
+            requests.append(request)
+            num_inputs += len(request[2])
+        return requests
+
+    def _answer_requests(self, requests):
+        """ Runs the inputs from `requests` that aren't cached through the
+            model, and sends each worker the outputs for its inputs.
+        """
+        outputs = {}
+        for _, _, ids_list in requests:
+            for ids in ids_list:
+                key = _ids_key(ids)
+                if key in self._cache:
+                    outputs[key] = self._cache[key]
+                else:
+                    outputs[key] = None
+        uncached_keys = [key for key, output in outputs.items() if output is None]
+        try:
+            new_outputs = self._predict(uncached_keys)
+        except Exception as e:
+            for worker_id, request_id, _ in requests:
+                self.response_queues[worker_id].put((request_id, e))
+            return
+        for key, output in zip(uncached_keys, new_outputs):
+            outputs[key] = output
+            self._cache[key] = output
+        for worker_id, request_id, ids_list in requests:
+            self.response_queues[worker_id].put(
+                (request_id, [outputs[_ids_key(ids)] for ids in ids_list])
+            )
+
+    def _predict(self, ids_list):
+        """ Returns the model's output for each input in `ids_list`. Tensor
+            outputs are split into one NumPy array per input, which are much
+            cheaper to send between processes.
+        """
+        if not len(ids_list):
+            return []
+        if hasattr(self.model, 'model'):
+            model_device = next(self.model.model.parameters()).device
+        else:
+            model_device = next(self.model.parameters()).device
+        outputs = []
+        for batch_start in range(0, len(ids_list), self.batch_size):
+            batch_ids = torch.tensor(ids_list[batch_start:batch_start+self.batch_size]).to(model_device)
+            batch = [batch_ids[:, x, :] for x in range(batch_ids.shape[1])]
+            with torch.no_grad():
+                preds = self.model(*batch)
+            if isinstance(preds, tuple):
+                preds = preds[0]
+            if isinstance(preds, torch.Tensor):
+                preds = list(preds.cpu().numpy())
+            outputs.extend(preds)
+        return outputs
+
+class InferenceClient:
+    """ Sends a worker's inputs to an `InferenceServer` and waits for their
+        outputs. Set as the `inference_client` of a goal function to route its
+        model calls through the server.
+
+        Args:
+            worker_id (int): The ID of the worker, which indexes its
+                response queue.
+            request_queue: The server's request queue.
+            response_queue: The worker's response queue.
+            server_pid (:obj:`int`, optional): The process ID of the server.
+                If it's given, requests fail as soon as the server exits.
+            timeout (:obj:`float`, optional): The number of seconds to wait
+                for a response before giving up on a request.
+    """
+    # Seconds between checks that the server is still running.
+    POLL_INTERVAL = 1.0
+
+    def __init__(self, worker_id, request_queue, response_queue, server_pid=None, timeout=300.0):
+        self.worker_id = worker_id
+        self.request_queue = request_queue
+        self.response_queue = response_queue
+        self.server_pid = server_pid
+        self.timeout = timeout
+        self._num_requests = 0
+
+    def __call__(self, ids_list):
+        """ Returns the model's output for each input in `ids_list`. """
+        # Tag requests with our process ID, so that we can ignore responses
+        # meant for a crashed worker that used the same response queue.
+        request_id = (os.getpid(), self._num_requests)
+        self._num_requests += 1
+        self.request_queue.put((self.worker_id, request_id, ids_list))
+        deadline = time.monotonic() + self.timeout
+        while True:
+            timeout = min(InferenceClient.POLL_INTERVAL, deadline - time.monotonic())
+            try:
+                response_id, outputs = self.response_queue.get(timeout=max(timeout, 0))
+            except queue.Empty:
+                if self.server_pid is not None and not _process_is_alive(self.server_pid):
+                    raise RuntimeError(f'The inference server (process {self.server_pid}) exited.')
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f'The inference server did not answer within {self.timeout} seconds.')
+                continue
+            if response_id == request_id:
+                break
+        if isinstance(outputs, Exception):
+            raise outputs
+        return outputs
+
+class RemoteModel:
+    """ Stands in for the model of an `InferenceServer` in workers, so that
+        they don't load its weights. Only holds the model's tokenizer; its
+        goal function must have an `inference_client` to get predictions.
+
+        Args:
+            model_class (type): The class of the served model, used to
+                validate goal functions and fingerprint attacks.
+            tokenizer: The tokenizer of the served model.
+            weights_hash (:obj:`str`, optional): The hash of the served
+                model's weights (see `get_model_weights_hash`).
+    """
+    def __init__(self, model_class, tokenizer, weights_hash=None):
+        self.model_class = model_class
+        self.tokenizer = tokenizer
+        self.weights_hash = weights_hash
+
+    @classmethod
+    def from_model(cls, model):
+        from textattack.shared.attack_result_store import get_model_weights_hash
+        return cls(type(model), model.tokenizer, get_model_weights_hash(model))
+
+    def __call__(self, *args, **kwargs):
+        raise RuntimeError(f'{self.model_class.__name__} is run by an inference server. '
+            'Set the goal function\'s inference_client to call it.')
+
+    def parameters(self):
+        raise RuntimeError(f'{self.model_class.__name__} is run by an inference server, '
+            'so its weights were not loaded. Gradient-based transformations cannot use it.')
+
+def _process_is_alive(pid):
+    """ Returns whether the process `pid` is running. """
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # It's running as another user.
+        return True
+    return True
+
+def _ids_key(ids):
+    """ Returns a hashable version of the IDs of a single input. """
+    return tuple(tuple(vector) for vector in ids)
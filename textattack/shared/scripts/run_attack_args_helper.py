@@ -171,6 +171,26 @@ def get_args():
    
     parser.add_argument('--enable-csv', nargs='?', default=None, const='fancy', type=str,
         help='Enable logging to csv. Use --enable-csv plain to remove [[]] around words.')
+    
+    parser.add_argument('--enable-jsonl', nargs='?', default=None, const='fancy', type=str,
+        help='Enable logging to a file of JSON lines, with the same fields as --enable-csv. Use '
+            '--enable-jsonl plain to remove [[]] around words.')
+
+    parser.add_argument('--enable-parquet', nargs='?', default=None, const='parquet', type=str,
+        choices=['parquet', 'arrow'],
+        help='Enable logging results as typed columns to a Parquet file, or to an Arrow file with '
+            '--enable-parquet arrow. Requires pyarrow.')
+
+    parser.add_argument('--columnar-dataset', type=str, required=False, default=None, metavar='PATH',
+        help='Attack the examples of a columnar dataset written by convert_dataset.py, instead of the '
+            'default dataset of the model.')
+    
+    parser.add_argument('--summary-interval', type=int, required=False, default=None, metavar='N',
+        help='Log a summary of the results so far after every N results, as well as at the end.')
+
+    parser.add_argument('--async-logging', action='store_true', default=False,
+        help='Call loggers from a background thread, so that slow loggers (like Weights & Biases) don\'t '
+            'delay the attack.')
 
     parser.add_argument('--num-examples', '-n', type=int, required=False, 
         default='5', help='The number of examples to process.')
@@ -181,14 +201,86 @@ def get_args():
     parser.add_argument('--shuffle', action='store_true', required=False, 
         default=False, help='Randomly shuffle the data before attacking')
     
+    parser.add_argument('--shard', type=str, required=False, default=None, metavar='INDEX/COUNT',
+        help='Only attack shard INDEX of COUNT disjoint shards of the dataset, e.g. "--shard 3/16". Independent '
+            'runs with the same arguments and different shards attack different examples.')
+    
     parser.add_argument('--interactive', action='store_true', default=False,
         help='Whether to run attacks interactively.')
     
     parser.add_argument('--attack-n', action='store_true', default=False,
         help='Whether to run attack until `n` examples have been attacked (not skipped).')
     
+    parser.add_argument('--num-concurrent', type=int, required=False, default=1,
+        help='Number of examples to attack at once, merging their model queries into shared batches. '
+            'Only used by search methods that implement `attack_one_steps`.')
+    
+    parser.add_argument('--example-order', type=str, required=False, default=None, 
+        choices=textattack.shared.utils.EXAMPLE_ORDERS,
+        help='The order to attack examples in. Results are logged in dataset order either way. Defaults to '
+            'longest-first with --parallel, so that no worker is left attacking a long example at the end, '
+            'and to dataset order otherwise.')
+    
+    parser.add_argument('--checkpoint', action='store_true', default=False,
+        help='Save a checkpoint of the finished examples to the output directory, so that the run can be '
+            'resumed with --resume if it\'s interrupted.')
+    
+    parser.add_argument('--resume', type=str, required=False, default=None, metavar='CHECKPOINT',
+        help='Resume an interrupted run from its checkpoint file (see --checkpoint), and keep adding to it. '
+            'Finished examples are skipped, and counted in the summary.')
+    
+    parser.add_argument('--result-store', nargs='?', default=None, metavar='PATH',
+        const=os.path.join(textattack.shared.utils.config('CACHE_DIR'), 'attack_results.db'),
+        help='Store the result of each attacked example, keyed by the attack, model weights and random seed, '
+            'and reuse stored results instead of attacking the same examples again. Defaults to a '
+            'database in the TextAttack cache directory.')
+    
+    parser.add_argument('--tokenization-cache', nargs='?', default=None, metavar='DIR',
+        const=os.path.join(textattack.shared.utils.config('CACHE_DIR'), 'tokenized'),
+        help='Store the encoding of each example by the model\'s tokenizer, and reuse it instead of tokenizing '
+            'the dataset again. Encodings are kept for each dataset and tokenizer, and aren\'t reused if '
+            'its vocabulary or settings change. Defaults to the TextAttack cache directory.')
+    
     parser.add_argument('--parallel', action='store_true', default=False,
-        help='Run attack using multiple GPUs.')
+        help='Run attack using multiple worker processes: one per GPU, or several CPU workers if there are no GPUs.')
+    
+    parser.add_argument('--num-workers', type=int, required=False, default=None,
+        help='Number of worker processes to run with --parallel. Defaults to the number of GPUs, or '
+            'to the number of CPU cores divided by --threads-per-worker if there are no GPUs.')
+    
+    parser.add_argument('--threads-per-worker', type=int, required=False, default=None,
+        help='Number of torch and BLAS threads for each worker to use with --parallel. Defaults to '
+            'splitting the CPU cores evenly between workers.')
+    
+    parser.add_argument('--max-retries', type=int, required=False, default=1,
+        help='With --parallel, the number of times to retry an example whose attack raised an error or '
+            'crashed its worker, before giving up on it.')
+    
+    parser.add_argument('--fork-workers', action='store_true', default=False,
+        help='With --parallel, load the attack once and fork CPU workers that share its weights '
+            'copy-on-write, instead of having each worker load its own copy. Ignored when running on GPUs.')
+    
+    parser.add_argument('--inference-server', action='store_true', default=False,
+        help='With --parallel, run the model in a single inference process (on the first GPU, if there '
+            'is one) that batches queries from all workers and shares one model output cache.')
+    
+    parser.add_argument('--inference-latency', type=float, required=False, default=5.0,
+        help='Milliseconds the inference server waits for more queries before running a batch that isn\'t full.')
+
+    parser.add_argument('--coordinator', type=str, required=False, default=None, metavar='HOST:PORT',
+        help='Coordinate a distributed attack: serve examples to workers started with --worker-of at this '
+            'address, and log their results.')
+    
+    parser.add_argument('--worker-of', type=str, required=False, default=None, metavar='HOST:PORT',
+        help='Run attack workers for the coordinator at this address, using its attack arguments. '
+            'Use --num-workers and --threads-per-worker to lay out workers on this machine.')
+    
+    parser.add_argument('--auth-key', type=str, required=False, default=None,
+        help='Key shared by a coordinator and its workers. Defaults to $TEXTATTACK_AUTH_KEY.')
+    
+    parser.add_argument('--lease-timeout', type=float, required=False, default=60.0,
+        help='With --coordinator, the number of seconds to wait for a heartbeat from a worker before '
+            'retrying its examples on other workers.')
 
     goal_function_choices = ', '.join(GOAL_FUNCTION_CLASS_NAMES.keys())
     parser.add_argument('--goal-function', '-g', default='untargeted-classification',
@@ -208,6 +300,10 @@ def get_args():
         help='full attack recipe (overrides provided goal function, transformation & constraints)',
         choices=RECIPE_NAMES.keys())
     
+    parser.add_argument('--lookahead', type=int, required=False, default=None,
+        help='With greedy-word-wir, or a recipe that uses it, the number of words to score the swaps of in a '
+            'single batch before making the best swap among them. Defaults to 1.')
+    
     command_line_args = None if sys.argv[1:] else ['-h'] # Default to help with empty arguments.
     args = parser.parse_args(command_line_args)
     
@@ -274,7 +370,7 @@ def parse_recipe_from_args(model, args):
         raise ValueError('Invalid recipe {args.recipe}')
     return recipe
 
-def parse_goal_function_and_attack_from_args(args):
+def parse_model_from_args(args):
     if ':' in args.model:
         model_name, params = args.model.split(':')
         if model_name not in MODEL_CLASS_NAMES:
@@ -284,6 +380,14 @@ def parse_goal_function_and_attack_from_args(args):
         model = eval(f'{MODEL_CLASS_NAMES[args.model]}()')
     else: 
         raise ValueError(f'Error: unsupported model {args.model}')
+    return model
+
+def parse_goal_function_and_attack_from_args(args, model=None):
+    """ Builds the goal function and attack from `args`, loading the model 
+        unless `model` is given.
+    """
+    if model is None:
+        model = parse_model_from_args(args)
     if args.recipe:
         attack = parse_recipe_from_args(model, args)
         goal_function = attack.goal_function
@@ -300,10 +404,82 @@ def parse_goal_function_and_attack_from_args(args):
             attack = eval(f'{SEARCH_CLASS_NAMES[args.attack]}(goal_function, transformation, constraints=constraints)')
         else:
             raise ValueError(f'Error: unsupported attack {args.attack}')
+    if args.lookahead is not None:
+        if not isinstance(attack, textattack.search_methods.GreedyWordSwapWIR):
+            raise ValueError(f'Error: --lookahead only applies to greedy-word-wir, not {attack.__class__.__name__}')
+        if args.lookahead < 1:
+            raise ValueError(f'Error: --lookahead must be at least 1, got {args.lookahead}')
+        attack.lookahead = args.lookahead
     return goal_function, attack
 
+def parse_dataset_from_args(args):
+    """ Loads the dataset of `args.model` (or `args.columnar_dataset`, if 
+        it's set), shuffled by `args.random_seed` if `args.shuffle` is set, 
+        and sharded if `args.shard` is set.
+    """
+    if args.columnar_dataset:
+        dataset = textattack.datasets.ColumnarDataset(args.columnar_dataset, 
+            offset=args.num_examples_offset)
+    elif args.model in DATASET_BY_MODEL:
+        dataset = DATASET_BY_MODEL[args.model](offset=args.num_examples_offset)
+    else:
+        raise ValueError(f'Error: unsupported model {args.model}')
+    if args.shuffle:
+        dataset.shuffle(seed=args.random_seed)
+    if args.shard:
+        try:
+            index, count = (int(n) for n in args.shard.split('/'))
+        except ValueError:
+            raise ValueError(f'Error: --shard must look like INDEX/COUNT, not {args.shard}')
+        dataset.shard(index, count)
+    return dataset
+
+def parse_checkpoint_from_args(args):
+    """ Returns the checkpoint to resume from, if `args.resume` is set, a
+        new checkpoint in the output directory, if `args.checkpoint` is set, 
+        or otherwise one that's only kept in memory. Call this after 
+        `parse_logger_from_args`, which sets the output directory.
+    """
+    checkpoint_args = dict(vars(args))
+    if args.resume:
+        checkpoint = textattack.shared.AttackCheckpoint.load(args.resume, checkpoint_args)
+        print(f'Resuming from {args.resume} with {len(checkpoint.results)} finished examples.')
+    elif args.checkpoint:
+        out_time = int(time.time()*1000)
+        checkpoint_path = os.path.join(args.out_dir, f'attack-{out_time}.checkpoint.jsonl')
+        checkpoint = textattack.shared.AttackCheckpoint(checkpoint_path, checkpoint_args)
+    else:
+        checkpoint = textattack.shared.AttackCheckpoint(None, checkpoint_args)
+    return checkpoint
+
+def parse_result_store_from_args(args, attack):
+    """ Returns the store of results of `attack`, if `args.result_store` is 
+        set, or `None`.
+    """
+    if not args.result_store:
+        return None
+    return textattack.shared.AttackResultStore(args.result_store, attack, 
+        random_seed=args.random_seed)
+
+def parse_tokenization_cache_from_args(args, attack):
+    """ Makes `attack` tokenize examples through a cache of the dataset's 
+        encodings, if `args.tokenization_cache` is set. Returns the cache, or
+        `None`.
+    """
+    if not args.tokenization_cache:
+        return None
+    if args.columnar_dataset:
+        dataset_name = os.path.basename(os.path.normpath(args.columnar_dataset))
+    else:
+        dataset_name = DATASET_BY_MODEL[args.model].__name__
+    attack.tokenization_cache = textattack.shared.TokenizationCache(args.tokenization_cache,
+        dataset_name, attack.tokenizer)
+    return attack.tokenization_cache
+
 def parse_logger_from_args(args):# Create logger
-    attack_log_manager = textattack.loggers.AttackLogManager()
+    # The summary is kept as running totals, so results needn't be kept.
+    attack_log_manager = textattack.loggers.AttackLogManager(keep_results=False, 
+        summary_interval=args.summary_interval, asynchronous=args.async_logging)
     # Set default output directory to `textattack/outputs`.
     if not args.out_dir:
         current_dir = os.path.dirname(os.path.realpath(__file__))
@@ -322,6 +498,21 @@ def parse_logger_from_args(args):# Create logger
         csv_path = os.path.join(args.out_dir, outfile_name)
         attack_log_manager.add_output_csv(csv_path, color_method)
         print('Logging to CSV at path {}.'.format(csv_path))
+    
+    # JSON lines
+    if args.enable_jsonl:
+        outfile_name = 'attack-{}.jsonl'.format(out_time)
+        color_method = None if args.enable_jsonl == 'plain' else 'file'
+        jsonl_path = os.path.join(args.out_dir, outfile_name)
+        attack_log_manager.add_output_csv(jsonl_path, color_method)
+        print('Logging to JSON lines at path {}.'.format(jsonl_path))
+
+    # Parquet
+    if args.enable_parquet:
+        outfile_name = 'attack-{}.{}'.format(out_time, args.enable_parquet)
+        parquet_path = os.path.join(args.out_dir, outfile_name)
+        attack_log_manager.add_output_parquet(parquet_path)
+        print('Logging to {} at path {}.'.format(args.enable_parquet.capitalize(), parquet_path))
 
     # Visdom
     if args.enable_visdom:
@@ -0,0 +1,79 @@
+"""
+Runs attack workers on this machine for a coordinator started with
+`--coordinator`.
+
+Workers connect to the coordinator, load the attack from its arguments, and
+then pull examples and send back results just like local parallel workers.
+Paths like `--result-store` are taken from this machine's arguments instead
+of the coordinator's. Heartbeats are sent for each worker while it runs, so
+that the coordinator can retry the examples of workers on a machine that
+went down.
+"""
+
+import argparse
+import os
+import socket
+import time
+import torch
+
+from .coordinator import HEARTBEAT_INTERVAL, connect_to_coordinator, get_auth_key, get_host_args
+from .run_attack_parallel import attack_from_queue, get_worker_layout, set_thread_env_variables
+
+def attack_from_coordinator(address, auth_key, host_args, worker_id, gpu_id, num_threads):
+    try:
+        manager = connect_to_coordinator(address, auth_key)
+        args = argparse.Namespace(**get_host_args(manager.get_args().copy(), host_args))
+        attack_from_queue(args, worker_id, gpu_id, num_threads,
+            manager.get_in_queue(), manager.get_out_queue())
+    except (EOFError, ConnectionError):
+        # The coordinator finished and shut down.
+        pass
+
+def run(args):
+    """ Runs workers for the coordinator at `args.worker_of` until it shuts
+        down, replacing any that crash.
+    """
+    auth_key = get_auth_key(args)
+    out_queue = connect_to_coordinator(args.worker_of, auth_key).get_out_queue()
+    num_gpus = torch.cuda.device_count()
+    num_workers, num_threads = get_worker_layout(args, num_gpus)
+    if num_gpus:
+        print(f'Running {num_workers} workers on {num_gpus} GPUs for {args.worker_of}')
+    else:
+        print(f'Running {num_workers} CPU workers with {num_threads} threads each for {args.worker_of}')
+    # Worker IDs have to be unique across machines.
+    host_id = f'{socket.gethostname()}:{os.getpid()}'
+    context = torch.multiprocessing.get_context('spawn')
+    set_thread_env_variables(num_threads)
+    worker_args = [(args.worker_of, auth_key, args, f'{host_id}:{i}',
+        (i % num_gpus) if num_gpus else None, num_threads) for i in range(num_workers)]
+    workers = []
+    for w_args in worker_args:
+        worker = context.Process(target=attack_from_coordinator, args=w_args)
+        worker.start()
+        workers.append(worker)
+    last_heartbeat_time = 0
+    # Workers exit cleanly once the coordinator shuts down.
+    while not all(worker.exitcode == 0 for worker in workers):
+        time.sleep(1)
+        if time.time() - last_heartbeat_time >= HEARTBEAT_INTERVAL:
+            try:
+                for i, worker in enumerate(workers):
+                    if worker.is_alive():
+                        out_queue.put(('heartbeat', worker_args[i][3], None, None))
+            except (EOFError, ConnectionError):
+                return
+            last_heartbeat_time = time.time()
+        for i, worker in enumerate(workers):
+            if worker.exitcode is None or worker.exitcode == 0:
+                continue
+            # Tell the coordinator to retry the worker's example, then
+            # replace it.
+            worker_id = worker_args[i][3]
+            try:
+                out_queue.put(('crashed', worker_id, None,
+                    f'Worker {worker_id} exited with code {worker.exitcode}.'))
+            except (EOFError, ConnectionError):
+                return
+            workers[i] = context.Process(target=attack_from_coordinator, args=worker_args[i])
+            workers[i].start()
@@ -2,18 +2,65 @@
 A command line parser to run an attack from user specifications.
 """
 
+import collections
+import gc
+import itertools
 import os
+import queue
+import sys
 import textattack
+import threading
 import time
 import torch
 import tqdm
+import traceback
 
+from .coordinator import get_auth_key, get_shared_args, serve_queues
+from .example_scheduler import ExampleScheduler
+from .inference_server import InferenceClient, InferenceServer, RemoteModel
 from .run_attack_args_helper import *
 
+# The number of threads each worker uses when running on CPU, unless
+# `--num-workers` or `--threads-per-worker` say otherwise.
+DEFAULT_CPU_WORKER_THREADS = 4
+
+# The number of examples a coordinator keeps queued for remote workers.
+COORDINATOR_MAX_QUEUED = 64
+
+# Environment variables that limit the size of BLAS and OpenMP thread pools.
+THREAD_ENV_VARIABLES = [
+    'OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 
+    'TF_NUM_INTRAOP_THREADS',
+]
+
+def get_worker_layout(args, num_gpus):
+    """ Returns the number of workers to start on `num_gpus` GPUs, and the
+        number of threads each worker should use.
+    """
+    num_cpus = os.cpu_count() or 1
+    num_workers = args.num_workers
+    num_threads = args.threads_per_worker
+    if num_workers is None:
+        if num_gpus > 0:
+            num_workers = num_gpus
+        else:
+            num_workers = max(1, num_cpus // (num_threads or DEFAULT_CPU_WORKER_THREADS))
+    if num_threads is None:
+        num_threads = max(1, num_cpus // num_workers)
+    return num_workers, num_threads
+
+def set_thread_env_variables(num_threads):
+    """ Limits BLAS and OpenMP thread pools to `num_threads`. These are read 
+        when libraries load, so they must be set before workers start.
+    """
+    for env_variable in THREAD_ENV_VARIABLES:
+        if env_variable not in os.environ:
+            os.environ[env_variable] = str(num_threads)
+    
 def set_env_variables(gpu_id):
-    # Only use one GPU, if we have one.
+    # Only use one GPU, if we have one. CPU workers shouldn't see any.
     if 'CUDA_VISIBLE_DEVICES' not in os.environ:
-        os.environ['CUDA_VISIBLE_DEVICES'] = str(gpu_id)
+        os.environ['CUDA_VISIBLE_DEVICES'] = '' if gpu_id is None else str(gpu_id)
     # Disable tensorflow logs, except in the case of an error.
     if 'TF_CPP_MIN_LOG_LEVEL' not in os.environ:
         os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
@@ -21,84 +68,445 @@ def set_env_variables(gpu_id):
     if 'TFHUB_CACHE_DIR' not in os.environ:
         os.environ['TFHUB_CACHE_DIR'] = os.path.expanduser('~/.cache/tensorflow-hub')
 
-def attack_from_queue(args, in_queue, out_queue):
-    gpu_id = torch.multiprocessing.current_process()._identity[0] - 2
+def get_fork_hazards(num_gpus):
+    """ Returns the reasons that workers can't be forked from this process,
+        if any. Workers can only share a parent's attack if they're forked
+        from it, but CUDA and TensorFlow's runtime don't survive a fork, and
+        a forked worker gets none of the parent's other threads (nor can it
+        take the locks they held).
+    """
+    hazards = []
+    if 'fork' not in torch.multiprocessing.get_all_start_methods():
+        hazards.append('this platform cannot fork processes')
+    if num_gpus > 0:
+        hazards.append('workers use CUDA')
+    if tensorflow_is_initialized():
+        hazards.append('TensorFlow has started')
+    if threading.active_count() > 1:
+        thread_names = ', '.join(thread.name for thread in threading.enumerate()
+            if thread is not threading.main_thread())
+        hazards.append(f'other threads are running ({thread_names})')
+    return hazards
+
+def can_fork_workers(num_gpus):
+    return not get_fork_hazards(num_gpus)
+
+def tensorflow_is_initialized():
+    """ Returns whether TensorFlow has started its runtime, and so its
+        thread pools, in this process. Importing it doesn't.
+    """
+    if 'tensorflow' not in sys.modules:
+        return False
+    try:
+        from tensorflow.python.eager import context
+    except ImportError:
+        # Assume the worst if we can't tell.
+        return True
+    return context.context_safe() is not None
+
+def load_shared_attack(args, model=None):
+    """ Loads the attack in the parent process, so that forked workers can 
+        share its read-only weights and embeddings copy-on-write.
+    """
+    set_env_variables(None)
+    _, attack = parse_goal_function_and_attack_from_args(args, model=model)
+    model = attack.goal_function.model
+    module = model.model if hasattr(model, 'model') else model
+    if isinstance(module, torch.nn.Module):
+        # Move the weights into shared memory, so that no worker ever ends up
+        # with a private copy of their pages.
+        module.share_memory()
+    # Stop the garbage collector from tracking everything loaded so far. 
+    # Otherwise, each collection in a worker writes to (and so copies) the 
+    # pages holding these objects. (`gc.freeze` is new in Python 3.7.)
+    if hasattr(gc, 'freeze'):
+        gc.freeze()
+    return attack
+
+def serve_model(args, gpu_id, num_threads, request_queue, response_queues, ready_queue):
+    """ Loads the model and answers workers' requests for its predictions. 
+        Once the model is loaded, puts a `RemoteModel` for workers to build
+        their attacks with on `ready_queue`, or a traceback if it can't be
+        loaded.
+    """
     set_env_variables(gpu_id)
-    _, attack = parse_goal_function_and_attack_from_args(args)
-    if gpu_id == 0:
-        print(attack, '\n')
-    while not in_queue.empty():
+    torch.set_num_threads(num_threads)
+    try:
+        model = parse_model_from_args(args)
+        ready_queue.put(RemoteModel.from_model(model))
+    except Exception:
+        ready_queue.put(traceback.format_exc())
+        return
+    server = InferenceServer(model, request_queue, response_queues, 
+        latency=args.inference_latency / 1000.0)
+    server.serve()
+
+def wait_for_server(server, ready_queue):
+    """ Waits for the inference server to load its model, and returns the 
+        `RemoteModel` it sends.
+    """
+    while True:
+        try:
+            remote_model = ready_queue.get(timeout=1)
+            break
+        except queue.Empty:
+            if not server.is_alive():
+                raise RuntimeError(f'The inference server exited with code {server.exitcode} before loading the model.')
+    if isinstance(remote_model, str):
+        raise RuntimeError(f'The inference server failed to load the model:\n{remote_model}')
+    return remote_model
+
+def attack_from_queue(args, worker_id, gpu_id, num_threads, in_queue, out_queue, 
+        attack=None, inference_client=None, remote_model=None):
+    """ Works on `(task, examples)` tasks from `in_queue` until it gets 
+        `None`. For `'screen'` tasks, `examples` is a list of 
+        `(example_id, text, output)`, and the examples whose goal is already
+        met are found in a single batch. `'attack'` tasks hold a single 
+        `(example_id, text, output, screening)` example to attack, where 
+        `screening` is what screening found (see `Attack.get_screening`).
+
+        Puts a `(message_type, worker_id, example_ids, data)` message on 
+        `out_queue` when starting a task, and another when done: `'screened'`
+        with the compact results of the skipped examples and the screenings
+        of the rest, `'result'` with the compact result of an attack, or 
+        `'error'` with a traceback.
+
+        With an inference server, workers build their attack around
+        `remote_model` and never load the model's weights.
+    """
+    set_env_variables(gpu_id)
+    torch.set_num_threads(num_threads)
+    try:
+        if attack is None:
+            _, attack = parse_goal_function_and_attack_from_args(args, model=remote_model)
+            if worker_id == 0:
+                print(attack, '\n')
+        if inference_client is not None:
+            attack.goal_function.inference_client = inference_client
+        # Each worker opens its own connection to the store and cache.
+        result_store = parse_result_store_from_args(args, attack)
+        parse_tokenization_cache_from_args(args, attack)
+    except Exception:
+        out_queue.put(('load_error', worker_id, None, traceback.format_exc()))
+        return
+    while True:
+        item = in_queue.get()
+        if item is None:
+            break
+        task, examples = item
+        example_ids = [example[0] for example in examples]
+        out_queue.put(('started', worker_id, example_ids, None))
         try: 
-            output, text = in_queue.get()
-            results_gen = attack.attack_dataset([(output, text)], num_examples=1)
-            result = next(results_gen)
-            out_queue.put(result)
-        except Exception as e:
-            out_queue.put(e)
-            exit()
+            if task == 'screen':
+                screened_examples = attack.screen_examples(
+                    [(text, output) for _, text, output in examples])
+                skipped_results = []
+                screenings = []
+                for example_id, (goal_function_result, was_skipped) in zip(example_ids, screened_examples):
+                    if was_skipped:
+                        skipped_results.append((example_id, 
+                            textattack.attack_results.SkippedAttackResult(goal_function_result).to_compact()))
+                    else:
+                        screenings.append((example_id, attack.get_screening(goal_function_result)))
+                out_queue.put(('screened', worker_id, example_ids, (skipped_results, screenings)))
+            else:
+                (_, text, output, screening), = examples
+                # Start from what screening found, rather than tokenizing and
+                # classifying the example again.
+                if screening is None:
+                    (goal_function_result, _), = attack.screen_examples([(text, output)])
+                else:
+                    goal_function_result = attack.restore_screened_example(text, output, screening)
+                result, = attack.attack_screened_examples([(goal_function_result, False)], 
+                    result_store=result_store, random_seed=args.random_seed)
+                # Send a compact version of the result, without its tokenizer.
+                out_queue.put(('result', worker_id, example_ids, result.to_compact()))
+        except Exception:
+            out_queue.put(('error', worker_id, example_ids, traceback.format_exc()))
+
+def start_worker(context, worker_args):
+    worker = context.Process(target=attack_from_queue, args=worker_args, daemon=True)
+    worker.start()
+    return worker
+
+def restart_worker(context, worker_args):
+    """ Replaces a worker that crashed. By now, threads like the progress 
+        bar's have started, so forked workers are replaced by spawned ones
+        that load their own attack.
+    """
+    if context.get_start_method() == 'fork' and not can_fork_workers(0):
+        context = torch.multiprocessing.get_context('spawn')
+        # The attack is the seventh argument.
+        worker_args = worker_args[:6] + (None,) + worker_args[7:]
+    return start_worker(context, worker_args)
+
+def start_local_workers(args):
+    """ Starts workers on this machine. Returns their example and result 
+        queues, the workers, their arguments, their multiprocessing context,
+        and the inference server's process and request queue (or `None`).
+    """
+    num_gpus = torch.cuda.device_count()
+    # With an inference server, the server gets the first GPU and the workers 
+    # only run the search, on CPU.
+    num_worker_gpus = 0 if args.inference_server else num_gpus
+    num_workers, num_threads = get_worker_layout(args, num_worker_gpus)
+    if num_worker_gpus:
+        print(f'Running {num_workers} workers on {num_gpus} GPUs')
+    else:
+        print(f'Running {num_workers} CPU workers with {num_threads} threads each')
+    if args.inference_server:
+        print('Running the model in an inference server on', 'GPU 0' if num_gpus else 'CPU')
+    # Processes we start inherit the thread limits from our environment.
+    set_thread_env_variables(num_threads)
+    fork_hazards = get_fork_hazards(num_gpus) if args.fork_workers else []
+    
+    # Queues and the inference server are always made for spawned processes,
+    # which forked workers can use too. That way, we can still decide not to
+    # fork workers after loading the attack.
+    spawn_context = torch.multiprocessing.get_context('spawn')
+    in_queue = spawn_context.Queue()
+    out_queue = spawn_context.Queue()
+    inference_clients = [None] * num_workers
+    remote_model = None
+    server = request_queue = None
+    if args.inference_server:
+        request_queue = spawn_context.Queue()
+        response_queues = [spawn_context.Queue() for _ in range(num_workers)]
+        ready_queue = spawn_context.Queue()
+        server = spawn_context.Process(
+            target=serve_model,
+            args=(args, 0 if num_gpus else None, num_threads, request_queue, response_queues, ready_queue),
+            daemon=True
+        )
+        server.start()
+        inference_clients = [InferenceClient(worker_id, request_queue, response_queues[worker_id],
+            server_pid=server.pid) for worker_id in range(num_workers)]
+        # Only the server loads the model. Workers get its tokenizer.
+        remote_model = wait_for_server(server, ready_queue)
+    
+    # Forked workers inherit a single copy of the attack from this process.
+    # Otherwise, each worker is spawned fresh and loads its own.
+    attack = None
+    if args.fork_workers and not fork_hazards:
+        attack = load_shared_attack(args, model=remote_model)
+        print(attack, '\n')
+        # Constraints like the Universal Sentence Encoder start TensorFlow
+        # when they're loaded.
+        fork_hazards = get_fork_hazards(num_gpus)
+        if fork_hazards:
+            attack = None
+            if hasattr(gc, 'unfreeze'):
+                gc.unfreeze()
+            gc.collect()
+    if fork_hazards:
+        print(f'Cannot fork workers, since {" and ".join(fork_hazards)}; each worker will load its own attack')
+    context = torch.multiprocessing.get_context('fork' if attack is not None else 'spawn')
+    worker_args = [(args, worker_id, (worker_id % num_worker_gpus) if num_worker_gpus else None, 
+        num_threads, in_queue, out_queue, attack, inference_clients[worker_id], remote_model) 
+        for worker_id in range(num_workers)]
+    workers = [start_worker(context, w_args) for w_args in worker_args]
+    return in_queue, out_queue, workers, worker_args, context, server, request_queue
 
 def run(args):
     pytorch_multiprocessing_workaround()
+    attack_log_manager = parse_logger_from_args(args)
+    checkpoint = parse_checkpoint_from_args(args)
+    if args.coordinator:
+        # Serve examples to workers on other machines, which load the attack
+        # from our arguments. 
+        in_queue, out_queue = serve_queues(args.coordinator, get_auth_key(args), 
+            get_shared_args(args))
     # This makes `args` a namespace that's sharable between processes.
-    # We could do the same thing with the model, but it's actually faster
-    # to let each thread have their own copy of the model.
+    # Unless --fork-workers is set, each worker loads its own copy of the 
+    # model.
     args = torch.multiprocessing.Manager().Namespace(
         **vars(args)
     )
     start_time = time.time()
     
-    attack_log_manager = parse_logger_from_args(args)
-    
-    # We reserve the first GPU for coordinating workers.
-    num_gpus = torch.cuda.device_count()
-    dataset = DATASET_BY_MODEL[args.model](offset=args.num_examples_offset)
-    
-    print(f'Running on {num_gpus} GPUs')
+    dataset = parse_dataset_from_args(args)
     load_time = time.time()
 
     if args.interactive:
         raise RuntimeError('Cannot run in parallel if --interactive set')
     
-    in_queue = torch.multiprocessing.Queue()
-    out_queue =  torch.multiprocessing.Queue()
-    # Add stuff to queue.
-    for _ in range(args.num_examples):
-        label, text = next(dataset)
-        in_queue.put((label, text))
-    # Start workers.
-    pool = torch.multiprocessing.Pool(
-        num_gpus, 
-        attack_from_queue, 
-        (args, in_queue, out_queue)
-    )
-    # Log results asynchronously and update progress bar.
-    num_results = 0
-    num_failures = 0
-    num_successes = 0
-    pbar = tqdm.tqdm(total=args.num_examples, smoothing=0)
-    while num_results < args.num_examples:
-        result = out_queue.get(block=True)
-        if isinstance(result, Exception):
-            raise result
-        attack_log_manager.log_result(result)
-        if (not args.attack_n) or (not isinstance(result, textattack.attack_results.SkippedAttackResult)):
+    example_order = args.example_order or 'longest-first'
+    if args.coordinator:
+        print(f'Coordinating workers at {args.coordinator}')
+        scheduler = ExampleScheduler(in_queue, max_queued=COORDINATOR_MAX_QUEUED, 
+            max_retries=args.max_retries, order=example_order, lease_timeout=args.lease_timeout)
+        workers = []
+        server = None
+        # The IDs of remote workers we've heard from.
+        remote_worker_ids = set()
+    else:
+        in_queue, out_queue, workers, worker_args, context, server, request_queue = start_local_workers(args)
+        # Examples are sent to workers lazily, a couple per worker at a time.
+        scheduler = ExampleScheduler(in_queue, max_queued=2*len(workers), 
+            max_retries=args.max_retries, order=example_order)
+    # Count the examples finished before resuming.
+    finished_results = checkpoint.get_results()
+    attack_log_manager.restore_results(finished_results)
+    num_failures = sum(type(r) == textattack.attack_results.FailedAttackResult for r in finished_results)
+    num_successes = sum(type(r) == textattack.attack_results.SuccessfulAttackResult for r in finished_results)
+    num_results = (num_successes + num_failures) if args.attack_n else len(finished_results)
+    num_errors = 0
+    # Examples are numbered by their index in the dataset.
+    dataset_indices = itertools.count()
+    # Results are logged in dataset order, so each result is held until the
+    # examples before it are finished. These are the examples that haven't 
+    # been logged yet, in order, and the compact results of those that are
+    # finished (or `None` for those we gave up on).
+    unlogged_examples = collections.deque()
+    unlogged_results = {}
+    def add_next_example():
+        for index, (text, ground_truth_output) in zip(dataset_indices, dataset):
+            if index not in checkpoint.results:
+                scheduler.add(text, ground_truth_output, example_id=index, 
+                    length=dataset.example_length(index))
+                unlogged_examples.append(index)
+                return True
+        return False
+    def log_finished_results():
+        while len(unlogged_examples) and (unlogged_examples[0] in unlogged_results):
+            data = unlogged_results.pop(unlogged_examples.popleft())
+            if data is not None:
+                result = textattack.attack_results.AttackResult.from_compact(data)
+                attack_log_manager.log_result(result)
+    def record_result(example_id, data):
+        nonlocal num_results, num_successes, num_failures, num_examples
+        checkpoint.add(example_id, data)
+        unlogged_results[example_id] = data
+        log_finished_results()
+        result_type = textattack.attack_results.AttackResult.compact_type(data)
+        if (not args.attack_n) or (result_type != textattack.attack_results.SkippedAttackResult):
             pbar.update()
             num_results += 1
-            if type(result) == textattack.attack_results.SuccessfulAttackResult:
+            if result_type == textattack.attack_results.SuccessfulAttackResult:
                 num_successes += 1
-            if type(result) == textattack.attack_results.FailedAttackResult:
+            if result_type == textattack.attack_results.FailedAttackResult:
                 num_failures += 1
             pbar.set_description('[Succeeded / Failed / Total] {} / {} / {}'.format(num_successes, num_failures, num_results))
-        else:
-            label, text = next(dataset)
-            in_queue.put((label, text))
+        elif not add_next_example():
+            num_examples -= 1
+    # Stop early if the dataset runs out of examples.
+    num_examples = args.num_examples
+    for _ in range(args.num_examples - num_results):
+        if not add_next_example():
+            num_examples -= 1
+    # Workers that die before starting any examples can't load the attack, so 
+    # there's no use in replacing them.
+    worker_started = {}
+    # Whether a worker died since we last looked for tasks that were taken off
+    # the queue but never started.
+    workers_died = False
+    # Log results asynchronously and update progress bar.
+    pbar = tqdm.tqdm(total=args.num_examples, initial=num_results, smoothing=0)
+    while num_results < num_examples:
+        scheduler.fill()
+        failed_examples = []
+        try:
+            message_type, worker_id, example_ids, data = out_queue.get(timeout=1)
+        except queue.Empty:
+            message_type = None
+        # Workers can't get predictions without the inference server.
+        if server is not None and not server.is_alive():
+            raise RuntimeError(f'The inference server exited with code {server.exitcode}.')
+        if args.coordinator and message_type is not None:
+            remote_worker_ids.add(worker_id)
+            scheduler.renew(worker_id)
+        if message_type == 'load_error':
+            raise RuntimeError(f'Worker {worker_id} failed to load the attack:\n{data}')
+        elif message_type == 'started':
+            worker_started[worker_id] = True
+            scheduler.started(worker_id, example_ids)
+        elif message_type == 'error':
+            failed_examples.extend((worker_id, example_id, data) for example_id in example_ids)
+        elif message_type == 'crashed':
+            # A remote worker crashed, and has been replaced.
+            if not worker_started.get(worker_id):
+                raise RuntimeError(data + ' It had not started an example.')
+            worker_started[worker_id] = False
+            workers_died = True
+            failed_examples.extend((worker_id, example_id, data) 
+                for example_id in scheduler.in_flight(worker_id))
+        elif message_type is None:
+            # Only look for crashed workers once we've read all of their 
+            # messages, so that we know what they were working on.
+            for worker_id, worker in enumerate(workers):
+                if worker.is_alive():
+                    continue
+                if not worker_started.get(worker_id):
+                    raise RuntimeError(f'Worker {worker_id} exited with code {worker.exitcode} before starting an example.')
+                # Replace the worker, and retry its examples.
+                workers[worker_id] = restart_worker(context, worker_args[worker_id])
+                worker_started[worker_id] = False
+                workers_died = True
+                failed_examples.extend((worker_id, example_id, 
+                    f'Worker {worker_id} exited with code {worker.exitcode}.')
+                    for example_id in scheduler.in_flight(worker_id))
+            # A worker that died right after taking a task off the queue never
+            # said it started it. Once the queue is empty, no other worker
+            # can have those tasks either.
+            if workers_died and in_queue.empty():
+                scheduler.requeue_unstarted()
+                workers_died = False
+        # Retry the examples of remote workers we stopped hearing from.
+        for worker_id in scheduler.expired_leases():
+            workers_died = True
+            failed_examples.extend((worker_id, example_id,
+                f'Worker {worker_id} stopped sending heartbeats.')
+                for example_id in scheduler.in_flight(worker_id))
+        for worker_id, example_id, error in failed_examples:
+            if not scheduler.is_pending(example_id):
+                continue
+            if scheduler.failed(worker_id, example_id):
+                print(f'Retrying example {example_id} after error:\n{error}')
+            else:
+                print(f'Giving up on example {example_id} after error:\n{error}')
+                unlogged_results[example_id] = None
+                log_finished_results()
+                num_errors += 1
+                num_results += 1
+                pbar.update()
+        if message_type == 'screened':
+            # Record the skipped examples right away. The rest will be sent to
+            # be attacked.
+            skipped_results, screenings = data
+            skipped_results = [(example_id, skipped_data) for example_id, skipped_data in skipped_results
+                if scheduler.is_pending(example_id)]
+            scheduler.screened(worker_id, [example_id for example_id, _ in data[0]], 
+                dict(screenings))
+            for example_id, skipped_data in skipped_results:
+                record_result(example_id, skipped_data)
+        elif message_type == 'result':
+            example_id, = example_ids
+            if not scheduler.is_pending(example_id):
+                # A retried example may be attacked twice. Only keep one result.
+                continue
+            scheduler.finished(worker_id, example_id)
+            record_result(example_id, data)
+    # Log any results still waiting on examples that never finished.
+    for example_id in unlogged_examples:
+        data = unlogged_results.get(example_id)
+        if data is not None:
+            attack_log_manager.log_result(textattack.attack_results.AttackResult.from_compact(data))
+    # Remote workers we haven't heard from stop once we shut down.
+    for _ in (remote_worker_ids if args.coordinator else workers):
+        in_queue.put(None)
+    if server is not None:
+        request_queue.put(None)
+        server.join()
     pbar.close()
+    checkpoint.close()
     print()
+    if num_errors:
+        print(f'Could not attack {num_errors} examples due to errors.')
     # Enable summary stdout.
     if args.disable_stdout:
         attack_log_manager.enable_stdout()
     attack_log_manager.log_summary()
-    attack_log_manager.flush()
+    attack_log_manager.close()
     print()
     finish_time = time.time()
     print(f'Attack time: {time.time() - load_time}s')
@@ -2,6 +2,7 @@
 A command line parser to run an attack from user specifications.
 """
 
+import collections
 import textattack
 import time
 import tqdm
@@ -28,6 +29,9 @@ def run(args):
     
     # Logger
     attack_log_manager = parse_logger_from_args(args)
+    
+    result_store = parse_result_store_from_args(args, attack)
+    tokenization_cache = parse_tokenization_cache_from_args(args, attack)
 
     load_time = time.time()
     print(f'Load time: {load_time - start_time}s')
@@ -56,19 +60,43 @@ def run(args):
     
     else:
         # Not interactive? Use default dataset.
-        if args.model in DATASET_BY_MODEL:
-            data = DATASET_BY_MODEL[args.model](offset=args.num_examples_offset)
-        else:
-            raise ValueError(f'Error: unsupported model {args.model}')
+        data = parse_dataset_from_args(args)
+        
+        checkpoint = parse_checkpoint_from_args(args)
+        finished_results = checkpoint.get_results()
+        attack_log_manager.restore_results(finished_results)
+        if len(finished_results):
+            checkpoint.restore_rng_state()
         
-        pbar = tqdm.tqdm(total=args.num_examples, smoothing=0)
-        num_results = 0
-        num_failures = 0
-        num_successes = 0
-        for result in attack.attack_dataset(data, 
-                                        num_examples=args.num_examples, 
-                                        shuffle=args.shuffle, 
-                                        attack_n=args.attack_n):
+        num_results = len(finished_results)
+        num_failures = sum(type(r) == textattack.attack_results.FailedAttackResult for r in finished_results)
+        num_successes = sum(type(r) == textattack.attack_results.SuccessfulAttackResult for r in finished_results)
+        num_finished = (num_successes + num_failures) if args.attack_n else num_results
+        pbar = tqdm.tqdm(total=args.num_examples, initial=num_finished, smoothing=0)
+        
+        # The dataset index of each example that has been read, but not yet 
+        # checkpointed.
+        example_indices = collections.deque()
+        def unfinished_examples():
+            for index, example in enumerate(data):
+                if index not in checkpoint.results:
+                    example_indices.append(index)
+                    yield example
+        
+        num_remaining = args.num_examples - num_finished
+        if num_remaining > 0:
+            results = attack.attack_dataset(unfinished_examples(), 
+                                            num_examples=num_remaining, 
+                                            attack_n=args.attack_n,
+                                            num_concurrent=args.num_concurrent,
+                                            result_store=result_store,
+                                            order=args.example_order or 'dataset',
+                                            random_seed=args.random_seed)
+        else:
+            results = []
+        for result in results:
+            checkpoint.add(example_indices.popleft(), result.to_compact())
+            checkpoint.save_rng_state()
             attack_log_manager.log_result(result)
             if not args.disable_stdout:
                 print('\n')
@@ -81,12 +109,17 @@ def run(args):
                 num_failures += 1
             pbar.set_description('[Succeeded / Failed / Total] {} / {} / {}'.format(num_successes, num_failures, num_results))
         pbar.close()
+        checkpoint.close()
+        if result_store is not None:
+            result_store.close()
+        if tokenization_cache is not None:
+            tokenization_cache.close()
         print()
         # Enable summary stdout
         if args.disable_stdout:
             attack_log_manager.enable_stdout()
         attack_log_manager.log_summary()
-        attack_log_manager.flush()
+        attack_log_manager.close()
         print()
         finish_time = time.time()
         print(f'Attack time: {time.time() - load_time}s')
@@ -0,0 +1,78 @@
+import hashlib
+import json
+import os
+import sqlite3
+
+from .tokenized_text import TokenizedText
+
+class TokenizationCache:
+    """ Remembers the encoding of each text of a dataset by a tokenizer, and
+        the span of tokens of each of its words, so that the dataset is only
+        tokenized once.
+
+        Encodings are stored in a SQLite database for each dataset and
+        tokenizer, named by the tokenizer's fingerprint (see
+        `Tokenizer.fingerprint`). A tokenizer with a different vocabulary or
+        `max_seq_length` has a different fingerprint, so it never reads
+        encodings stored by another. Many processes can share a cache.
+
+        Args:
+            cache_dir (str): The directory to store caches in.
+            dataset_name (str): The name of the dataset whose texts are
+                cached.
+            tokenizer (Tokenizer): The tokenizer to encode texts with.
+    """
+    FORMAT_VERSION = 2
+
+    def __init__(self, cache_dir, dataset_name, tokenizer):
+        self.tokenizer = tokenizer
+        dataset_dir = os.path.join(cache_dir, dataset_name)
+        os.makedirs(dataset_dir, exist_ok=True)
+        self.path = os.path.join(dataset_dir,
+            f'v{TokenizationCache.FORMAT_VERSION}-{tokenizer.fingerprint()}.db')
+        # Wait for other processes writing to the cache.
+        self._connection = sqlite3.connect(self.path, timeout=60)
+        with self._connection:
+            self._connection.execute('CREATE TABLE IF NOT EXISTS encodings ('
+                'text TEXT PRIMARY KEY, encoding TEXT)')
+
+    def tokenize(self, texts):
+        """ Returns a `TokenizedText` for each of `texts`, encoding and
+            storing only those that aren't in the cache.
+        """
+        keys = [_sha256(text) for text in texts]
+        encodings = {}
+        # SQLite limits the number of parameters of a query.
+        for i in range(0, len(keys), 500):
+            batch_keys = keys[i:i+500]
+            placeholders = ', '.join('?' * len(batch_keys))
+            encodings.update(self._connection.execute(
+                f'SELECT text, encoding FROM encodings WHERE text IN ({placeholders})',
+                batch_keys))
+        tokenized_texts = []
+        new_rows = []
+        for text, key in zip(texts, keys):
+            if key in encodings:
+                ids, word_token_spans = json.loads(encodings[key])
+                if word_token_spans is not None:
+                    word_token_spans = [None if span is None else tuple(span)
+                        for span in word_token_spans]
+                tokenized_text = TokenizedText(text, self.tokenizer, ids=tuple(ids),
+                    word_token_spans=word_token_spans)
+            else:
+                tokenized_text = TokenizedText(text, self.tokenizer)
+                encoding = json.dumps([tokenized_text.ids, tokenized_text.word_token_spans])
+                new_rows.append((key, encoding))
+                encodings[key] = encoding
+            tokenized_texts.append(tokenized_text)
+        if len(new_rows):
+            with self._connection:
+                self._connection.executemany('INSERT OR REPLACE INTO encodings VALUES (?, ?)',
+                    new_rows)
+        return tokenized_texts
+
+    def close(self):
+        self._connection.close()
+
+def _sha256(s):
+    return hashlib.sha256(s.encode()).hexdigest()
@@ -10,26 +10,59 @@ class TokenizedText:
     """
     SPLIT_TOKEN = '>>>>'
     
-    def __init__(self, text, tokenizer, attack_attrs=dict()):
+    def __init__(self, text, tokenizer, attack_attrs=dict(), word_token_spans=None, ids=None):
         """ Initializer stores text and tensor of tokenized text.
         
         Args:
             text (string): The string that this TokenizedText represents
-            tokenizer (textattack.Tokenizer): an object that can encode text
+            tokenizer (textattack.Tokenizer): an object that can encode text.
+                If `None`, the text is only used for display, and isn't 
+                encoded.
+            word_token_spans (list, optional): The span of token positions 
+                of each word, if it's already known. Otherwise, it's computed
+                while encoding `text`.
+            ids (tuple, optional): The encoding of `text` by `tokenizer`, if
+                it's already known. Otherwise, `text` is encoded.
         """
         text = text.strip()
         self.tokenizer = tokenizer
-        ids = tokenizer.encode(text)
-        if not isinstance(ids, tuple):
+        self.words = words_from_text(text, words_to_ignore=[TokenizedText.SPLIT_TOKEN])
+        if tokenizer is None:
+            ids = None
+        elif ids is not None:
+            pass
+        elif (word_token_spans is None) and hasattr(tokenizer, 'encode_with_word_spans'):
+            ids, word_token_spans = tokenizer.encode_with_word_spans(text, self.words)
+        else:
+            ids = tokenizer.encode(text)
+        if (ids is not None) and not isinstance(ids, tuple):
             # Some tokenizers may tokenize text to a single vector.
             # In this case, wrap the vector in a tuple to mirror the 
             # format of other tokenizers.
             ids = (ids,)
         self.ids = ids
-        self.words = words_from_text(text, words_to_ignore=[TokenizedText.SPLIT_TOKEN])
+        # For each word in `self.words`, the `(start, end)` span of positions
+        # in `self.ids` that it was encoded into, or `None` if it's not 
+        # present (for example, because it was truncated). `None` if the 
+        # tokenizer can't align words.
+        self.word_token_spans = word_token_spans
         self.text = text
         self.attack_attrs = attack_attrs
 
+    @classmethod
+    def _from_encoding(cls, text, tokenizer, words, ids, word_token_spans, attack_attrs):
+        """ Creates a TokenizedText whose words and encoding are already known,
+            without running `tokenizer`.
+        """
+        tokenized_text = cls.__new__(cls)
+        tokenized_text.tokenizer = tokenizer
+        tokenized_text.words = words
+        tokenized_text.ids = ids
+        tokenized_text.word_token_spans = word_token_spans
+        tokenized_text.text = text
+        tokenized_text.attack_attrs = attack_attrs
+        return tokenized_text
+
     def __eq__(self, other):
         return (self.text == other.text) and (self.attack_attrs == other.attack_attrs)
     
@@ -128,6 +161,10 @@ class TokenizedText:
             `index` is replaced with a new word."""
         if len(indices) != len(new_words):
             raise ValueError(f'Cannot replace {len(new_words)} words at {len(indices)} indices.')
+        if len(indices) == 1:
+            new_tokenized_text = self._replace_word_locally(indices[0], new_words[0])
+            if new_tokenized_text is not None:
+                return new_tokenized_text
         words = self.words[:]
         for i, new_word in zip(indices, new_words):
             words[i] = new_word
@@ -139,6 +176,131 @@ class TokenizedText:
         self.attack_attrs['modified_word_index'] = index
         return self.replace_words_at_indices([index], [new_word])
     
+    def _word_text_indices(self, until_index):
+        """ Returns the index in `self.text` of each word up to and including
+            `until_index`. Words are found the same way as in 
+            `replace_new_words`.
+        """
+        text_indices = []
+        look_after_index = 0
+        for word in self.words[:until_index+1]:
+            text_index = self.text.index(word, look_after_index)
+            text_indices.append(text_index)
+            look_after_index = text_index + len(word)
+        return text_indices
+    
+    def _get_local_replacement(self, index, new_word):
+        """ Works out how the encoding of this text changes when the word at 
+            `index` is replaced with `new_word`, by re-tokenizing only the 
+            whitespace-delimited chunk of text that contains the word.
+            
+            Returns:
+                A tuple of the new text, the position in `self.ids` where the
+                chunk starts, the chunk's old and new IDs, the new words, the
+                new word token spans and the index of the first word after 
+                the chunk, or `None` if the encoding can't be updated locally.
+        """
+        if self.ids is None or self.word_token_spans is None:
+            return None
+        if None in self.word_token_spans:
+            # Some words were truncated or could not be aligned, so we can't 
+            # tell how the rest of the encoding shifts.
+            return None
+        if (not new_word) or any(c.isspace() for c in new_word):
+            return None
+        text = self.text
+        old_word = self.words[index]
+        word_start = self._word_text_indices(index)[-1]
+        word_end = word_start + len(old_word)
+        # Expand the word to the whitespace-delimited chunk that contains it.
+        chunk_start = word_start
+        while chunk_start > 0 and not text[chunk_start-1].isspace():
+            chunk_start -= 1
+        chunk_end = word_end
+        while chunk_end < len(text) and not text[chunk_end].isspace():
+            chunk_end += 1
+        old_chunk = text[chunk_start:chunk_end]
+        new_text = text[:word_start] + new_word + text[word_end:]
+        new_chunk = new_text[chunk_start:chunk_end + len(new_word) - len(old_word)]
+        if TokenizedText.SPLIT_TOKEN in old_chunk or TokenizedText.SPLIT_TOKEN in new_chunk:
+            return None
+        # Find the words in `self.words` that are part of the chunk.
+        old_chunk_words = words_from_text(old_chunk)
+        first_chunk_word = index - len(words_from_text(text[chunk_start:word_start]))
+        last_chunk_word = first_chunk_word + len(old_chunk_words)
+        if self.words[first_chunk_word:last_chunk_word] != old_chunk_words:
+            return None
+        new_chunk_words = words_from_text(new_chunk)
+        try:
+            old_chunk_tokens, old_chunk_ids = self.tokenizer.encode_chunk(old_chunk)
+            new_chunk_tokens, new_chunk_ids = self.tokenizer.encode_chunk(new_chunk)
+        except (AttributeError, NotImplementedError):
+            return None
+        # Locate the chunk in `self.ids`, and make sure that tokenizing it on
+        # its own gives the same tokens as it did in context.
+        old_chunk_spans = self.tokenizer.align_words(old_chunk_tokens, old_chunk_words)
+        if None in old_chunk_spans:
+            return None
+        chunk_token_start = self.word_token_spans[first_chunk_word][0] - old_chunk_spans[0][0]
+        for span, chunk_span in zip(self.word_token_spans[first_chunk_word:last_chunk_word], old_chunk_spans):
+            if span != (chunk_span[0] + chunk_token_start, chunk_span[1] + chunk_token_start):
+                return None
+        chunk_token_end = chunk_token_start + len(old_chunk_ids)
+        if list(self.ids[0][chunk_token_start:chunk_token_end]) != list(old_chunk_ids):
+            return None
+        # Shift the spans of the chunk's new words and of every word after it.
+        num_tokens_added = len(new_chunk_ids) - len(old_chunk_ids)
+        new_chunk_spans = [None if span is None else 
+                (span[0] + chunk_token_start, span[1] + chunk_token_start) 
+            for span in self.tokenizer.align_words(new_chunk_tokens, new_chunk_words)]
+        later_spans = [(start + num_tokens_added, end + num_tokens_added) 
+            for start, end in self.word_token_spans[last_chunk_word:]]
+        new_word_token_spans = self.word_token_spans[:first_chunk_word] + new_chunk_spans + later_spans
+        new_words = self.words[:first_chunk_word] + new_chunk_words + self.words[last_chunk_word:]
+        return (new_text, chunk_token_start, old_chunk_ids, new_chunk_ids, 
+            new_words, new_word_token_spans, last_chunk_word)
+    
+    def _replace_word_locally(self, index, new_word):
+        """ Returns a new TokenizedText object where the word at `index` is 
+            replaced with `new_word`. Its word token spans are updated from 
+            this text's, rather than re-aligned from scratch. When possible,
+            the chunk's new IDs are spliced into this text's IDs, so that the
+            full text isn't encoded again. Returns `None` if neither is 
+            possible.
+        """
+        local_replacement = self._get_local_replacement(index, new_word)
+        if local_replacement is None:
+            return None
+        (new_text, chunk_token_start, old_chunk_ids, new_chunk_ids, new_words,
+            new_word_token_spans, last_chunk_word) = local_replacement
+        if len(self.ids) == 1:
+            chunk_token_end = chunk_token_start + len(old_chunk_ids)
+            new_ids = self.tokenizer.splice_ids(list(self.ids[0]), chunk_token_start, 
+                chunk_token_end, list(new_chunk_ids))
+            if new_ids is not None:
+                return TokenizedText._from_encoding(new_text, self.tokenizer, 
+                    new_words, (new_ids,), new_word_token_spans, 
+                    deepcopy(self.attack_attrs))
+        # Models with several input vectors, or texts that may be truncated,
+        # are encoded in full.
+        new_tokenized_text = TokenizedText(new_text, self.tokenizer, 
+            attack_attrs=deepcopy(self.attack_attrs), 
+            word_token_spans=new_word_token_spans)
+        # Make sure that the new chunk and the last word ended up where we
+        # expected. Otherwise, the text was truncated differently.
+        new_ids = list(new_tokenized_text.ids[0])
+        chunk_token_end = chunk_token_start + len(new_chunk_ids)
+        spans_match = (len(new_tokenized_text.words) == len(new_word_token_spans)) and \
+            (new_ids[chunk_token_start:chunk_token_end] == list(new_chunk_ids))
+        if spans_match and last_chunk_word < len(self.words):
+            last_start, last_end = self.word_token_spans[-1]
+            new_last_start, new_last_end = new_word_token_spans[-1]
+            spans_match = (new_ids[new_last_start:new_last_end] == list(self.ids[0][last_start:last_end]))
+        if not spans_match:
+            _, new_tokenized_text.word_token_spans = self.tokenizer.encode_with_word_spans(
+                new_text, new_tokenized_text.words)
+        return new_tokenized_text
+    
     def replace_new_words(self, new_words):
         """ This code returns a new TokenizedText object and replaces old list 
             of words with a new list of words, but preserves the punctuation 
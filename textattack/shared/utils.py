@@ -221,6 +221,30 @@ def has_letter(word):
         if c.isalpha(): return True
     return False
 
+# Orders that examples can be attacked in. Attacks on long examples take the
+# longest, so starting them first keeps parallel workers from waiting on a 
+# single long example at the end of a run. Grouping examples of similar length
+# into buckets keeps concurrent searches in step.
+EXAMPLE_ORDERS = ['dataset', 'longest-first', 'bucketed']
+
+def example_length(text):
+    """ Returns the length that examples are ordered by: their number of 
+        words, which is what the cost of an attack grows with. """
+    return len(words_from_text(text))
+
+def example_order_key(order, length, index):
+    """ Returns a key to sort the example at `index` of `length` (see 
+        `example_length`) by, for attacking examples in `order`. """
+    if order == 'dataset':
+        return (index,)
+    elif order == 'longest-first':
+        return (-length, index)
+    elif order == 'bucketed':
+        # Buckets double in size, longest first.
+        return (-length.bit_length(), index)
+    else:
+        raise ValueError(f'Unknown example order {order}, expected one of {EXAMPLE_ORDERS}')
+
 LOG_STRING = f'\033[34;1mtextattack\033[0m'
 logger = None
 def get_logger():
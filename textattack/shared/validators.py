@@ -59,7 +59,7 @@ def validate_model_goal_function_compatibility(goal_function_class, model_class)
     
     # Otherwise, this is an unknown model–perhaps user-provided, or we forgot to
     # update the corresponding dictionary. Warn user and return.
-    logger.warn(f'Unknown if model {model} compatible with goal function {goal_function}.')
+    logger.warn(f'Unknown if model {model_class.__name__} compatible with goal function {goal_function_class}.')
     return True
     
 def validate_model_gradient_word_swap_compatibility(model):
@@ -67,9 +67,12 @@ def validate_model_gradient_word_swap_compatibility(model):
         Determines if `model` is task-compatible with `GradientBasedWordSwap`. 
         
         We can only take the gradient with respect to an individual word if the
-            model uses a word-based tokenizer.
+            model exposes its input embeddings. Wordpiece models are supported
+            by mapping each word to its span of wordpieces.
     """
     if isinstance(model, textattack.models.helpers.LSTMForClassification):
         return True
+    elif isinstance(model, textattack.models.helpers.BERTForClassification):
+        return True
     else:
         raise ValueError(f'Cannot perform GradientBasedWordSwap on model {model}.')
\ No newline at end of file
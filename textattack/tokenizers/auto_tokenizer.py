@@ -10,9 +10,13 @@ class AutoTokenizer(Tokenizer):
             https://github.com/huggingface/transformers/blob/master/src/transformers/tokenization_auto.py)
         `max_seq_length`: if set, will truncate & pad tokens to fit this length
     """
+    splits_words = True
+    
     def __init__(self, name='bert-base-uncased', max_seq_length=None):
+        self.name = name
         self.tokenizer = transformers.AutoTokenizer.from_pretrained(name)
         self.max_seq_length = max_seq_length
+        self._special_tokens = set(self.tokenizer.all_special_tokens)
 
     def convert_text_to_tokens(self, input_text):
         """ 
@@ -39,3 +43,40 @@ class AutoTokenizer(Tokenizer):
             pad_ids_to_add = self.max_seq_length - len(tokens)
             ids += [self.tokenizer.pad_token_id] * pad_ids_to_add
         return ids
+    
+    def encode_chunk(self, chunk):
+        tokens = self.tokenizer.tokenize(chunk)
+        return tokens, self.tokenizer.convert_tokens_to_ids(tokens)
+    
+    def _get_vocab(self):
+        if hasattr(self.tokenizer, 'get_vocab'):
+            return self.tokenizer.get_vocab()
+        return getattr(self.tokenizer, 'vocab', None)
+    
+    @property
+    def pad_id(self):
+        return self.tokenizer.pad_token_id
+    
+    @property
+    def oov_id(self):
+        return self.tokenizer.unk_token_id
+    
+    def convert_id_to_word(self, _id):
+        """
+        Takes an integer input and returns the corresponding token from the 
+        vocabulary. Subword tokens keep their continuation markers, like `##`.
+        """
+        return self.tokenizer.convert_ids_to_tokens(_id)
+    
+    def is_unknown_token(self, token):
+        return token == self.tokenizer.unk_token
+    
+    def token_text(self, token):
+        """ Strips wordpiece (`##`) and sentencepiece (`▁`, `Ġ`) markers from
+            `token`. Special tokens don't represent any input text.
+        """
+        if token in self._special_tokens:
+            return ''
+        if token.startswith('##'):
+            return token[2:]
+        return token.lstrip('▁Ġ')
@@ -21,18 +21,23 @@ class SpacyTokenizer(Tokenizer):
         spacy_tokens = [t.text for t in self.tokenizer(text)]
         return spacy_tokens[:self.max_seq_length]
         
+    def _convert_token_to_id(self, raw_token):
+        token = raw_token.lower()
+        if token in self.word2id:
+            return self.word2id[token]
+        else:
+            return self.oov_id
+        
     def convert_tokens_to_ids(self, tokens):
-        ids = []
-        for raw_token in tokens:
-            token = raw_token.lower()
-            if token in self.word2id:
-                ids.append(self.word2id[token])
-            else:
-                ids.append(self.oov_id)
+        ids = [self._convert_token_to_id(token) for token in tokens]
         pad_ids_to_add = [self.pad_id] * (self.max_seq_length - len(ids))
         ids += pad_ids_to_add
         return ids
     
+    def encode_chunk(self, chunk):
+        tokens = [t.text for t in self.tokenizer(chunk)]
+        return tokens, [self._convert_token_to_id(token) for token in tokens]
+    
     def convert_id_to_word(self, _id):
         """
         Takes an integer input and returns the corresponding word from the 
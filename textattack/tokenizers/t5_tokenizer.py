@@ -36,6 +36,19 @@ class T5Tokenizer(AutoTokenizer):
         text_to_encode = self.tokenization_prefix + text
         return super().encode(text_to_encode)
     
+    def encode_with_word_spans(self, text, words):
+        """ Encodes a string into IDs of tokens, and maps each word in `words`
+            to its span of tokens. Tokens of the prefix are skipped when
+            aligning, since the prefix contains words of its own.
+        """
+        tokens = self.convert_text_to_tokens(self.tokenization_prefix + text)
+        ids = self.convert_tokens_to_ids(tokens)
+        num_prefix_tokens = len(self.convert_text_to_tokens(self.tokenization_prefix))
+        spans = self.align_words(tokens[num_prefix_tokens:], words)
+        spans = [None if span is None else 
+            (span[0] + num_prefix_tokens, span[1] + num_prefix_tokens) for span in spans]
+        return ids, self._remove_truncated_spans(spans, ids)
+    
     def decode(self, ids):
         """ Converts IDs (typically generated by the model) back to a string. 
         """
@@ -1,7 +1,14 @@
+import hashlib
+import json
+import unicodedata
+
 class Tokenizer:
     """ A generic class that convert text to tokens and tokens to IDs. Supports
         any type of tokenization, be it word, wordpiece, or character-based.
     """
+    # Whether words may be split into several tokens, like wordpieces.
+    splits_words = False
+    
     def convert_text_to_tokens(self, text):
         raise NotImplementedError()
         
@@ -11,4 +18,168 @@ class Tokenizer:
     def encode(self, text):
         """ Converts text directly to IDs. """
         tokens = self.convert_text_to_tokens(text)
-        return self.convert_tokens_to_ids(tokens)
\ No newline at end of file
+        return self.convert_tokens_to_ids(tokens)
+    
+    def encode_with_word_spans(self, text, words):
+        """ Converts text to IDs, and maps each word in `words` to the span of
+            positions it was encoded into. See `align_words`.
+        """
+        tokens = self.convert_text_to_tokens(text)
+        ids = self.convert_tokens_to_ids(tokens)
+        return ids, self._remove_truncated_spans(self.align_words(tokens, words), ids)
+    
+    def encode_chunk(self, chunk):
+        """ Tokenizes a whitespace-delimited chunk of text on its own, without
+            special tokens, truncation or padding. 
+            
+            Only tokenizers that split text on whitespace before anything 
+            else can implement this. It allows `TokenizedText` to update its 
+            encoding locally when a word is replaced. (`TokenizedText` checks
+            that the chunk was tokenized the same way in context, and falls
+            back to encoding the full text if it wasn't.)
+            
+            Returns:
+                A tuple of the chunk's tokens and their IDs.
+        """
+        raise NotImplementedError()
+    
+    def splice_ids(self, ids, start, end, new_ids):
+        """ Replaces positions `start` through `end` of an encoded input 
+            `ids` with `new_ids`, and re-pads the result.
+            
+            Returns `None` if this can't be done without encoding the full 
+            text again: when the input may have been truncated, or would be 
+            truncated after the splice.
+        """
+        max_seq_length = getattr(self, 'max_seq_length', None)
+        if max_seq_length is None:
+            return ids[:start] + new_ids + ids[end:]
+        num_ids = len(ids)
+        while num_ids > 0 and ids[num_ids-1] == self.pad_id:
+            num_ids -= 1
+        if num_ids == len(ids):
+            # Without any padding, we can't tell if `ids` was truncated.
+            return None
+        new_ids = ids[:start] + new_ids + ids[end:num_ids]
+        if len(new_ids) > max_seq_length:
+            return None
+        return new_ids + [self.pad_id] * (max_seq_length - len(new_ids))
+    
+    def _remove_truncated_spans(self, spans, ids):
+        """ Replaces the spans of words that were truncated with `None`. """
+        num_ids = len(ids[0]) if isinstance(ids, tuple) else len(ids)
+        return [span if (span is not None and span[1] <= num_ids) else None 
+            for span in spans]
+    
+    def fingerprint(self):
+        """ Returns a hash that changes whenever the way this tokenizer 
+            encodes text might: its class, its vocabulary, and settings like
+            `max_seq_length`. It isn't memoized, since those can change.
+        """
+        settings = {key: value for key, value in vars(self).items() 
+            if (not key.startswith('_')) and 
+                isinstance(value, (str, int, float, bool, type(None)))}
+        vocab = self._get_vocab()
+        fields = {
+            'class': f'{type(self).__module__}.{type(self).__name__}',
+            'settings': sorted(settings.items()),
+            'vocab': None if vocab is None else sorted(vocab.items()),
+        }
+        return hashlib.sha256(json.dumps(fields).encode()).hexdigest()
+    
+    def _get_vocab(self):
+        """ Returns a dictionary mapping each token in the vocabulary to its
+            ID, or `None` if it's unknown.
+        """
+        return getattr(self, 'word2id', None)
+    
+    def token_text(self, token):
+        """ Returns the portion of the input text that `token` represents. 
+            Tokens that don't represent any input text, like padding, map to 
+            an empty string.
+        """
+        return token
+    
+    def is_unknown_token(self, token):
+        """ Returns whether `token` stands for text that isn't in the 
+            vocabulary, like `[UNK]`.
+        """
+        return False
+    
+    def align_words(self, tokens, words):
+        """ Maps each word in `words` to the span of `tokens` that it was 
+            tokenized into.
+            
+            Args:
+                tokens (list of str): The tokens of the text, as returned by 
+                    `convert_text_to_tokens`
+                words (list of str): The words of the text, in order
+            
+            Returns:
+                A list with a `(start, end)` span of token indices for each 
+                word, or `None` for words that can't be found in `tokens` (for 
+                example, because they were truncated).
+        """
+        token_texts = []
+        char_token_indices = []
+        for i, token in enumerate(tokens):
+            if self.is_unknown_token(token):
+                token_text = _UNKNOWN_CHAR
+            else:
+                token_text = _normalize(self.token_text(token))
+            token_texts.append(token_text)
+            char_token_indices.extend([i] * len(token_text))
+        chars = ''.join(token_texts)
+        spans = []
+        look_after_index = 0
+        # Each word starts right after the previous one, past any characters 
+        # that can't be part of a word. Once a word can't be found there, the 
+        # next word is searched for anywhere after it.
+        anchored = True
+        for word in words:
+            word = _normalize(word)
+            start, end = _find_word(chars, word, look_after_index, anchored) if word else (-1, -1)
+            anchored = start >= 0
+            if start < 0:
+                spans.append(None)
+                continue
+            spans.append((char_token_indices[start], char_token_indices[end-1] + 1))
+            look_after_index = end
+        return spans
+
+# Stands for an unknown token in the text that `align_words` matches words 
+# against. (Words are made of letters, so it never matches one by accident.)
+_UNKNOWN_CHAR = '\0'
+
+def _find_word(chars, word, look_after_index, anchored):
+    """ Returns the start and end of the first match of `word` in `chars` at
+        or after `look_after_index`, or `(-1, -1)`. If `anchored`, only 
+        characters that can't be part of a word are skipped before the match.
+    """
+    for start in range(look_after_index, len(chars)):
+        end = _match_word(chars, word, start)
+        if end >= 0:
+            return start, end
+        if anchored and (chars[start].isalpha() or chars[start] == _UNKNOWN_CHAR):
+            break
+    return -1, -1
+
+def _match_word(chars, word, start):
+    """ Returns where `word` ends, if it matches `chars` at `start`, or -1. An
+        unknown token matches the rest of the word.
+    """
+    end = start
+    for c in word:
+        if end >= len(chars):
+            return -1
+        if chars[end] == _UNKNOWN_CHAR:
+            return end + 1
+        if chars[end] != c:
+            return -1
+        end += 1
+    return end
+
+def _normalize(s):
+    """ Lowercases `s` and strips its accents, since many tokenizers do. """
+    s = unicodedata.normalize('NFD', s.lower())
+    return ''.join(c for c in s if unicodedata.category(c) != 'Mn')
@@ -12,6 +12,10 @@ class GradientBasedWordSwap(Transformation):
         
             https://arxiv.org/pdf/1712.06751.pdf
         
+        For wordpiece models, like BERT, the gradient of each word is averaged
+        over its wordpieces, and only whole-word tokens are suggested as
+        replacements.
+        
         Arguments:
             model (nn.Module): The model to attack. Model must have a 
                 `word_embeddings` matrix and `convert_id_to_word` function.
@@ -24,7 +28,10 @@ class GradientBasedWordSwap(Transformation):
             raise ValueError('Model needs word embedding matrix for gradient-based word swap')
         if not hasattr(model, 'lookup_table'):
             raise ValueError('Model needs lookup table for gradient-based word swap')
-        if not hasattr(model, 'zero_grad'):
+        # Some models, like `BERTForClassification`, wrap the `nn.Module`
+        # that actually holds their parameters.
+        self._module = model.model if hasattr(model, 'model') else model
+        if not hasattr(self._module, 'zero_grad'):
             raise ValueError('Model needs `zero_grad()` for gradient-based word swap')
         if not hasattr(model.tokenizer, 'convert_id_to_word'):
             raise ValueError('Tokenizer needs `convert_id_to_word()` for gradient-based word swap')
@@ -32,10 +39,13 @@ class GradientBasedWordSwap(Transformation):
             raise ValueError('Tokenizer needs `pad_id` for gradient-based word swap')
         if not hasattr(model.tokenizer, 'oov_id'):
             raise ValueError('Tokenizer needs `oov_id` for gradient-based word swap')
-        self.loss = torch.nn.CrossEntropyLoss()
+        # Sum the loss over the batch so that each text's gradient is the
+        # same as if it had been passed through the model alone.
+        self.loss = torch.nn.CrossEntropyLoss(reduction='sum')
         self.model = model
-        self.pad_id = self.model.tokenizer.pad_id
-        self.oov_id = self.model.tokenizer.oov_id
+        self.tokenizer = self.model.tokenizer
+        self.pad_id = self.tokenizer.pad_id
+        self.oov_id = self.tokenizer.oov_id
         self.top_n = top_n
         self.replace_stopwords = replace_stopwords
         if replace_stopwords:
@@ -43,72 +53,146 @@ class GradientBasedWordSwap(Transformation):
         else:
             from nltk.corpus import stopwords
             self.stopwords = set(stopwords.words('english'))
+        # Register a single hook on the word embeddings that captures their
+        # gradient on every backward pass.
+        self._emb_hook = Hook(self.model.word_embeddings)
+        # Whether the model's word embeddings are run on a batch of shape
+        # (batch, seq_len), or on its transpose, like in our LSTMs.
+        self.batch_first = getattr(self.model, 'batch_first', True)
+        self._candidate_mask = self._get_candidate_mask()
+
+    def _get_candidate_mask(self):
+        """ Returns a boolean mask over the vocabulary that is `True` for
+            every ID that is a valid replacement.
+        """
+        vocab_size = self.model.lookup_table.size(0)
+        mask = torch.zeros(vocab_size, dtype=torch.bool)
+        for _id in range(vocab_size):
+            try:
+                word = self.tokenizer.convert_id_to_word(_id)
+            except KeyError:
+                continue
+            if self.tokenizer.splits_words:
+                # Only consider whole words. This rules out numbers, 
+                # punctuation, subword pieces and special tokens.
+                mask[_id] = (self.tokenizer.token_text(word) == word) and \
+                    (utils.words_from_text(word) == [word])
+            else:
+                # Do not consider words that are solely numbers or punctuation.
+                mask[_id] = utils.has_letter(word)
+        # Don't change to the pad or out-of-vocabulary tokens.
+        mask[self.pad_id] = False
+        mask[self.oov_id] = False
+        return mask.to(utils.get_device())
+
+    def _get_replacement_words_by_grad(self, texts, indices_to_replace):
+        """ Returns a list for each text in `texts` containing the `top_n`
+            best `(word, index)` replacements, based off of the model's
+            gradient. All texts share a single forward and backward pass.
 
-    def _get_replacement_words_by_grad(self, text, indices_to_replace):
-        """ Returns returns a list containing all possible words to replace
-            `word` with, based off of the model's gradient.
-            
             Arguments:
-                text (TokenizedText): The full text input to perturb
-                word_index (int): index of the word to replace
+                texts (list of TokenizedText): The full text inputs to perturb
+                indices_to_replace (list of list of int): For each text, the
+                    indices of the words that may be replaced
         """
-        self.model.train()
-       
-        lookup_table = self.model.lookup_table.to(utils.get_device())
-        lookup_table_transpose = lookup_table.transpose(0,1)
-        
-        # set backward hook on the word embeddings for input x
-        emb_hook = Hook(self.model.word_embeddings, backward=True)
-    
-        self.model.zero_grad()
-        predictions = self._call_model(text)
-        original_label = predictions.argmax()
-        y_true = torch.Tensor([original_label]).long().to(utils.get_device())
+        self._set_rnns_training(True)
+        self._module.zero_grad()
+        device = next(self._module.parameters()).device
+        num_fields = len(texts[0].ids)
+        ids = [torch.tensor([text.ids[f] for text in texts]).to(device) 
+            for f in range(num_fields)]
+        predictions = self.model(*ids)
+        y_true = predictions.argmax(dim=1)
         loss = self.loss(predictions, y_true)
         loss.backward()
-    
-        # grad w.r.t to word embeddings
-        emb_grad = emb_hook.output[0].to(utils.get_device()).squeeze()
-    
-        # grad differences between all flips and original word (eq. 1 from paper)
-        vocab_size = lookup_table.size(0)
-        diffs = torch.zeros(len(indices_to_replace), vocab_size)
-        for j, word_idx in enumerate(indices_to_replace):
-            # Get the grad w.r.t the one-hot index of the word.
-            b_grads = emb_grad[word_idx].view(1,-1).mm(lookup_table_transpose).squeeze()
-            a_grad = b_grads[text.ids[0][word_idx]]
-            diffs[j] = b_grads-a_grad
-        
-        # Don't change to the pad token.
-        diffs[:, self.model.tokenizer.pad_id] = float('-inf')
-        
-        # Find best indices within 2-d tensor by flattening.
-        word_idxs_sorted_by_grad = (-diffs).flatten().argsort()
-        
+        # grad w.r.t to word embeddings, of shape (num_texts, seq_len, emb_dim)
+        emb_grad = self._emb_hook.batch_first_grad(self.batch_first).to(utils.get_device())
+        self._emb_hook.clear()
+        self._set_rnns_training(False)
+
+        lookup_table = self.model.lookup_table.to(utils.get_device())
+        lookup_table_transpose = lookup_table.transpose(0,1)
+        token_ids = ids[0].to(utils.get_device())
+        num_words_in_vocab = lookup_table.size(0)
         candidates = []
-        num_words_in_text, num_words_in_vocab = diffs.shape
-        for idx in word_idxs_sorted_by_grad.tolist():
-            idx_in_diffs = idx // num_words_in_vocab
-            idx_in_vocab = idx % (num_words_in_vocab)
-            idx_in_sentence = indices_to_replace[idx_in_diffs]
-            word = self.model.tokenizer.convert_id_to_word(idx_in_vocab)
-            if not utils.has_letter(word): 
-                # Do not consider words that are solely letters or punctuation.
+        # Score the flips of one text at a time, so that only a 
+        # (words in the text, vocab size) matrix is ever allocated.
+        for j, (text, text_indices) in enumerate(zip(texts, indices_to_replace)):
+            num_candidates = min(self.top_n, len(text_indices) * num_words_in_vocab)
+            if num_candidates == 0:
+                candidates.append([])
                 continue
-            candidates.append((word, idx_in_sentence))
-            if len(candidates) == self.top_n:
-                break
-            
-        self.model.eval()
+            # Average the gradient over the tokens of each word we may replace.
+            # For words made of a single token, this is just that token's 
+            # gradient.
+            word_grads = []
+            original_dot_products = []
+            for word_idx in text_indices:
+                span_start, span_end = text.word_token_spans[word_idx]
+                span_grads = emb_grad[j, span_start:span_end]
+                span_embeddings = lookup_table[token_ids[j, span_start:span_end]]
+                word_grads.append(span_grads.mean(dim=0))
+                original_dot_products.append((span_grads * span_embeddings).sum(dim=1).mean())
+            word_grads = torch.stack(word_grads)
+            original_dot_products = torch.stack(original_dot_products)
+            # grad differences between all flips and original word (eq. 1 from paper)
+            diffs = word_grads.mm(lookup_table_transpose) - original_dot_products.unsqueeze(1)
+            diffs.masked_fill_(~self._candidate_mask, float('-inf'))
+            # Find best indices within the 2-d tensor by flattening.
+            text_candidates = []
+            values, idxs = diffs.flatten().topk(num_candidates)
+            for value, idx in zip(values.tolist(), idxs.tolist()):
+                if value == float('-inf'):
+                    break
+                idx_in_diffs, idx_in_vocab = divmod(idx, num_words_in_vocab)
+                word = self.tokenizer.convert_id_to_word(idx_in_vocab)
+                text_candidates.append((word, text_indices[idx_in_diffs]))
+            candidates.append(text_candidates)
         return candidates
-    
-    def _call_model(self, text):
-        """ A helper function to query `self.model` with TokenizedText `text`.
+
+    def _set_rnns_training(self, mode):
+        """ cuDNN can only run backward through RNNs in training mode. Only 
+            the RNNs are switched, so that dropout stays off while we take the 
+            gradient.
+        """
+        for module in self._module.modules():
+            if isinstance(module, torch.nn.RNNBase):
+                module.train(mode)
+
+    def _get_indices_to_replace(self, tokenized_text, indices_to_replace):
+        """ Returns the indices in `tokenized_text` that may be replaced. """
+        words = tokenized_text.words
+        if not indices_to_replace:
+            indices_to_replace = range(len(words))
+        spans = tokenized_text.word_token_spans
+        # Don't replace stopwords or words that were truncated from the input.
+        return [i for i in indices_to_replace
+            if (spans[i] is not None) and not (words[i].lower() in self.stopwords)]
+
+    def call_many(self, tokenized_texts, indices_to_replace=None):
         """
-        ids = torch.tensor(text.ids[0])
-        ids = ids.to(next(self.model.parameters()).device)
-        ids = ids.unsqueeze(0)
-        return self.model(ids)
+        Returns a list of all possible transformations for each text in
+        `tokenized_texts`. Gradients are computed for up to
+        `MODEL_BATCH_SIZE` texts at a time.
+
+        If indices_to_replace is set, it should contain the indices to replace
+        for each text, and only words at those indices are replaced.
+        """
+        if indices_to_replace is None:
+            indices_to_replace = [None] * len(tokenized_texts)
+        indices_to_replace = [self._get_indices_to_replace(text, indices)
+            for text, indices in zip(tokenized_texts, indices_to_replace)]
+        batch_size = utils.config('MODEL_BATCH_SIZE')
+        transformations = []
+        for batch_start in range(0, len(tokenized_texts), batch_size):
+            batch_texts = tokenized_texts[batch_start:batch_start+batch_size]
+            batch_indices = indices_to_replace[batch_start:batch_start+batch_size]
+            batch_replacements = self._get_replacement_words_by_grad(batch_texts, batch_indices)
+            for text, replacements in zip(batch_texts, batch_replacements):
+                transformations.append(
+                    [text.replace_word_at_index(idx, word) for word, idx in replacements]
+                )
+        return transformations
 
     def __call__(self, tokenized_text, indices_to_replace=None):
         """
@@ -117,31 +201,41 @@ class GradientBasedWordSwap(Transformation):
         If indices_to_replace is set, only replaces words at those indices.
         
         """
-        words = tokenized_text.words
-        if not indices_to_replace:
-            indices_to_replace = list(range(len(words)))
-        
-        transformations = []
-        # Don't replace stopwords.
-        indices_to_replace = [i for i in indices_to_replace if not (words[i].lower() in self.stopwords)]
-        transformations = []
-        for word, idx in self._get_replacement_words_by_grad(tokenized_text, indices_to_replace):
-            transformations.append(tokenized_text.replace_word_at_index(idx, word))
-        return transformations
-        
+        return self.call_many([tokenized_text], [indices_to_replace])[0]
+
     def extra_repr_keys(self): 
         return ['top_n', 'replace_stopwords']
-    
+
 class Hook:
-    def __init__(self, module, backward=False):
-        if backward:
-            self.hook = module.register_backward_hook(self.hook_fn)
-        else:
-            self.hook = module.register_forward_hook(self.hook_fn)
-            
+    """ Captures the output gradient of an embedding module.
+
+        The hook is registered once and stays in place, recording the
+        gradient of every forward pass that requires one.
+    """
+    def __init__(self, module):
+        self.hook = module.register_forward_hook(self.hook_fn)
+        self.clear()
+
     def hook_fn(self, module, input, output):
-        self.input = [x.to(utils.get_device()) for x in input]
-        self.output = [x.to(utils.get_device()) for x in output]
-        
+        if not output.requires_grad:
+            return
+        output.register_hook(self.grad_hook_fn)
+
+    def grad_hook_fn(self, grad):
+        self.grad = grad
+
+    def batch_first_grad(self, batch_first=True):
+        """ Returns the captured gradient, of shape (batch, seq_len, emb_dim).
+            Unless `batch_first` is set, the module was run on the transpose
+            of the batch, so its gradient is transposed back.
+        """
+        if batch_first:
+            return self.grad
+        else:
+            return self.grad.transpose(0, 1)
+
+    def clear(self):
+        self.grad = None
+
     def close(self):
-        self.hook.remove()
\ No newline at end of file
+        self.hook.remove()